@@ -0,0 +1,173 @@
+# backfill_stats.py
+
+from sqlalchemy import select, delete, insert, update, func, case, bindparam
+from sqlalchemy.orm import Session
+from model import SessionLocal, engine, Base
+from model import User, TestAttempt, AttemptAnswer, UserStats, LevelStats
+from constants import LEVELS
+
+# Filas por INSERT al escribir los resúmenes
+CHUNK_SIZE = 5000
+
+
+def backfill_user_stats(db: Session) -> int:
+    """
+    Reconstruye la tabla `user_stats` (y las columnas de resumen de `users`)
+    a partir del historial completo.
+    Solo cuenta intentos terminados (con puntaje), igual que `finish_test`.
+    No hace commit. Retorna el número de filas escritas.
+    """
+    stats = {}
+
+    def get_stats(user_id: int, test_type: str) -> dict:
+        key = (user_id, test_type)
+        if key not in stats:
+            stats[key] = {
+                "user_id": user_id,
+                "test_type": test_type,
+                "attempts_count": 0,
+                "score_sum": 0.0,
+                "avg_score": 0.0,
+                "high_score": 0.0,
+                "last_level": None,
+                "last_attempt_time": None,
+                "scores_over_time": [],
+                "level_performance": {},
+            }
+        return stats[key]
+
+    # 1. Puntajes por intento, en orden cronológico (solo columnas, sin respuestas)
+    attempts_stmt = select(
+        TestAttempt.user_id, TestAttempt.test_type, TestAttempt.score_percentage,
+        TestAttempt.assigned_level, TestAttempt.start_time
+    ).where(
+        TestAttempt.score_percentage.is_not(None)
+    ).order_by(TestAttempt.user_id, TestAttempt.test_type, TestAttempt.start_time)
+
+    for user_id, test_type, score, level, start_time in db.execute(attempts_stmt):
+        row = get_stats(user_id, test_type)
+        row["attempts_count"] += 1
+        row["score_sum"] += score
+        row["high_score"] = max(row["high_score"], score)
+        if level:
+            row["last_level"] = level
+        row["last_attempt_time"] = start_time
+        row["scores_over_time"].append(score)
+
+    # 2. Aciertos por nivel, agregados en la BD
+    correct = func.sum(case((AttemptAnswer.is_correct, 1), else_=0))
+    levels_stmt = select(
+        TestAttempt.user_id, TestAttempt.test_type, AttemptAnswer.question_level,
+        correct, func.count(AttemptAnswer.id)
+    ).select_from(AttemptAnswer).join(
+        TestAttempt, AttemptAnswer.test_attempt_id == TestAttempt.id
+    ).where(
+        TestAttempt.score_percentage.is_not(None),
+        AttemptAnswer.question_level.is_not(None)
+    ).group_by(TestAttempt.user_id, TestAttempt.test_type, AttemptAnswer.question_level)
+
+    for user_id, test_type, level, n_correct, n_total in db.execute(levels_stmt):
+        row = get_stats(user_id, test_type)
+        row["level_performance"][level] = {"correct": int(n_correct or 0), "total": n_total}
+
+    # 3. Reemplazar el contenido de la tabla
+    rows = list(stats.values())
+    for row in rows:
+        if row["attempts_count"]:
+            row["avg_score"] = row["score_sum"] / row["attempts_count"]
+
+    db.execute(delete(UserStats))
+    for i in range(0, len(rows), CHUNK_SIZE):
+        db.execute(insert(UserStats), rows[i:i + CHUNK_SIZE])
+
+    backfill_user_summaries(db)
+    return len(rows)
+
+
+def backfill_user_summaries(db: Session):
+    """
+    Rellena las columnas de resumen de `users` (tabla del admin) con el
+    criterio de la tabla original: los conteos incluyen todos los intentos
+    iniciados, el promedio solo las prácticas terminadas, y el nivel es el
+    del último examen final (N/A si aún no termina). No hace commit.
+    """
+    users = User.__table__
+    attempts = TestAttempt.__table__
+
+    def of_type(test_type):
+        return (attempts.c.user_id == users.c.id) & (attempts.c.test_type == test_type)
+
+    practice_count = select(func.count(attempts.c.id)).where(of_type('practice')).scalar_subquery()
+    final_count = select(func.count(attempts.c.id)).where(of_type('final')).scalar_subquery()
+    practice_avg = select(func.avg(attempts.c.score_percentage)).where(
+        of_type('practice'), attempts.c.score_percentage.is_not(None)
+    ).scalar_subquery()
+    last_level = select(attempts.c.assigned_level).where(of_type('final')).order_by(
+        attempts.c.start_time.desc(), attempts.c.id.desc()
+    ).limit(1).scalar_subquery()
+
+    # Por rangos de ids (usa el índice user_id/test_type/start_time)
+    low, high = db.execute(select(func.min(users.c.id), func.max(users.c.id))).one()
+    if low is None:
+        return
+    for first in range(low, high + 1, CHUNK_SIZE):
+        db.execute(
+            update(users)
+            .where(users.c.id.between(first, first + CHUNK_SIZE - 1))
+            .values(
+                practice_attempts=practice_count,
+                final_attempts=final_count,
+                avg_practice_score=func.coalesce(practice_avg, 0.0),
+                last_final_level=func.coalesce(last_level, "N/A")
+            )
+        )
+
+
+def backfill_level_stats(db: Session) -> int:
+    """
+    Reconstruye los contadores globales de `level_stats` agrupando todas
+    las respuestas en la BD. Crea una fila por nivel (aunque valga cero),
+    lo que marca los contadores como construidos. No hace commit.
+    """
+    counters = {level: {"level": level, "correct": 0, "total": 0} for level in LEVELS}
+
+    correct = func.sum(case((AttemptAnswer.is_correct, 1), else_=0))
+    stmt = select(
+        AttemptAnswer.question_level, correct, func.count(AttemptAnswer.id)
+    ).where(
+        AttemptAnswer.question_level.in_(LEVELS)
+    ).group_by(AttemptAnswer.question_level)
+
+    for level, n_correct, n_total in db.execute(stmt):
+        counters[level] = {"level": level, "correct": int(n_correct or 0), "total": n_total}
+
+    db.execute(delete(LevelStats))
+    db.execute(insert(LevelStats), list(counters.values()))
+    return len(counters)
+
+
+def backfill_all(db: Session):
+    """Reconstruye todas las tablas de resumen. No hace commit."""
+    user_rows = backfill_user_stats(db)
+    level_rows = backfill_level_stats(db)
+    return user_rows, level_rows
+
+
+def run_backfill():
+    db = SessionLocal()
+    try:
+        print("Reconstruyendo resúmenes (user_stats, level_stats)...")
+        user_rows, level_rows = backfill_all(db)
+        db.commit()
+        print(f"¡Listo! Se escribieron {user_rows} filas en user_stats y {level_rows} en level_stats.")
+    except Exception as e:
+        print(f"Error al reconstruir las estadísticas: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    # Crea las tablas de resumen si aún no existen
+    Base.metadata.create_all(bind=engine, checkfirst=True)
+    run_backfill()
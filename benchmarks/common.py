@@ -0,0 +1,191 @@
+import atexit
+import os
+import random
+import tempfile
+import time
+import statistics
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker
+from model import Base, Question, Option, User, TestAttempt, AttemptAnswer
+from populate_db import questions_data
+from backfill_stats import backfill_all
+from constants import DATABASE_URL, DATABASE_READ_URL
+
+# Ayuda de --url para todos los benchmarks: la BD indicada se vacía
+URL_HELP = "URL de una BD desechable: sus tablas se BORRAN y se vuelven a crear (por defecto, SQLite temporal)"
+_LOCAL_HOSTS = {None, "", "localhost", "127.0.0.1", "::1"}
+
+
+def add_url_arguments(parser, flag: str = "--url", help: str = URL_HELP):
+    """Agrega `flag` (la URL de la BD) y `--drop-existing` a un benchmark."""
+    parser.add_argument(flag, help=help)
+    parser.add_argument("--drop-existing", action="store_true",
+                        help="permite usar la BD de DATABASE_URL/DATABASE_READ_URL (se borra por completo)")
+
+
+def _same_database(a: str, b: str) -> bool:
+    """True si dos URLs apuntan a la misma BD (sin importar driver, usuario ni puerto)."""
+    a, b = make_url(a), make_url(b)
+    if a.get_backend_name() != b.get_backend_name():
+        return False
+    if a.get_backend_name() == "sqlite":
+        return bool(a.database) and a.database != ":memory:" and \
+            os.path.abspath(a.database) == os.path.abspath(b.database or "")
+    same_host = a.host == b.host or (a.host in _LOCAL_HOSTS and b.host in _LOCAL_HOSTS)
+    return same_host and a.database == b.database
+
+
+def create_bench_engine(url: str | None = None, drop_existing: bool = False, **engine_kwargs):
+    """
+    Crea el engine de un benchmark. Sin URL se usa un archivo SQLite
+    temporal y desechable, para no tocar la BD real. Con URL, sus tablas
+    se borran y se recrean; por eso se rechaza la BD configurada en
+    `DATABASE_URL`/`DATABASE_READ_URL` salvo que se pase `drop_existing`.
+    `engine_kwargs` se pasan a `create_engine` (p. ej. `pool_size`).
+    """
+    if url and not drop_existing:
+        for configured in (DATABASE_URL, DATABASE_READ_URL):
+            if configured and _same_database(url, configured):
+                raise ValueError(
+                    f"'{make_url(url).render_as_string()}' es la BD de la aplicación y el benchmark "
+                    "borraría sus tablas. Usa una BD desechable o pasa --drop-existing."
+                )
+    if not url:
+        fd, path = tempfile.mkstemp(prefix="bench_", suffix=".db")
+        os.close(fd)
+        atexit.register(lambda: os.path.exists(path) and os.remove(path))
+        url = f"sqlite:///{path}"
+    engine = create_engine(url, **engine_kwargs)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+def create_bench_session_factory(engine) -> sessionmaker:
+    """Fábrica de sesiones con la misma configuración que `model.SessionLocal`."""
+    return sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+
+def create_bench_session(engine):
+    return create_bench_session_factory(engine)()
+
+
+def seed_question_bank(engine, copies: int = 1) -> int:
+    """
+    Inserta el banco de preguntas de `populate_db` `copies` veces
+    (para simular bancos más grandes). Retorna el número de preguntas.
+    """
+    db = create_bench_session(engine)
+    try:
+        count = 0
+        for _ in range(copies):
+            for level, questions in questions_data.items():
+                for q_data in questions:
+                    options = [
+                        Option(text=opt, is_correct=(opt == q_data["correct_answer"]))
+                        for opt in q_data["options"] if opt
+                    ]
+                    db.add(Question(
+                        text=q_data["text"],
+                        level=level,
+                        options=options,
+                        image_path=q_data.get("image_file")
+                    ))
+                    count += 1
+        db.commit()
+        return count
+    finally:
+        db.close()
+
+
+def seed_history(engine, users: int, attempts_per_user: int = 5, answers_per_attempt: int = 20,
+                 seed: int = 0) -> None:
+    """
+    Genera un historial sintético (usuarios, intentos terminados y respuestas)
+    con inserts en lote, y reconstruye las tablas de resumen.
+    Requiere que el banco de preguntas ya esté sembrado.
+    """
+    rng = random.Random(seed)
+    db = create_bench_session(engine)
+    try:
+        questions = db.execute(
+            select(Question.id, Question.level, Option.id, Option.is_correct).join(Option)
+        ).all()
+        by_question = {}
+        for q_id, level, opt_id, is_correct in questions:
+            by_question.setdefault((q_id, level), []).append((opt_id, is_correct))
+        question_keys = list(by_question)
+
+        db.execute(insert(User), [
+            {"username": f"bench_user_{i}", "password_hash": b"x"} for i in range(users)
+        ])
+        user_ids = db.execute(select(User.id).where(User.username.like("bench_user_%"))).scalars().all()
+
+        for user_id in user_ids:
+            attempts = []
+            for _ in range(attempts_per_user):
+                test_type = rng.choice(("practice", "final"))
+                attempts.append({
+                    "user_id": user_id,
+                    "test_type": test_type,
+                    "score_percentage": rng.uniform(0, 100),
+                    "assigned_level": rng.choice(list(questions_data)),
+                })
+            db.execute(insert(TestAttempt), attempts)
+        attempt_ids = db.execute(select(TestAttempt.id)).scalars().all()
+
+        answers = []
+        for attempt_id in attempt_ids:
+            for q_id, level in rng.sample(question_keys, min(answers_per_attempt, len(question_keys))):
+                opt_id, is_correct = rng.choice(by_question[(q_id, level)])
+                answers.append({
+                    "test_attempt_id": attempt_id,
+                    "question_id": q_id,
+                    "selected_option_id": opt_id,
+                    "time_taken_seconds": rng.randint(5, 59),
+                    "is_correct": is_correct,
+                    "question_level": level,
+                })
+            if len(answers) >= 10000:
+                db.execute(insert(AttemptAnswer), answers)
+                answers = []
+        if answers:
+            db.execute(insert(AttemptAnswer), answers)
+
+        backfill_all(db)
+        db.commit()
+    finally:
+        db.close()
+
+
+def time_call(fn, repeat: int) -> list[float]:
+    """Ejecuta `fn` `repeat` veces y retorna la duración de cada llamada en segundos."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def percentile(ordered: list[float], p: float) -> float:
+    """Percentil `p` (0-1) de una lista ya ordenada (método del rango más cercano)."""
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def summarize(timings: list[float]) -> dict:
+    """Resumen en milisegundos de una lista de duraciones."""
+    ordered = sorted(timings)
+    return {
+        "n": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": ordered[len(ordered) // 2] * 1000,
+        "p95_ms": percentile(ordered, 0.95) * 1000,
+        "p99_ms": percentile(ordered, 0.99) * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def print_summary(label: str, stats: dict):
+    print(f"{label:<40} media={stats['mean_ms']:9.3f} ms  p50={stats['p50_ms']:9.3f} ms  máx={stats['max_ms']:9.3f} ms  (n={stats['n']})")
@@ -0,0 +1,107 @@
+"""
+Benchmark: consultas de los controladores antes y después de los índices
+de la migración 2 (`model/migrations.py`).
+
+Siembra un historial sintético, elimina los índices, mide, los vuelve a
+crear con la migración y mide de nuevo.
+
+Uso:
+    python -m benchmarks.indexes [--users 2000] [--attempts 5] [--repeat 20] [--url mysql+pymysql://...]
+
+Aviso: igual que los demás benchmarks, la BD de --url se vacía y se vuelve a crear.
+
+Nota: en MySQL/InnoDB las llaves foráneas ya crean un índice implícito sobre
+`attempt_answers.test_attempt_id` y `options.question_id`, por lo que ahí la
+diferencia viene sobre todo del índice compuesto de `test_attempts`.
+"""
+import argparse
+import random
+from sqlalchemy import select, text
+from sqlalchemy.orm import selectinload
+from model import User, Question, Option, TestAttempt, AttemptAnswer
+from model.migrations import _add_hot_path_indexes, _model_index
+from controller.user_controller import UserController
+from controller.test_controller import TestController
+from benchmarks.common import (
+    add_url_arguments, create_bench_engine, create_bench_session, create_bench_session_factory, seed_question_bank, seed_history,
+    time_call, summarize, print_summary
+)
+
+INDEXES = [
+    (AttemptAnswer.__table__, "ix_attempt_answers_test_attempt_id"),
+    (TestAttempt.__table__, "ix_test_attempts_user_type_start"),
+    (Option.__table__, "ix_options_question_id"),
+]
+
+
+def drop_indexes(engine):
+    with engine.begin() as conn:
+        for table, name in INDEXES:
+            try:
+                _model_index(table, name).drop(bind=conn)
+            except Exception as e:
+                print(f"  (no se pudo eliminar {name}: {e})")
+
+
+def create_indexes(engine):
+    with engine.begin() as conn:
+        _add_hot_path_indexes(conn)
+        if engine.dialect.name == "sqlite":
+            conn.execute(text("ANALYZE"))
+
+
+def measure(engine, usernames: list[str], repeat: int) -> dict:
+    db = create_bench_session(engine)
+    try:
+        session_factory = create_bench_session_factory(engine)
+        user_controller = UserController(session_factory)
+        test_controller = TestController(session_factory)
+        users = db.execute(select(User).where(User.username.in_(usernames))).scalars().all()
+        rng = random.Random(1)
+
+        def attempt_counts():
+            user_controller.get_attempt_counts(rng.choice(users))
+
+        def user_detail():
+            test_controller.get_user_detail_data(rng.choice(usernames))
+
+        def load_bank():
+            db.execute(select(Question).options(selectinload(Question.options))).scalars().all()
+            db.expire_all()
+
+        return {
+            "UserController.get_attempt_counts": summarize(time_call(attempt_counts, repeat)),
+            "TestController.get_user_detail_data": summarize(time_call(user_detail, repeat)),
+            "Carga del banco (selectin options)": summarize(time_call(load_bank, repeat)),
+        }
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de consultas con y sin índices.")
+    add_url_arguments(parser)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--attempts", type=int, default=5, help="intentos por usuario")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    engine = create_bench_engine(args.url, args.drop_existing)
+    seed_question_bank(engine, copies=10)
+    print(f"Sembrando {args.users} usuarios x {args.attempts} intentos...")
+    seed_history(engine, args.users, args.attempts)
+    usernames = [f"bench_user_{i}" for i in range(args.users)]
+
+    drop_indexes(engine)
+    before = measure(engine, usernames, args.repeat)
+    create_indexes(engine)
+    after = measure(engine, usernames, args.repeat)
+
+    for label in before:
+        print(f"\n{label}")
+        print_summary("  sin índices", before[label])
+        print_summary("  con índices", after[label])
+
+
+if __name__ == "__main__":
+    main()
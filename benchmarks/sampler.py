@@ -0,0 +1,80 @@
+"""
+Microbenchmark: armado del examen final.
+
+Compara la ruta anterior (una consulta por nivel con `selectinload` +
+`random.sample`, seis viajes a la BD) contra `ExamSampler`, que arma el
+examen desde arreglos de ids precalculados en memoria.
+
+Uso:
+    python -m benchmarks.sampler [--copies 10] [--repeat 200] [--url mysql+pymysql://...]
+
+Aviso: igual que los demás benchmarks, la BD de --url se vacía y se vuelve a crear.
+"""
+import argparse
+import random
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+from model import Question
+from controller.exam_sampler import ExamSampler
+from constants import FINAL_EXAM_STRATA
+from benchmarks.common import (
+    add_url_arguments, create_bench_engine, create_bench_session, seed_question_bank,
+    time_call, summarize, print_summary
+)
+
+
+def six_query_final_exam(db) -> list[Question]:
+    """Réplica de la lógica anterior de `TestController.start_new_test('final')`."""
+    final_exam_questions = []
+    for level, count in FINAL_EXAM_STRATA.items():
+        stmt = select(Question).options(
+            selectinload(Question.options)
+        ).filter_by(level=level)
+        level_questions = db.execute(stmt).scalars().all()
+        if len(level_questions) < count:
+            selected = level_questions
+        else:
+            selected = random.sample(level_questions, count)
+        final_exam_questions.extend(selected)
+    random.shuffle(final_exam_questions)
+    return final_exam_questions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del muestreo del examen final.")
+    add_url_arguments(parser)
+    parser.add_argument("--copies", type=int, default=1, help="veces que se replica el banco de 80 preguntas")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    engine = create_bench_engine(args.url, args.drop_existing)
+    total = seed_question_bank(engine, args.copies)
+    print(f"Banco de preguntas: {total} reactivos ({engine.url.drivername})\n")
+
+    db = create_bench_session(engine)
+    try:
+        def legacy():
+            six_query_final_exam(db)
+            # La sesión de la app hace commit al iniciar cada intento, lo que
+            # expira los objetos; lo imitamos para no medir un mapa de identidad caliente.
+            db.expire_all()
+
+        legacy_stats = summarize(time_call(legacy, args.repeat))
+
+        all_questions = db.execute(
+            select(Question).options(selectinload(Question.options))
+        ).scalars().all()
+        build_stats = summarize(time_call(lambda: ExamSampler(all_questions), 1))
+        sampler = ExamSampler(all_questions)
+        sampler_stats = summarize(time_call(sampler.sample_final, args.repeat))
+    finally:
+        db.close()
+
+    print_summary("Seis consultas + random.sample", legacy_stats)
+    print_summary("ExamSampler.sample_final", sampler_stats)
+    print_summary("ExamSampler (construcción, una vez)", build_stats)
+    print(f"\nAceleración: {legacy_stats['mean_ms'] / sampler_stats['mean_ms']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Prepara las imágenes de las preguntas para los kioscos.
+
+Toma cada imagen referenciada por `Question.image_path`, la reduce al
+tamaño en que se muestra (`QUESTION_IMAGE_SIZE` por `IMAGE_BUILD_SCALE`,
+para que se vea nítida en pantallas HiDPI), la vuelve a codificar y
+escribe un manifiesto con su hash SHA-256, sus dimensiones y la escala. Si falta
+alguna imagen o no se puede leer, termina con error antes de escribir
+nada. `view/image_cache.py` usa el manifiesto cuando existe: solo abre
+las imágenes ya reducidas y sabe de antemano cuáles no hay.
+
+Uso:
+    python build_images.py [--offline] [--quality 80] [--scale 2] [--out images/build]
+    python build_images.py --verify
+
+Con --offline las imágenes se toman de los datos de populate_db.py en
+lugar de la base de datos.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+from PyQt5.QtCore import Qt, QSize, QBuffer, QByteArray, QIODevice
+from PyQt5.QtGui import QImage, QImageReader, QImageWriter
+from sqlalchemy import select
+from model import session_scope, Question
+from constants import (
+    IMAGES_DIR, IMAGES_BUILD_DIR, IMAGE_MANIFEST, QUESTION_IMAGE_SIZE, IMAGE_JPEG_QUALITY, IMAGE_BUILD_SCALE
+)
+
+
+class ImageBuildError(Exception):
+    pass
+
+
+def referenced_images(offline: bool = False) -> list[str]:
+    """Nombres de imagen que usan las preguntas, sin repetir."""
+    if offline:
+        from populate_db import questions_data
+        paths = {q["image_file"] for qs in questions_data.values() for q in qs if q.get("image_file")}
+    else:
+        with session_scope() as session:
+            stmt = select(Question.image_path).where(Question.image_path.is_not(None)).distinct()
+            paths = set(session.scalars(stmt))
+    return sorted(paths)
+
+
+def sha256_of(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def read_source(image_path: str) -> tuple[QImage, bytes]:
+    file_path = os.path.join(IMAGES_DIR, image_path)
+    with open(file_path, "rb") as f:
+        data = f.read()
+    reader = QImageReader(file_path)
+    reader.setAutoTransform(True) # Respeta la orientación EXIF de las fotos
+    image = reader.read()
+    if image.isNull():
+        raise ImageBuildError(f"No se pudo leer '{file_path}': {reader.errorString()}")
+    return image, data
+
+
+def encode(image: QImage, quality: int) -> tuple[bytes, str]:
+    """Codifica en JPEG (PNG si la imagen tiene transparencia). Retorna (bytes, extensión)."""
+    fmt = b"png" if image.hasAlphaChannel() else b"jpg"
+    data = QByteArray() # QBuffer no se queda con una referencia: hay que mantenerla viva
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.WriteOnly)
+    writer = QImageWriter(buffer, fmt)
+    if fmt == b"jpg":
+        writer.setQuality(quality)
+        writer.setOptimizedWrite(True)
+        writer.setProgressiveScanWrite(True)
+    else:
+        writer.setCompression(9)
+    if not writer.write(image):
+        raise ImageBuildError(f"No se pudo codificar la imagen: {writer.errorString()}")
+    buffer.close()
+    return bytes(data), fmt.decode()
+
+
+def build_image(image_path: str, size: QSize, quality: int) -> tuple[bytes, dict]:
+    """Reduce y recodifica una imagen. Retorna sus bytes y su entrada del manifiesto."""
+    image, source_data = read_source(image_path)
+    if image.width() > size.width() or image.height() > size.height():
+        image = image.scaled(size, Qt.KeepAspectRatio, Qt.SmoothTransformation) # Nunca se agranda
+    data, extension = encode(image, quality)
+    entry = {
+        "file": f"{os.path.splitext(image_path)[0]}.{extension}",
+        "width": image.width(),
+        "height": image.height(),
+        "bytes": len(data),
+        "sha256": sha256_of(data),
+        "source_bytes": len(source_data),
+        "source_sha256": sha256_of(source_data),
+    }
+    return data, entry
+
+
+def build(image_paths: list[str], out_dir: str, manifest_path: str, quality: int,
+          scale: float = IMAGE_BUILD_SCALE) -> dict:
+    # 1. Fallar pronto: todas las imágenes deben existir antes de escribir nada
+    missing = [p for p in image_paths if not os.path.isfile(os.path.join(IMAGES_DIR, p))]
+    if missing:
+        raise ImageBuildError(f"Faltan {len(missing)} imagen(es) en '{IMAGES_DIR}/': {', '.join(missing)}")
+
+    # 2. Procesar todas en memoria (un archivo ilegible también detiene el proceso)
+    size = QSize(round(QUESTION_IMAGE_SIZE[0] * scale), round(QUESTION_IMAGE_SIZE[1] * scale))
+    built = {p: build_image(p, size, quality) for p in image_paths}
+
+    # 3. Escribir las imágenes y, al final, el manifiesto
+    os.makedirs(out_dir, exist_ok=True)
+    for data, entry in built.values():
+        with open(os.path.join(out_dir, entry["file"]), "wb") as f:
+            f.write(data)
+
+    manifest = {
+        "size": list(QUESTION_IMAGE_SIZE),
+        "scale": scale, # La caché nunca pide más resolución que esta
+        "quality": quality,
+        "images": {p: entry for p, (data, entry) in built.items()},
+    }
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, manifest_path) # Un kiosco nunca lee un manifiesto a medias
+    return manifest
+
+
+def verify(manifest_path: str) -> list[str]:
+    """Compara las imágenes de la carpeta del manifiesto con sus hashes. Retorna los errores."""
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    out_dir = os.path.dirname(manifest_path)
+    errors = []
+    for image_path, entry in manifest["images"].items():
+        file_path = os.path.join(out_dir, entry["file"])
+        if not os.path.isfile(file_path):
+            errors.append(f"{image_path}: falta '{file_path}'")
+            continue
+        with open(file_path, "rb") as f:
+            if sha256_of(f.read()) != entry["sha256"]:
+                errors.append(f"{image_path}: el hash de '{file_path}' no coincide")
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reduce y valida las imágenes de las preguntas para los kioscos.")
+    parser.add_argument("--offline", action="store_true", help="usar los datos de populate_db.py en lugar de la BD")
+    parser.add_argument("--quality", type=int, default=IMAGE_JPEG_QUALITY, help="calidad JPEG (0-100)")
+    parser.add_argument("--scale", type=float, default=IMAGE_BUILD_SCALE,
+                        help="devicePixelRatio máximo para el que se construye (2 = pantallas HiDPI)")
+    parser.add_argument("--out", default=IMAGES_BUILD_DIR, help="carpeta de salida")
+    parser.add_argument("--verify", action="store_true", help="solo verificar un manifiesto existente")
+    args = parser.parse_args()
+    manifest_path = os.path.join(args.out, os.path.basename(IMAGE_MANIFEST))
+
+    if args.verify:
+        if not os.path.isfile(manifest_path):
+            print(f"Error: no existe '{manifest_path}'. Ejecuta primero build_images.py.")
+            sys.exit(1)
+        errors = verify(manifest_path)
+        for error in errors:
+            print(f"Error: {error}")
+        print("Manifiesto válido." if not errors else f"{len(errors)} error(es) en el manifiesto.")
+        sys.exit(1 if errors else 0)
+
+    try:
+        image_paths = referenced_images(args.offline)
+        manifest = build(image_paths, args.out, manifest_path, args.quality, args.scale)
+    except ImageBuildError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    images = manifest["images"]
+    before = sum(entry["source_bytes"] for entry in images.values())
+    after = sum(entry["bytes"] for entry in images.values())
+    for image_path, entry in images.items():
+        print(f"  {image_path} -> {entry['file']} ({entry['width']}x{entry['height']}, {entry['bytes'] / 1024:.1f} KB)")
+    print(f"{len(images)} imagen(es): {before / 1024:.1f} KB -> {after / 1024:.1f} KB. Escala {manifest['scale']}x. Manifiesto en '{manifest_path}'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,15 @@
 import sys
+import time
 from PyQt5.QtWidgets import QApplication
 from PyQt5.QtCore import Qt
-from model import SessionLocal
+from model import engine, read_engine, QueryProfiler
 from model import User, Question
 from controller.user_controller import UserController
 from controller.test_controller import TestController
+from controller.exam_client import ExamServiceClient
+from controller.workers import WorkerPool
+from controller.metrics import metrics
+from constants import SQL_PROFILING, EXAM_SERVICE_URL
 
 from view.login_window import LoginWindow
 from view.main_menu_window import MainMenuWindow
@@ -22,10 +27,29 @@ class AppController:
         QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps, True)
         self.app.setLayoutDirection(Qt.LeftToRight)
         
-        self.db_session = SessionLocal()
+        # Instrumentación de SQL opcional (ver constants.SQL_PROFILING)
+        self.profiler = QueryProfiler().attach() if SQL_PROFILING else None
+        if self.profiler and read_engine is not engine:
+            self.profiler.attach(read_engine)
         
-        self.user_controller = UserController(self.db_session)
-        self.test_controller = TestController(self.db_session)
+        # Con EXAM_SERVICE_URL la aplicación es un cliente ligero del servicio
+        # HTTP; si no, los controladores abren una sesión corta por operación
+        # (ver model.session_scope).
+        if EXAM_SERVICE_URL:
+            self.service_client = ExamServiceClient(EXAM_SERVICE_URL)
+            self.new_user_controller = self.service_client.user_controller
+            self.new_test_controller = self.service_client.test_controller
+            print(f"Modo cliente: usando el servicio de exámenes en {EXAM_SERVICE_URL}")
+        else:
+            self.service_client = None
+            self.new_user_controller = UserController
+            self.new_test_controller = TestController
+        
+        self.user_controller = self.new_user_controller()
+        self.test_controller = self.new_test_controller()
+        
+        # Las cargas pesadas (dashboards, detalle de usuario) corren en este pool
+        self.workers = WorkerPool()
         
         self.login_window = LoginWindow()
         self.main_menu_window = MainMenuWindow()
@@ -46,8 +70,19 @@ class AppController:
         except SystemExit:
             print("Cerrando la aplicación...")
         finally:
-            self.db_session.close()
-            print("Sesión de base de datos cerrada.")
+            self.workers.shutdown()
+            login = metrics.summary("login")
+            if login["count"]:
+                print(f"Latencia de login: {login['count']} intentos, "
+                      f"p50 {login['p50_ms']:.0f} ms, p95 {login['p95_ms']:.0f} ms.")
+            if self.profiler:
+                print(self.profiler.report())
+            if self.service_client:
+                self.service_client.logout()
+            engine.dispose()
+            if read_engine is not engine:
+                read_engine.dispose()
+            print("Conexiones de la base de datos cerradas.")
 
     def connect_signals(self):
         # LoginWindow
@@ -71,8 +106,10 @@ class AppController:
         
         # --- (NUEVO) Conexiones de AdminDashboardWindow ---
         self.admin_dashboard_window.logout_button.clicked.connect(self.handle_logout)
-        self.admin_dashboard_window.user_table.cellDoubleClicked.connect(self.handle_show_user_detail)
-        self.user_detail_window.close_button.clicked.connect(self.user_detail_window.hide)
+        self.admin_dashboard_window.user_table.doubleClicked.connect(self.handle_show_user_detail)
+        self.admin_dashboard_window.set_user_page_source(self._request_user_page)
+        self.user_detail_window.close_button.clicked.connect(self.handle_close_user_detail)
+        self.user_detail_window.attempt_selected.connect(self.handle_show_attempt_detail)
         
         print("Señales conectadas.")
 
@@ -80,15 +117,30 @@ class AppController:
     
     def handle_login(self):
         """
-        (ACTUALIZADO) Redirige al admin a su dashboard.
+        (ACTUALIZADO) Verifica la contraseña en un worker (bcrypt tarda
+        cientos de ms) y redirige al admin a su dashboard.
         """
+        if self.workers.is_running("auth"):
+            return # Ya hay una verificación en curso; ignoramos el doble envío
         self.login_window.show_error("")
         username, password = self.login_window.get_credentials()
         
-        resultado = self.user_controller.login_user(username, password)
+        self.login_window.set_busy(True)
+        started = time.perf_counter()
+        self.workers.submit(
+            "auth",
+            lambda: self.new_user_controller().login_user(username, password),
+            lambda resultado: self._finish_login(resultado, started),
+            self._handle_auth_error
+        )
+
+    def _finish_login(self, resultado, started: float):
+        elapsed = time.perf_counter() - started
+        metrics.record("login", elapsed)
+        print(f"Login verificado en {elapsed * 1000:.0f} ms.")
+        self.login_window.set_busy(False)
         
         if isinstance(resultado, User):
-            
             # --- (NUEVO) Redirección de Admin ---
             if resultado.username == 'admin':
                 print("Login de Admin exitoso.")
@@ -102,9 +154,21 @@ class AppController:
             self.login_window.show_error(resultado)
 
     def handle_register(self):
+        if self.workers.is_running("auth"):
+            return
         self.login_window.show_error("")
         username, password = self.login_window.get_credentials()
-        resultado = self.user_controller.register_user(username, password)
+        
+        self.login_window.set_busy(True)
+        self.workers.submit(
+            "auth",
+            lambda: self.new_user_controller().register_user(username, password),
+            lambda resultado: self._finish_register(resultado, username),
+            self._handle_auth_error
+        )
+
+    def _finish_register(self, resultado, username: str):
+        self.login_window.set_busy(False)
         if isinstance(resultado, User):
             self.login_window.clear_fields()
             self.login_window.show_success_message(
@@ -114,6 +178,10 @@ class AppController:
         else:
             self.login_window.show_error(resultado)
 
+    def _handle_auth_error(self, error: str):
+        self.login_window.set_busy(False)
+        self.login_window.show_error(f"Error inesperado: {error}")
+
     def show_main_menu(self):
         """
         (ACTUALIZADO) Ahora también oculta el dashboard de admin.
@@ -122,8 +190,16 @@ class AppController:
         user = self.test_controller.current_user
         if not user: return
         
-        counts = self.user_controller.get_attempt_counts(user)
-        self.main_menu_window.update_info(user.username, counts)
+        self.workers.cancel("dashboard") # Si se salió antes de que cargara
+        
+        # Los conteos pueden venir del servicio HTTP: se piden en un worker
+        self.main_menu_window.set_loading(user.username)
+        self.workers.submit(
+            "attempt_counts",
+            lambda: self.new_user_controller().get_attempt_counts(user),
+            lambda counts: self.main_menu_window.update_info(user.username, counts),
+            self._handle_attempt_counts_error
+        )
         
         # Ocultamos todas las demás ventanas
         self.login_window.hide()
@@ -134,12 +210,19 @@ class AppController:
         
         self.main_menu_window.show()
 
+    def _handle_attempt_counts_error(self, error: str):
+        print(f"Error al cargar los intentos: {error}")
+        self.main_menu_window.show_error(f"No se pudieron cargar tus intentos: {error}")
+
     def handle_logout(self):
         """
         (ACTUALIZADO) Cierra sesión desde cualquier dashboard.
         """
         print("Cerrando sesión...")
+        self.workers.cancel_all() # Descarta cualquier carga en curso
         self.test_controller.set_current_user(None) # Limpia el usuario
+        if self.service_client:
+            self.service_client.logout() # Invalida el token en el servicio
         
         # Oculta todas las ventanas de sesión
         self.main_menu_window.hide()
@@ -152,46 +235,95 @@ class AppController:
 
     
     def handle_show_admin_dashboard(self):
-        """Obtiene datos globales y muestra el dashboard de admin."""
+        """Muestra el dashboard de admin y carga los datos globales en segundo plano."""
         print("Mostrando dashboard de admin...")
         
-        # 1. Obtener los datos globales
-        admin_data = self.test_controller.get_admin_dashboard_data()
-        
-        # 2. Actualizar la vista del dashboard de admin
-        self.admin_dashboard_window.update_data(admin_data)
-        
-        # 3. Ocultar login y mostrar dashboard
+        # 1. Mostrar el dashboard en estado de carga
+        self.admin_dashboard_window.set_loading(True)
         self.login_window.hide()
         self.admin_dashboard_window.show()
         self.admin_dashboard_window.showMaximized()
+        
+        # 2. Obtener los datos globales en un worker
+        self.workers.submit(
+            "admin_dashboard",
+            lambda: self.new_test_controller().get_admin_dashboard_data(),
+            self.admin_dashboard_window.update_data,
+            lambda error: self._handle_load_error(error, self.admin_dashboard_window)
+        )
     
-    def handle_show_user_detail(self, row, column):
+    def handle_show_user_detail(self, index):
         """
         Se activa con el doble clic en la tabla de admin.
         Abre la ventana de detalle para el usuario de esa fila.
         """
-        # Obtenemos el item de la primera columna (columna 0), que es el username
-        username_item = self.admin_dashboard_window.user_table.item(row, 0)
-        if not username_item:
-            return # No hay item en esa celda
-            
-        username = username_item.text()
+        username = self.admin_dashboard_window.username_at(index)
+        if not username:
+            return # No hay usuario en esa fila
         print(f"Abriendo detalles para el usuario: {username}")
         
-        # 1. Pedir al controlador que busque TODOS los datos de este usuario
-        detail_data = self.test_controller.get_user_detail_data(username)
+        # 1. Mostrar la ventana de detalle vacía (como una ventana modal/emergente)
+        self.user_detail_window.set_loading(username)
+        self.user_detail_window.show()
         
+        # 2. Pedir la lista de intentos en un worker (las respuestas se cargan al elegir uno)
+        self.workers.submit(
+            "user_detail",
+            lambda: self.new_test_controller().get_user_detail_data(username),
+            self._show_user_detail_data,
+            self._handle_user_detail_error
+        )
+
+    def _show_user_detail_data(self, detail_data: dict):
         if "error" in detail_data:
             print(f"Error: {detail_data['error']}")
             # Aquí podríamos mostrar un QMessageBox al admin
+            self.user_detail_window.hide()
             return
             
-        # 2. Cargar esos datos en la ventana de detalle
+        # 3. Cargar esos datos en la ventana de detalle
         self.user_detail_window.update_data(detail_data)
-        
-        # 3. Mostrar la ventana de detalle (como una ventana modal/emergente)
-        self.user_detail_window.show()
+
+    def _handle_user_detail_error(self, error: str):
+        print(f"Error al cargar el detalle del usuario: {error}")
+        self.user_detail_window.hide()
+
+    def handle_close_user_detail(self):
+        self.workers.cancel("user_detail")
+        self.workers.cancel("attempt_answers")
+        self.user_detail_window.hide()
+
+    def _handle_load_error(self, error: str, window):
+        print(f"Error al cargar los datos: {error}")
+        window.set_loading(False)
+
+    def handle_show_attempt_detail(self, attempt_id: int):
+        """
+        Se activa al elegir un intento en la ventana de detalle.
+        Carga solo las respuestas de ese intento.
+        """
+        self.workers.submit(
+            "attempt_answers", # Elegir otro intento descarta la carga anterior
+            lambda: self.new_test_controller().get_attempt_answers(attempt_id),
+            lambda detail: self.user_detail_window.show_attempt_answers(attempt_id, detail),
+            lambda error: self.user_detail_window.show_attempt_error(attempt_id, error)
+        )
+
+    def _request_user_page(self, sort_key: str, descending: bool, username_prefix: str,
+                           after, limit: int, on_page):
+        """Trae una página de la tabla de usuarios del admin en un worker."""
+        def on_error(error: str):
+            print(f"Error al cargar la tabla de usuarios: {error}")
+            on_page(None)
+
+        self.workers.submit(
+            "admin_user_page",
+            lambda: self.new_test_controller().get_admin_user_page(
+                sort_key, descending, username_prefix, after, limit
+            ),
+            on_page,
+            on_error
+        )
         
     def handle_start_practice(self):
         print("Iniciando examen de práctica...")
@@ -211,16 +343,25 @@ class AppController:
             
     def handle_show_dashboard(self):
         print("Mostrando dashboard de usuario...")
-        dashboard_data = self.test_controller.get_dashboard_data()
-        self.dashboard_window.update_data(dashboard_data)
+        user_id = self.test_controller.current_user.id
+        
+        self.dashboard_window.set_loading(True)
         self.main_menu_window.hide()
         self.dashboard_window.show()
         self.dashboard_window.showMaximized()
         
+        self.workers.submit(
+            "dashboard",
+            lambda: self.new_test_controller().get_dashboard_data(user_id),
+            self.dashboard_window.update_data,
+            lambda error: self._handle_load_error(error, self.dashboard_window)
+        )
+        
     def show_test_window(self, first_question: Question):
         print(f"Mostrando ventana de examen con pregunta: {first_question.text[:20]}...")
         nums = self.test_controller.get_current_question_number()
         self.test_window.display_question(first_question, nums[0], nums[1])
+        self._prefetch_next_image()
         self.main_menu_window.hide()
         self.test_window.show()
 
@@ -233,9 +374,26 @@ class AppController:
         if next_question:
             nums = self.test_controller.get_current_question_number()
             self.test_window.display_question(next_question, nums[0], nums[1])
+            self._prefetch_next_image()
         else:
             self.show_results()
 
+    def _prefetch_next_image(self):
+        """
+        Decodifica en el pool la imagen de la siguiente pregunta mientras se
+        responde la actual, para que el cambio de pregunta no espere al disco.
+        """
+        upcoming = self.test_controller.peek_next_question()
+        image_path = upcoming.image_path if upcoming else None
+        cache = self.test_window.image_cache
+        if not image_path or image_path in cache:
+            return
+        self.workers.submit(
+            "image_prefetch",
+            lambda: cache.load(image_path),
+            lambda image: cache.put(image_path, image)
+        )
+
     def show_results(self):
         results = self.test_controller.finish_test()
         print(f"Examen terminado. Resultados: {results}")
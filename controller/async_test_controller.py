@@ -0,0 +1,107 @@
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from model import Question, record_write
+from model.async_session import (
+    async_session_scope, default_async_session_factory, default_async_read_session_factory
+)
+from controller.test_controller import TestController, attempt_answers_cache
+from controller.question_bank import question_bank
+
+
+class AsyncTestController(TestController):
+    """
+    Variante asíncrona de `TestController` sobre `AsyncSession`.
+
+    Cada espera de la BD cede el event loop, así que un solo hilo puede
+    atender muchos exámenes a la vez. La lógica (muestreo, calificación,
+    consultas) es la misma que la síncrona: los helpers que reciben una
+    `Session` se ejecutan con `AsyncSession.run_sync` sobre el driver
+    asíncrono. Los métodos sin acceso a la BD (`get_next_question`,
+    `get_current_question_number`, `export_state`) se heredan tal cual.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker | None = None,
+                 read_session_factory: async_sessionmaker | None = None):
+        if session_factory is None:
+            session_factory = default_async_session_factory()
+            read_session_factory = read_session_factory or default_async_read_session_factory()
+        super().__init__(session_factory, read_session_factory)
+
+    async def start_new_test(self, test_type: str) -> (Question | str):
+        if not self.current_user:
+            return "No hay usuario activo."
+        try:
+            async with async_session_scope(self.session_factory) as session:
+                bank = await question_bank.get_async(session)
+                await session.run_sync(self._create_attempt, test_type)
+        except Exception as e:
+            self.active_test = None
+            return f"Error al crear el intento: {e}"
+        return self._prepare_questions(bank, test_type)
+
+    async def save_answer(self, selected_option_id: int | None, time_taken: int):
+        if not self._record_answer(selected_option_id, time_taken):
+            return
+        try:
+            async with async_session_scope(self.session_factory) as session:
+                await session.run_sync(self._flush_answers)
+            self.pending_answers = []
+        except Exception as e:
+            # Las respuestas siguen en el búfer y se reintentan en el siguiente lote
+            print(f"Error al guardar respuestas: {e}")
+
+    async def finish_test(self) -> dict:
+        if not self.active_test:
+            return {"error": "No hay examen activo que finalizar."}
+        score, level = self._final_score()
+        try:
+            async with async_session_scope(self.session_factory) as session:
+                await session.run_sync(self._save_results, score, level)
+        except Exception as e:
+            return {"error": f"Error al guardar resultados finales: {e}"}
+        record_write(self.active_test.user_id)
+        return self._close_exam(score, level)
+
+    async def load_state(self, state: dict | None):
+        self._reset_exam_state()
+        if not state:
+            return
+        async with async_session_scope(self.session_factory) as session:
+            bank = await question_bank.get_async(session)
+            if self._missing_questions(bank, state):
+                bank = await question_bank.get_async(session, refresh=True)
+        self._restore_state(bank, state)
+
+    async def get_dashboard_data(self, user_id: int | None = None, fresh: bool = False) -> dict:
+        if user_id is None:
+            if not self.current_user:
+                return {}
+            user_id = self.current_user.id
+        async with async_session_scope(self._reader(user_id, fresh)) as session:
+            return await session.run_sync(self._dashboard_data, user_id)
+
+    async def get_admin_dashboard_data(self) -> dict:
+        async with async_session_scope(self._reader()) as session:
+            return await session.run_sync(self._admin_dashboard_data)
+
+    async def get_admin_user_page(self, sort_key: str = "username", descending: bool = False,
+                                  username_prefix: str = "", after: tuple | None = None,
+                                  limit: int = 200) -> list[dict]:
+        async with async_session_scope(self._reader()) as session:
+            return await session.run_sync(
+                self._admin_user_page, sort_key, descending, username_prefix, after, limit
+            )
+
+    async def get_global_level_performance(self) -> dict:
+        async with async_session_scope(self._reader()) as session:
+            return await session.run_sync(self._global_level_performance)
+
+    async def get_user_detail_data(self, username: str) -> dict:
+        async with async_session_scope(self._reader()) as session:
+            return await session.run_sync(self._user_detail_data, username)
+
+    async def get_attempt_answers(self, attempt_id: int) -> dict:
+        cached = attempt_answers_cache.get(attempt_id)
+        if cached is not None:
+            return cached
+        async with async_session_scope(self._reader()) as session:
+            return await session.run_sync(self._attempt_answers, attempt_id)
@@ -0,0 +1,66 @@
+import asyncio
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from model import User
+from model.async_session import async_session_scope, default_async_session_factory
+from controller.user_controller import UserController
+from controller import security
+
+
+class AsyncUserController(UserController):
+    """
+    Variante asíncrona de `UserController` sobre `AsyncSession`.
+    bcrypt no es E/S sino CPU, así que se ejecuta en un hilo
+    (`asyncio.to_thread`) para no detener el event loop.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker | None = None):
+        super().__init__(session_factory or default_async_session_factory())
+
+    async def register_user(self, username: str, password: str) -> (User | str):
+        error = self._registration_error(username, password)
+        if error:
+            return error
+        try:
+            hashed_pw = await asyncio.to_thread(self.hash_password, password)
+            async with async_session_scope(self.session_factory) as session:
+                new_user = User(username=username, password_hash=hashed_pw)
+                session.add(new_user)
+            return new_user
+        except IntegrityError:
+            return "Ese nombre de usuario ya existe."
+        except Exception as e:
+            return f"Error inesperado: {e}"
+
+    async def login_user(self, username: str, password: str) -> (User | str):
+        stmt = select(User).filter_by(username=username)
+        async with async_session_scope(self.session_factory) as session:
+            user = (await session.execute(stmt)).scalar_one_or_none()
+
+        if user and await asyncio.to_thread(self.check_password, password, user.password_hash):
+            await self._rehash_if_needed(user, password)
+            return user
+        else:
+            return "Nombre de usuario o contraseña incorrectos."
+
+    async def _rehash_if_needed(self, user: User, password: str):
+        # `needs_rehash` puede calibrar el costo (varios hashes) la primera vez
+        if not await asyncio.to_thread(security.needs_rehash, user.password_hash):
+            return
+        try:
+            new_hash = await asyncio.to_thread(self.hash_password, password)
+            async with async_session_scope(self.session_factory) as session:
+                await session.execute(
+                    update(User).where(User.id == user.id).values(password_hash=new_hash)
+                )
+            user.password_hash = new_hash
+        except Exception as e:
+            print(f"No se pudo actualizar el hash de '{user.username}': {e}")
+
+    async def get_attempt_counts(self, user: User) -> dict:
+        practice_stmt, final_stmt = self._attempt_count_statements(user.id)
+        async with async_session_scope(self.session_factory) as session:
+            practice_count = (await session.execute(practice_stmt)).scalar() or 0
+            final_count = (await session.execute(final_stmt)).scalar() or 0
+        return self._attempt_counts(practice_count, final_count)
@@ -0,0 +1,177 @@
+import json
+import urllib.error
+import urllib.request
+from urllib.parse import urlencode, quote
+from model import User, Question, Option
+from constants import EXAM_SERVICE_TIMEOUT
+
+
+class ExamServiceError(Exception):
+    """El servicio no respondió o rechazó la petición (token inválido, sin permiso, ...)."""
+
+
+def question_from_dict(data: dict) -> Question:
+    """Reconstruye una pregunta (sin sesión) a partir del JSON del servicio."""
+    return Question(
+        id=data["id"], text=data["text"], level=data["level"], image_path=data["image_path"],
+        options=[Option(id=opt["id"], text=opt["text"]) for opt in data["options"]]
+    )
+
+
+class ExamServiceClient:
+    """
+    Cliente del servicio HTTP de exámenes (`exam_server.py`).
+    Guarda el token de la sesión abierta con `login_user` y crea
+    controladores remotos con la misma interfaz que los locales.
+    """
+
+    def __init__(self, base_url: str, timeout: float = EXAM_SERVICE_TIMEOUT):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.token: str | None = None
+
+    def request(self, method: str, path: str, payload: dict | None = None, query: dict | None = None):
+        url = self.base_url + path
+        if query:
+            url += "?" + urlencode(query)
+        data = json.dumps(payload).encode("utf-8") if payload is not None else None
+        req = urllib.request.Request(url, data=data, method=method)
+        req.add_header("Content-Type", "application/json")
+        if self.token:
+            req.add_header("Authorization", f"Bearer {self.token}")
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read()).get("error", e.reason)
+            except ValueError:
+                message = e.reason
+            raise ExamServiceError(f"{message} (HTTP {e.code})") from None
+        except (urllib.error.URLError, OSError) as e:
+            raise ExamServiceError(f"No se pudo contactar el servicio de exámenes: {e}") from None
+
+    def logout(self):
+        if self.token:
+            try:
+                self.request("POST", "/api/logout")
+            except ExamServiceError as e:
+                print(f"Error al cerrar la sesión remota: {e}")
+            self.token = None
+
+    def user_controller(self) -> "RemoteUserController":
+        return RemoteUserController(self)
+
+    def test_controller(self) -> "RemoteTestController":
+        return RemoteTestController(self)
+
+
+class RemoteUserController:
+    """Misma interfaz que `UserController`, atendida por el servicio."""
+
+    def __init__(self, client: ExamServiceClient):
+        self.client = client
+
+    def register_user(self, username: str, password: str) -> (User | str):
+        result = self.client.request("POST", "/api/register", {"username": username, "password": password})
+        if "error" in result:
+            return result["error"]
+        return User(**result["user"])
+
+    def login_user(self, username: str, password: str) -> (User | str):
+        result = self.client.request("POST", "/api/login", {"username": username, "password": password})
+        if "error" in result:
+            return result["error"]
+        self.client.token = result["token"]
+        return User(**result["user"])
+
+    def get_attempt_counts(self, user: User) -> dict:
+        # El servicio responde por el usuario del token
+        return self.client.request("GET", "/api/attempt-counts")
+
+
+class RemoteTestController:
+    """
+    Misma interfaz que `TestController`, atendida por el servicio. El
+    examen vive en el servidor; aquí solo se guarda la pregunta que
+    devolvió la última petición y su número.
+    """
+
+    def __init__(self, client: ExamServiceClient):
+        self.client = client
+        self.current_user: User | None = None
+        self._next_question: Question | None = None
+        self._number: tuple[int, int] = (0, 0)
+
+    def set_current_user(self, user: User):
+        self.current_user = user
+
+    def _take_question(self, result: dict) -> Question | None:
+        self._number = (result["number"], result["total"])
+        return question_from_dict(result["question"]) if result["question"] else None
+
+    def start_new_test(self, test_type: str) -> (Question | str):
+        try:
+            result = self.client.request("POST", "/api/exams", {"test_type": test_type})
+        except ExamServiceError as e:
+            return str(e)
+        if "error" in result:
+            return result["error"]
+        return self._take_question(result)
+
+    def save_answer(self, selected_option_id: int | None, time_taken: int):
+        """
+        Envía la respuesta; el servicio avanza y responde con la siguiente pregunta.
+        Manda también el número de la pregunta, para que el servicio no guarde
+        dos veces una petición repetida.
+        """
+        try:
+            result = self.client.request(
+                "POST", "/api/exams/answer",
+                {"option_id": selected_option_id, "time_taken": time_taken, "number": self._number[0]}
+            )
+        except ExamServiceError as e:
+            print(f"Error al guardar la respuesta: {e}")
+            self._next_question = None
+            return
+        if "error" in result:
+            print(f"Error: {result['error']}")
+            self._next_question = None
+            return
+        self._next_question = self._take_question(result)
+
+    def get_next_question(self) -> Question | None:
+        question, self._next_question = self._next_question, None
+        return question
+
+    def peek_next_question(self) -> Question | None:
+        return None # El servicio solo entrega la pregunta actual; no hay qué precargar
+
+    def get_current_question_number(self) -> tuple[int, int]:
+        return self._number
+
+    def finish_test(self) -> dict:
+        try:
+            return self.client.request("POST", "/api/exams/finish")
+        except ExamServiceError as e:
+            return {"error": str(e)}
+
+    def get_dashboard_data(self, user_id: int | None = None) -> dict:
+        return self.client.request("GET", "/api/dashboard")
+
+    def get_admin_dashboard_data(self) -> dict:
+        return self.client.request("GET", "/api/admin/dashboard")
+
+    def get_admin_user_page(self, sort_key: str = "username", descending: bool = False,
+                            username_prefix: str = "", after: tuple | None = None,
+                            limit: int = 200) -> list[dict]:
+        query = {"sort": sort_key, "desc": int(descending), "prefix": username_prefix, "limit": limit}
+        if after is not None:
+            query["after"] = json.dumps(list(after))
+        return self.client.request("GET", "/api/admin/users", query=query)
+
+    def get_user_detail_data(self, username: str) -> dict:
+        return self.client.request("GET", f"/api/admin/users/{quote(username, safe='')}")
+
+    def get_attempt_answers(self, attempt_id: int) -> dict:
+        return self.client.request("GET", f"/api/admin/attempts/{attempt_id}/answers")
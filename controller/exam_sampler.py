@@ -0,0 +1,71 @@
+import random
+import threading
+from constants import PRACTICE_QUESTION_COUNT, FINAL_EXAM_STRATA
+
+
+class ExamSampler:
+    """
+    Motor de muestreo de exámenes.
+
+    Precalcula un arreglo de ids por nivel (y uno global) a partir del banco
+    de preguntas. Cada examen se arma con un Fisher-Yates parcial sobre esos
+    arreglos, así que el costo es O(tamaño del examen) y no O(tamaño del banco),
+    sin ninguna consulta a la BD.
+
+    Funciona con cualquier objeto que tenga `id` y `level` (p. ej. `Question`).
+    """
+
+    def __init__(self, questions: list, strata: dict[str, int] = FINAL_EXAM_STRATA,
+                 rng: random.Random | None = None):
+        self.strata = dict(strata)
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+
+        self._by_id = {q.id: q for q in questions}
+        self._all_ids: list[int] = list(self._by_id)
+        self._ids_by_level: dict[str, list[int]] = {level: [] for level in self.strata}
+        for q in questions:
+            if q.level in self._ids_by_level:
+                self._ids_by_level[q.level].append(q.id)
+
+        # Niveles sin suficientes reactivos: {nivel: (disponibles, requeridos)}
+        self.shortfalls = {
+            level: (len(self._ids_by_level[level]), count)
+            for level, count in self.strata.items()
+            if len(self._ids_by_level[level]) < count
+        }
+
+    @property
+    def total_questions(self) -> int:
+        return len(self._all_ids)
+
+    @property
+    def final_exam_size(self) -> int:
+        """Número de preguntas que tendrá realmente el examen final."""
+        return sum(min(len(self._ids_by_level[level]), count) for level, count in self.strata.items())
+
+    def _take(self, ids: list[int], count: int) -> list[int]:
+        # Fisher-Yates parcial: solo se intercambian las primeras `count`
+        # posiciones. El orden previo del arreglo no importa, por lo que no
+        # hace falta restaurarlo entre llamadas.
+        n = len(ids)
+        count = min(count, n)
+        for i in range(count):
+            j = self._rng.randrange(i, n)
+            ids[i], ids[j] = ids[j], ids[i]
+        return ids[:count]
+
+    def sample_practice(self, count: int = PRACTICE_QUESTION_COUNT) -> list:
+        """Selecciona `count` preguntas totalmente al azar (o todas si no alcanzan)."""
+        with self._lock:
+            ids = self._take(self._all_ids, count)
+        return [self._by_id[i] for i in ids]
+
+    def sample_final(self) -> list:
+        """Selecciona las preguntas del examen final por muestreo estratificado."""
+        with self._lock:
+            ids = []
+            for level, count in self.strata.items():
+                ids.extend(self._take(self._ids_by_level[level], count))
+            self._rng.shuffle(ids)
+        return [self._by_id[i] for i in ids]
@@ -0,0 +1,225 @@
+import datetime
+import secrets
+from contextlib import contextmanager
+from sqlalchemy import delete, update
+from sqlalchemy.orm import Session, sessionmaker
+from model import SessionLocal, session_scope, User, Question, ExamSession
+from controller.user_controller import UserController
+from controller.test_controller import TestController
+from constants import EXAM_SESSION_TTL_HOURS, READ_YOUR_WRITES_SECONDS
+
+
+class ServiceError(Exception):
+    """Error de la API con su código HTTP (401 token inválido, 403 sin permiso, ...)."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def user_to_dict(user: User) -> dict:
+    return {"id": user.id, "username": user.username}
+
+
+def question_to_dict(question: Question) -> dict:
+    """Pregunta para el cliente. Nunca incluye cuál opción es la correcta."""
+    return {
+        "id": question.id,
+        "text": question.text,
+        "level": question.level,
+        "image_path": question.image_path,
+        "options": [{"id": opt.id, "text": opt.text} for opt in question.options]
+    }
+
+
+class ExamService:
+    """
+    Lógica del servicio HTTP de exámenes, independiente del transporte.
+
+    Expone `UserController` y `TestController` a clientes identificados por
+    un token. El estado del examen no vive en memoria: cada petición lo
+    carga de `exam_sessions`, opera con un `TestController` nuevo y lo
+    vuelve a guardar, así que varios procesos pueden atender al mismo
+    cliente. Las peticiones que cambian el examen escriben sus filas y el
+    estado nuevo en una sola transacción, con la fila del token bloqueada;
+    una petición repetida o simultánea para el mismo token se rechaza
+    (409) en lugar de aplicarse dos veces.
+    """
+
+    def __init__(self, session_factory: sessionmaker = SessionLocal,
+                 read_session_factory: sessionmaker | None = None):
+        self.session_factory = session_factory
+        self.read_session_factory = read_session_factory
+
+    def _test_controller(self) -> TestController:
+        return TestController(self.session_factory, self.read_session_factory)
+
+    # --- Tokens ---
+    def _open_session(self, user: User) -> str:
+        token = secrets.token_urlsafe(32)
+        expired = datetime.datetime.utcnow() - datetime.timedelta(hours=EXAM_SESSION_TTL_HOURS)
+        with session_scope(self.session_factory) as session:
+            # Aprovechamos cada login para purgar los tokens caducados
+            session.execute(delete(ExamSession).where(ExamSession.updated_at < expired))
+            session.add(ExamSession(token=token, user_id=user.id, username=user.username))
+        return token
+
+    def _get_session(self, token: str | None) -> ExamSession:
+        if not token:
+            raise ServiceError(401, "Falta el token de sesión.")
+        with session_scope(self.session_factory) as session:
+            exam_session = session.get(ExamSession, token)
+        return self._check_session(exam_session)
+
+    def _check_session(self, exam_session: ExamSession | None) -> ExamSession:
+        expired = datetime.datetime.utcnow() - datetime.timedelta(hours=EXAM_SESSION_TTL_HOURS)
+        if exam_session is None or exam_session.updated_at < expired:
+            raise ServiceError(401, "Sesión inválida o caducada.")
+        return exam_session
+
+    def _require_admin(self, token: str | None) -> ExamSession:
+        exam_session = self._get_session(token)
+        if exam_session.username != 'admin':
+            raise ServiceError(403, "Solo el administrador puede consultar estos datos.")
+        return exam_session
+
+    @contextmanager
+    def _exam_transaction(self, token: str | None):
+        """
+        Transacción de una petición que cambia el examen. Bloquea la fila del
+        token (`SELECT ... FOR UPDATE`, así las peticiones simultáneas del
+        mismo cliente esperan su turno) y entrega la sesión, la fila y un
+        `TestController` con el examen restaurado. Lo que el controlador
+        escriba y el estado que guarde `_store_state` se confirman juntos:
+        si el proceso cae antes del commit, no queda ni lo uno ni lo otro.
+        """
+        if not token:
+            raise ServiceError(401, "Falta el token de sesión.")
+        with session_scope(self.session_factory) as session:
+            exam_session = self._check_session(session.get(ExamSession, token, with_for_update=True))
+            yield session, exam_session, self._exam_controller(exam_session, session)
+
+    def _exam_controller(self, exam_session: ExamSession, session: Session | None = None) -> TestController:
+        """Un `TestController` con el usuario y el examen de la sesión."""
+        controller = self._test_controller()
+        controller.set_current_user(User(id=exam_session.user_id, username=exam_session.username))
+        try:
+            controller.load_state(exam_session.state, session)
+        except ValueError as e:
+            raise ServiceError(409, f"No se pudo reanudar el examen: {e}")
+        return controller
+
+    def _store_state(self, session: Session, exam_session: ExamSession, controller: TestController):
+        """
+        Guarda el estado del controlador (sin commit) solo si nadie lo cambió
+        desde que se leyó. En las BD que ignoran `FOR UPDATE` (SQLite), esta
+        comprobación es la que evita aplicar dos veces la misma petición.
+        """
+        result = session.execute(
+            update(ExamSession)
+            .where(ExamSession.token == exam_session.token,
+                   ExamSession.state_version == exam_session.state_version)
+            .values(state=controller.export_state(), state_version=ExamSession.state_version + 1,
+                    updated_at=datetime.datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            # La excepción hace rollback de todo lo que escribió esta petición
+            raise ServiceError(409, "Otra petición cambió este examen al mismo tiempo.")
+
+    def _question_payload(self, controller: TestController, question: Question | None) -> dict:
+        number, total = controller.get_current_question_number()
+        return {
+            "question": question_to_dict(question) if question is not None else None,
+            "number": number,
+            "total": total
+        }
+
+    # --- Usuarios ---
+    def register(self, username: str, password: str) -> dict:
+        result = UserController(self.session_factory).register_user(username, password)
+        if isinstance(result, str):
+            return {"error": result}
+        return {"user": user_to_dict(result)}
+
+    def login(self, username: str, password: str) -> dict:
+        result = UserController(self.session_factory).login_user(username, password)
+        if isinstance(result, str):
+            return {"error": result}
+        return {"token": self._open_session(result), "user": user_to_dict(result)}
+
+    def logout(self, token: str | None) -> dict:
+        with session_scope(self.session_factory) as session:
+            session.execute(delete(ExamSession).where(ExamSession.token == token))
+        return {}
+
+    def attempt_counts(self, token: str | None) -> dict:
+        exam_session = self._get_session(token)
+        user = User(id=exam_session.user_id, username=exam_session.username)
+        return UserController(self.session_factory).get_attempt_counts(user)
+
+    # --- Examen ---
+    def start_test(self, token: str | None, test_type: str) -> dict:
+        with self._exam_transaction(token) as (session, exam_session, controller):
+            result = controller.start_new_test(test_type, session)
+            if isinstance(result, str):
+                return {"error": result}
+            self._store_state(session, exam_session, controller)
+            return self._question_payload(controller, result)
+
+    def answer(self, token: str | None, option_id: int | None, time_taken: int,
+               number: int | None = None) -> dict:
+        """
+        Guarda la respuesta a la pregunta actual y retorna la siguiente (o None).
+        `number` es el número de la pregunta que el cliente está respondiendo:
+        si ya no es la actual, la respuesta ya se había guardado (p. ej. el
+        cliente reintentó tras un timeout) y se rechaza con 409.
+        """
+        with self._exam_transaction(token) as (session, exam_session, controller):
+            if not controller.active_test:
+                return {"error": "No hay examen activo para guardar la respuesta."}
+            current, _ = controller.get_current_question_number()
+            if number is not None and number != current:
+                raise ServiceError(409, f"La respuesta de la pregunta {number} ya se guardó; la actual es la {current}.")
+            if option_id is not None and not controller.is_current_option(option_id):
+                raise ServiceError(400, "La opción no pertenece a la pregunta actual.")
+            controller.save_answer(option_id, time_taken, session)
+            question = controller.get_next_question()
+            self._store_state(session, exam_session, controller)
+            return self._question_payload(controller, question)
+
+    def finish(self, token: str | None) -> dict:
+        with self._exam_transaction(token) as (session, exam_session, controller):
+            results = controller.finish_test(session)
+            if "error" not in results:
+                self._store_state(session, exam_session, controller) # El examen terminó: estado vacío
+            return results
+
+    # --- Dashboards ---
+    def dashboard(self, token: str | None) -> dict:
+        exam_session = self._get_session(token)
+        # El último examen pudo terminarse en otro proceso: la hora de la
+        # sesión (leída de la principal) dice si la réplica podría no tenerlo.
+        since_write = datetime.datetime.utcnow() - exam_session.updated_at
+        fresh = since_write < datetime.timedelta(seconds=READ_YOUR_WRITES_SECONDS)
+        return self._test_controller().get_dashboard_data(exam_session.user_id, fresh=fresh)
+
+    def admin_dashboard(self, token: str | None) -> dict:
+        self._require_admin(token)
+        return self._test_controller().get_admin_dashboard_data()
+
+    def admin_user_page(self, token: str | None, sort_key: str, descending: bool,
+                        username_prefix: str, after: list | None, limit: int) -> list[dict]:
+        self._require_admin(token)
+        return self._test_controller().get_admin_user_page(
+            sort_key, descending, username_prefix, tuple(after) if after else None, limit
+        )
+
+    def user_detail(self, token: str | None, username: str) -> dict:
+        self._require_admin(token)
+        return self._test_controller().get_user_detail_data(username)
+
+    def attempt_answers(self, token: str | None, attempt_id: int) -> dict:
+        self._require_admin(token)
+        return self._test_controller().get_attempt_answers(attempt_id)
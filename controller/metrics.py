@@ -0,0 +1,57 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class LatencyMetrics:
+    """
+    Registro en memoria de latencias (en segundos) por nombre de métrica.
+    Guarda solo las últimas `max_samples` muestras de cada una, así que
+    puede quedarse activo durante toda la vida de la aplicación.
+    """
+
+    def __init__(self, max_samples: int = 1000):
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._samples: dict[str, deque] = {}
+
+    def record(self, name: str, seconds: float):
+        with self._lock:
+            samples = self._samples.setdefault(name, deque(maxlen=self.max_samples))
+            samples.append(seconds)
+
+    @contextmanager
+    def timer(self, name: str):
+        """Mide el bloque `with` y lo registra bajo `name`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def summary(self, name: str) -> dict:
+        """Retorna conteo, promedio, p50, p95 y máximo (en ms) de una métrica."""
+        with self._lock:
+            samples = sorted(self._samples.get(name, ()))
+        if not samples:
+            return {"count": 0, "mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+
+        def percentile(p: float) -> float:
+            return samples[min(len(samples) - 1, int(p * len(samples)))] * 1000
+
+        return {
+            "count": len(samples),
+            "mean_ms": sum(samples) / len(samples) * 1000,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "max_ms": samples[-1] * 1000,
+        }
+
+    def names(self) -> list[str]:
+        with self._lock:
+            return list(self._samples)
+
+
+# Instancia compartida por todo el proceso
+metrics = LatencyMetrics()
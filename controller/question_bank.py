@@ -0,0 +1,208 @@
+import asyncio
+import threading
+import time
+import weakref
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, selectinload
+from model import Question, Option, QuestionBankVersion
+from controller.exam_sampler import ExamSampler
+from constants import QUESTION_BANK_CHECK_SECONDS
+
+
+class QuestionBankSnapshot:
+    """
+    Copia en memoria del banco de preguntas para una versión concreta.
+    Las preguntas (y sus opciones) están desligadas de cualquier sesión,
+    así que pueden compartirse entre controladores sin volver a la BD.
+    """
+
+    def __init__(self, version: int, questions: list[Question], db_version: int = 0):
+        self.version = version
+        self.db_version = db_version
+        self.checked_at = time.monotonic() # Última vez que se comparó con la BD
+        self.questions = questions
+        self.by_id: dict[int, Question] = {q.id: q for q in questions}
+        self.by_level: dict[str, list[Question]] = {}
+        self.option_is_correct: dict[int, bool] = {}
+        for q in questions:
+            self.by_level.setdefault(q.level, []).append(q)
+            for opt in q.options:
+                self.option_is_correct[opt.id] = opt.is_correct
+        self.sampler = ExamSampler(questions)
+
+
+class QuestionBank:
+    """
+    Caché versionada del banco de preguntas.
+    Se carga una sola vez (la primera vez que se pide) y se mantiene
+    hasta que alguna pregunta u opción cambia en la BD.
+
+    Los cambios hechos en este proceso la invalidan al instante. Los de
+    otros procesos (otro kiosco, otro worker del servicio, `populate_db.py`)
+    se detectan comparando la fila de `question_bank_version` como mucho
+    cada `check_seconds`, o de inmediato con `get(session, refresh=True)`.
+    """
+
+    def __init__(self, check_seconds: float = QUESTION_BANK_CHECK_SECONDS):
+        self.check_seconds = check_seconds
+        self._lock = threading.Lock()
+        # Un asyncio.Lock por event loop (no se pueden compartir entre loops)
+        self._async_locks: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._version = 0
+        self._snapshot: QuestionBankSnapshot | None = None
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def invalidate(self):
+        """Descarta la copia actual; la siguiente lectura recarga desde la BD."""
+        with self._lock:
+            self._version += 1
+            self._snapshot = None
+
+    def _is_fresh(self, snapshot: QuestionBankSnapshot | None, refresh: bool) -> bool:
+        """True si la copia sirve sin consultar la BD."""
+        return (snapshot is not None and snapshot.version == self._version and not refresh
+                and time.monotonic() - snapshot.checked_at < self.check_seconds)
+
+    def _matches_db(self, snapshot: QuestionBankSnapshot | None, db_version: int) -> bool:
+        if snapshot is None or snapshot.version != self._version or snapshot.db_version != db_version:
+            return False
+        snapshot.checked_at = time.monotonic()
+        return True
+
+    def get(self, session: Session, refresh: bool = False) -> QuestionBankSnapshot:
+        """
+        Retorna la copia vigente, cargándola si es necesario. Con `refresh`
+        compara con la BD aunque no haya pasado `check_seconds`.
+        """
+        snapshot = self._snapshot
+        if self._is_fresh(snapshot, refresh):
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if self._is_fresh(snapshot, refresh):
+                return snapshot
+            db_version = self._db_version(session)
+            if self._matches_db(snapshot, db_version):
+                return snapshot
+
+            version = self._version
+            snapshot = QuestionBankSnapshot(version, self._load(session), db_version)
+            self._snapshot = snapshot
+            return snapshot
+
+    async def get_async(self, session, refresh: bool = False) -> QuestionBankSnapshot:
+        """
+        Versión para `AsyncSession`. Las corrutinas del mismo event loop
+        esperan en un `asyncio.Lock` (el candado de hilos bloquearía el loop):
+        si varias piden el banco en frío, solo la primera lo carga y las
+        demás reciben esa misma copia.
+        """
+        snapshot = self._snapshot
+        if self._is_fresh(snapshot, refresh):
+            return snapshot
+
+        requested = time.monotonic()
+        async with self._async_lock():
+            # Mientras esperábamos, otra corrutina pudo cargarlo o compararlo con la BD
+            snapshot = self._snapshot
+            if self._is_fresh(snapshot, refresh) or self._checked_since(snapshot, requested):
+                return snapshot
+            db_version = await session.run_sync(self._db_version)
+            if self._matches_db(snapshot, db_version):
+                return snapshot
+
+            version = self._version
+            loaded = QuestionBankSnapshot(version, await session.run_sync(self._load), db_version)
+            with self._lock:
+                # Otro hilo (u otro loop) pudo guardar una copia igual de nueva
+                snapshot = self._snapshot
+                if snapshot is not None and snapshot.version == self._version and snapshot.db_version >= db_version:
+                    return snapshot
+                if version == self._version:
+                    self._snapshot = loaded
+                return loaded
+
+    def _async_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            lock = self._async_locks.get(loop)
+            if lock is None:
+                lock = self._async_locks[loop] = asyncio.Lock()
+            return lock
+
+    def _checked_since(self, snapshot: QuestionBankSnapshot | None, since: float) -> bool:
+        """True si la copia vigente se cargó o se comparó con la BD después de `since`."""
+        return snapshot is not None and snapshot.version == self._version and snapshot.checked_at >= since
+
+    def warm(self, session: Session):
+        """Carga el banco por adelantado (p. ej. al iniciar la aplicación)."""
+        self.get(session)
+
+    def _db_version(self, session: Session) -> int:
+        stmt = select(QuestionBankVersion.version).where(QuestionBankVersion.id == 1)
+        return session.execute(stmt).scalar() or 0
+
+    def _load(self, session: Session) -> list[Question]:
+        # Usamos una sesión propia y de corta vida para no mezclar la caché con
+        # el mapa de identidad de la sesión del llamador, pero sobre la misma
+        # conexión (y transacción): una carga en frío no toma una segunda
+        # conexión del pool. Al cerrarla, los objetos quedan desligados pero
+        # con sus datos cargados, y la conexión sigue siendo del llamador.
+        with Session(bind=session.connection(), expire_on_commit=False) as load_session:
+            stmt = select(Question).options(
+                selectinload(Question.options)
+            ).order_by(Question.id)
+            return list(load_session.execute(stmt).scalars().all())
+
+
+# Instancia compartida por todos los controladores del proceso
+question_bank = QuestionBank()
+
+
+def mark_questions_changed(conn: Connection):
+    """
+    Incrementa la versión compartida del banco, dentro de la transacción de
+    `conn`. La ORM lo hace sola; hay que llamarla tras escribir `questions`
+    u `options` con SQL directo (Core) para que los demás procesos recarguen.
+    """
+    result = conn.execute(
+        update(QuestionBankVersion)
+        .where(QuestionBankVersion.id == 1)
+        .values(version=QuestionBankVersion.version + 1)
+    )
+    if result.rowcount == 0:
+        # BD creada solo con create_all (sin la migración 7): sin la fila,
+        # los demás procesos nunca verían el cambio
+        conn.execute(insert(QuestionBankVersion).values(id=1, version=1))
+
+
+# --- Invalidación automática ---
+# Marcamos la sesión cuando se escribe una pregunta u opción, subimos la
+# versión compartida en la misma transacción y solo invalidamos la copia
+# local tras el commit, para no recargar datos aún no confirmados.
+
+@event.listens_for(Session, "after_flush")
+def _track_question_changes(session, flush_context):
+    if session.info.get("question_bank_dirty"):
+        return # La versión ya se subió en esta transacción
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, (Question, Option)):
+            session.info["question_bank_dirty"] = True
+            mark_questions_changed(session.connection())
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    if session.info.pop("question_bank_dirty", False):
+        question_bank.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session):
+    session.info.pop("question_bank_dirty", None)
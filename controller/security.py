@@ -0,0 +1,76 @@
+import threading
+import time
+import bcrypt
+from constants import BCRYPT_TARGET_MS, BCRYPT_MIN_ROUNDS, BCRYPT_MAX_ROUNDS, BCRYPT_ROUNDS
+
+# Costo elegido para este equipo (se calcula una sola vez por proceso)
+_rounds: int | None = None
+_rounds_lock = threading.Lock()
+
+
+def _time_hash(rounds: int) -> float:
+    """Mide (en segundos) cuánto tarda un hash con `rounds` rondas."""
+    salt = bcrypt.gensalt(rounds=rounds)
+    start = time.perf_counter()
+    bcrypt.hashpw(b"calibracion", salt)
+    return time.perf_counter() - start
+
+
+def calibrate_rounds(target_ms: float = BCRYPT_TARGET_MS,
+                     min_rounds: int = BCRYPT_MIN_ROUNDS,
+                     max_rounds: int = BCRYPT_MAX_ROUNDS) -> int:
+    """
+    Elige el costo de bcrypt más alto cuyo tiempo de hash no pase de `target_ms`
+    en este equipo. Cada ronda extra duplica el tiempo, así que basta medir el
+    costo mínimo (mejor de dos) y extrapolar. Nunca baja de `min_rounds`.
+    """
+    base = min(_time_hash(min_rounds), _time_hash(min_rounds)) * 1000
+    rounds = min_rounds
+    while rounds < max_rounds and base * 2 ** (rounds + 1 - min_rounds) <= target_ms:
+        rounds += 1
+    return rounds
+
+
+def target_rounds() -> int:
+    """Costo vigente: el fijado en `BCRYPT_ROUNDS` o el calibrado al primer uso."""
+    global _rounds
+    if _rounds is None:
+        with _rounds_lock:
+            if _rounds is None:
+                if BCRYPT_ROUNDS:
+                    _rounds = BCRYPT_ROUNDS
+                else:
+                    _rounds = calibrate_rounds()
+                    print(f"Costo de bcrypt calibrado: {_rounds} rondas (objetivo {BCRYPT_TARGET_MS} ms).")
+    return _rounds
+
+
+def hash_password(password: str) -> bytes:
+    """Genera un hash seguro para la contraseña con el costo calibrado."""
+    salt = bcrypt.gensalt(rounds=target_rounds())
+    return bcrypt.hashpw(password.encode('utf-8'), salt)
+
+
+def check_password(password: str, hashed: bytes) -> bool:
+    """Verifica si la contraseña coincide con el hash."""
+    return bcrypt.checkpw(password.encode('utf-8'), hashed)
+
+
+def hash_rounds(hashed: bytes) -> int | None:
+    """Lee el costo guardado en un hash (`$2b$12$...` -> 12)."""
+    try:
+        return int(hashed.split(b"$")[2])
+    except (IndexError, ValueError):
+        return None
+
+
+def needs_rehash(hashed: bytes) -> bool:
+    """
+    True si el hash se generó con un costo menor al vigente. Nunca se
+    baja: los kioscos y el servidor calibran costos distintos sobre la
+    misma tabla `users`, y un equipo lento no debe debilitar los hashes
+    (ni reescribirlos en cada login desde otro equipo). Un hash cuyo costo
+    no se puede leer también se regenera.
+    """
+    rounds = hash_rounds(hashed)
+    return rounds is None or rounds < target_rounds()
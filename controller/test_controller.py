@@ -1,95 +1,172 @@
-import random
-from sqlalchemy import select, func
-from sqlalchemy.orm import Session, selectinload
-from model import User, Question, TestAttempt, AttemptAnswer, Option
+import threading
+from collections import OrderedDict
+from sqlalchemy import select, func, case, insert, update, bindparam, tuple_
+from sqlalchemy.orm import Session, sessionmaker
+from model import SessionLocal, ReadSessionLocal, session_scope, record_write, wrote_recently
+from model import User, Question, TestAttempt, AttemptAnswer, Option, UserStats, LevelStats
+from controller.question_bank import question_bank
+from constants import LEVELS, PRACTICE_QUESTION_COUNT, FINAL_EXAM_STRATA, ANSWER_FLUSH_EVERY
+
+# Intentos cuyo detalle de respuestas se mantiene en memoria
+ATTEMPT_DETAIL_CACHE_SIZE = 32
+
+# Columnas por las que se puede ordenar la tabla de usuarios del admin
+ADMIN_USER_SORT_COLUMNS = {
+    "username": User.username,
+    "practice_attempts": User.practice_attempts,
+    "final_attempts": User.final_attempts,
+    "avg_practice_score": User.avg_practice_score,
+    "last_final_level": User.last_final_level,
+}
+
+
+class AttemptAnswersCache:
+    """
+    Caché LRU, compartida por el proceso, del detalle de respuestas de los
+    intentos terminados (por id de intento). Un intento terminado ya no
+    cambia, así que no hace falta invalidarla. Es compartida porque cada
+    petición del servicio y cada worker de la GUI usan un `TestController` nuevo.
+    """
+
+    def __init__(self, max_items: int = ATTEMPT_DETAIL_CACHE_SIZE):
+        self.max_items = max_items
+        self._lock = threading.Lock()
+        self._details: OrderedDict[int, dict] = OrderedDict()
+
+    def get(self, attempt_id: int) -> dict | None:
+        with self._lock:
+            detail = self._details.get(attempt_id)
+            if detail is not None:
+                self._details.move_to_end(attempt_id)
+            return detail
+
+    def put(self, attempt_id: int, detail: dict):
+        with self._lock:
+            self._details[attempt_id] = detail
+            self._details.move_to_end(attempt_id)
+            while len(self._details) > self.max_items:
+                self._details.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._details.clear()
+
+
+# Instancia compartida por todos los controladores del proceso
+attempt_answers_cache = AttemptAnswersCache()
+
 
 class TestController:
     
-    def __init__(self, session: Session):
-        self.db_session = session
+    def __init__(self, session_factory: sessionmaker = SessionLocal,
+                 read_session_factory: sessionmaker | None = None):
+        # Cada operación abre su propia sesión corta (ver `session_scope`);
+        # entre llamadas el controlador no retiene conexiones.
+        self.session_factory = session_factory
+        # Las consultas analíticas (dashboards, detalle) van al engine de
+        # lectura. Con una fábrica propia y sin fábrica de lectura, todo va a la misma.
+        if read_session_factory is None:
+            read_session_factory = ReadSessionLocal if session_factory is SessionLocal else session_factory
+        self.read_session_factory = read_session_factory
         self.current_user: User | None = None
         
         # Estado del examen activo
         self.active_test: TestAttempt | None = None
         self.question_list: list[Question] = []
         self.current_question_index: int = -1
+        
+        # Respuestas aún no escritas:
+        # (question_id, selected_option_id, time_taken, question_level, is_correct)
+        self.pending_answers: list[tuple[int, int | None, int, str, bool]] = []
+        
+        # Calificación incremental del examen activo
+        self.option_is_correct: dict[int, bool] = {}
+        self.level_scores: dict[str, dict] = {}
+        self.correct_count: int = 0
+        self._reset_exam_state()
 
     def set_current_user(self, user: User):
         """Establece el usuario que tomará el examen."""
         self.current_user = user
 
-    def start_new_test(self, test_type: str) -> (Question | str):
+    def start_new_test(self, test_type: str, session: Session | None = None) -> (Question | str):
         """
         Inicia un nuevo intento de examen.
         Usa muestreo estratificado para el examen final.
+        Con `session`, el intento se inserta en esa transacción (sin commit).
         """
         if not self.current_user:
             return "No hay usuario activo."
 
         # 1. Crear y guardar el intento de examen
         try:
-            self.active_test = TestAttempt(
-                user_id=self.current_user.id,
-                test_type=test_type
-            )
-            self.db_session.add(self.active_test)
-            self.db_session.commit()
-            self.db_session.refresh(self.active_test)
+            if session is None:
+                with session_scope(self.session_factory) as session:
+                    bank = self._begin_attempt(session, test_type)
+            else:
+                bank = self._begin_attempt(session, test_type)
         except Exception as e:
-            self.db_session.rollback()
+            self.active_test = None
             return f"Error al crear el intento: {e}"
 
         # 2. Cargar las preguntas
+        return self._prepare_questions(bank, test_type)
+
+    def _begin_attempt(self, session: Session, test_type: str):
+        # El banco completo vive en memoria; solo se consulta la BD
+        # la primera vez o cuando cambian las preguntas, y por la misma
+        # conexión de `session`: la operación usa una sola conexión del pool.
+        bank = question_bank.get(session)
+        self._create_attempt(session, test_type)
+        return bank
+
+    def _create_attempt(self, session: Session, test_type: str):
+        """Inserta el intento del examen y lo cuenta en el resumen del usuario (sin commit)."""
+        self.active_test = TestAttempt(
+            user_id=self.current_user.id,
+            test_type=test_type
+        )
+        session.add(self.active_test)
+        session.flush() # Asigna id y fecha; el objeto queda desligado al cerrar
+
+        # La tabla del admin cuenta los intentos iniciados, terminados o no
+        if test_type == 'practice':
+            values = {User.practice_attempts: User.practice_attempts + 1}
+        elif test_type == 'final':
+            # El último final aún no tiene nivel
+            values = {User.final_attempts: User.final_attempts + 1, User.last_final_level: "N/A"}
+        else:
+            return
+        session.execute(update(User).where(User.id == self.current_user.id).values(values))
+
+    def _prepare_questions(self, bank, test_type: str) -> (Question | str):
+        """Reinicia los conteos, elige las preguntas del banco y retorna la primera."""
         self.current_question_index = -1
         self.question_list = []
+        self.pending_answers = []
+        self.level_scores = {level: {"correct": 0, "total": 0} for level in LEVELS}
+        self.correct_count = 0
+        
+        sampler = bank.sampler
+        self.option_is_correct = bank.option_is_correct
         
         if test_type == 'practice':
             # --- Lógica de Práctica (Totalmente Aleatorio) ---
-            stmt = select(Question).options(
-                selectinload(Question.options)
-            )
-            result = self.db_session.execute(stmt)
-            all_questions = result.scalars().all()
-            
-            if len(all_questions) < 20:
+            if sampler.total_questions < PRACTICE_QUESTION_COUNT:
                 return "No hay suficientes preguntas en la BD para la práctica."
-            self.question_list = random.sample(all_questions, 20)
+            self.question_list = sampler.sample_practice(PRACTICE_QUESTION_COUNT)
         
         elif test_type == 'final':
             # --- Lógica de Examen Final (Muestreo Estratificado) ---
-            strata = {
-                "Beginner": 5,
-                "Elementary": 7,
-                "Pre-intermediate": 8,
-                "Intermediate": 10,
-                "Upper-intermediate": 5,
-                "Advanced": 5,
-            } # Total: 40 preguntas
-            
-            final_exam_questions = []
+            for level, (available, requested) in sampler.shortfalls.items():
+                print(f"Advertencia: No hay suficientes preguntas de nivel '{level}'. Se usarán {available} en lugar de {requested}.")
             
             try:
-                for level, count in strata.items():
-                    stmt = select(Question).options(
-                        selectinload(Question.options)
-                    ).filter_by(level=level)
-                    
-                    level_questions = self.db_session.execute(stmt).scalars().all()
-                    
-                    if len(level_questions) < count:
-                        print(f"Advertencia: No hay suficientes preguntas de nivel '{level}'. Se usarán {len(level_questions)} en lugar de {count}.")
-                        selected = level_questions
-                    else:
-                        selected = random.sample(level_questions, count)
-                    
-                    final_exam_questions.extend(selected)
-                
-                random.shuffle(final_exam_questions)
-                self.question_list = final_exam_questions
+                self.question_list = sampler.sample_final()
                 
                 if len(self.question_list) == 0:
                      return "No se pudieron cargar preguntas para el examen final. Revisa la BD."
-                elif len(self.question_list) < 40:
+                elif len(self.question_list) < sum(FINAL_EXAM_STRATA.values()):
                     print(f"Advertencia: El examen final solo tendrá {len(self.question_list)} preguntas debido a falta de reactivos.")
 
             except Exception as e:
@@ -109,109 +186,289 @@ class TestController:
         else:
             return None 
 
+    def peek_next_question(self) -> Question | None:
+        """Retorna la pregunta que sigue a la actual sin avanzar (para precargar su imagen)."""
+        next_index = self.current_question_index + 1
+        if next_index < len(self.question_list):
+            return self.question_list[next_index]
+        return None
+
     def get_current_question_number(self) -> tuple[int, int]:
         """Retorna (número actual, total de preguntas)"""
         return (self.current_question_index + 1, len(self.question_list))
 
-    def save_answer(self, selected_option_id: int | None, time_taken: int):
-        """Guarda la respuesta del usuario para la pregunta actual."""
+    def is_current_option(self, option_id: int) -> bool:
+        """True si `option_id` es una de las opciones de la pregunta actual."""
+        if not self.active_test or not 0 <= self.current_question_index < len(self.question_list):
+            return False
+        current_question = self.question_list[self.current_question_index]
+        return any(opt.id == option_id for opt in current_question.options)
+
+    def save_answer(self, selected_option_id: int | None, time_taken: int,
+                    session: Session | None = None):
+        """
+        Guarda la respuesta del usuario para la pregunta actual y
+        actualiza en memoria el conteo de aciertos por nivel.
+
+        Con `session`, el lote se escribe en esa transacción (sin commit) y
+        el búfer se vacía de inmediato: el llamador debe guardar el estado
+        exportado en la misma transacción (ver `ExamService`), para que
+        respuestas y estado se confirmen o se descarten juntos.
+        """
+        if not self._record_answer(selected_option_id, time_taken):
+            return
+        if session is not None:
+            self._flush_answers(session)
+            self.pending_answers = []
+            return
+        try:
+            with session_scope(self.session_factory) as session:
+                self._flush_answers(session)
+            self.pending_answers = []
+        except Exception as e:
+            # Las respuestas siguen en el búfer y se reintentan en el siguiente lote
+            print(f"Error al guardar respuestas: {e}")
+
+    def _record_answer(self, selected_option_id: int | None, time_taken: int) -> bool:
+        """
+        Califica la respuesta en memoria y la agrega al búfer.
+        Retorna True si el búfer se llenó y hay que escribir el lote.
+        """
         if not self.active_test:
             print("Error: No hay examen activo para guardar la respuesta.")
-            return
+            return False
 
         current_question = self.question_list[self.current_question_index]
         
         if time_taken > 60:
             selected_option_id = None 
+        elif selected_option_id is not None and not self.is_current_option(selected_option_id):
+            # Una opción de otra pregunta no cuenta: se registra como sin responder
+            print(f"Advertencia: la opción {selected_option_id} no pertenece a la pregunta actual.")
+            selected_option_id = None
+
+        # Calificación incremental: no hace falta volver a leer la respuesta
+        is_correct = self.option_is_correct.get(selected_option_id, False)
+        level = current_question.level
+        self.pending_answers.append((current_question.id, selected_option_id, time_taken, level, is_correct))
+
+        if level in self.level_scores:
+            self.level_scores[level]["total"] += 1
+            if is_correct:
+                self.level_scores[level]["correct"] += 1
+                self.correct_count += 1
 
-        answer = AttemptAnswer(
-            test_attempt_id=self.active_test.id,
-            question_id=current_question.id,
-            selected_option_id=selected_option_id,
-            time_taken_seconds=time_taken
+        return bool(ANSWER_FLUSH_EVERY) and len(self.pending_answers) >= ANSWER_FLUSH_EVERY
+
+    def _flush_answers(self, session: Session):
+        """
+        Escribe las respuestas pendientes con un solo INSERT (executemany)
+        y suma el lote a los contadores globales de `level_stats`.
+        No hace commit ni vacía el búfer: eso lo hace el llamador una vez
+        confirmada la transacción, para no perder respuestas si falla.
+        """
+        if not self.pending_answers:
+            return
+        attempt_id = self.active_test.id
+        rows = []
+        batch_levels = {}
+        for question_id, option_id, time_taken, level, is_correct in self.pending_answers:
+            rows.append({
+                "test_attempt_id": attempt_id,
+                "question_id": question_id,
+                "selected_option_id": option_id,
+                "time_taken_seconds": time_taken,
+                "is_correct": is_correct,
+                "question_level": level
+            })
+            counts = batch_levels.setdefault(level, {"b_level": level, "b_correct": 0, "b_total": 0})
+            counts["b_total"] += 1
+            if is_correct:
+                counts["b_correct"] += 1
+        session.execute(insert(AttemptAnswer), rows)
+
+        # Si la tabla de contadores no se ha construido, el UPDATE no afecta
+        # ninguna fila y el dashboard sigue usando la consulta agregada.
+        level_table = LevelStats.__table__
+        session.execute(
+            update(level_table)
+            .where(level_table.c.level == bindparam("b_level"))
+            .values(
+                correct=level_table.c.correct + bindparam("b_correct"),
+                total=level_table.c.total + bindparam("b_total")
+            ),
+            list(batch_levels.values())
         )
-        self.db_session.add(answer)
 
-    def finish_test(self) -> dict:
+    def finish_test(self, session: Session | None = None) -> dict:
         """
         Calcula la puntuación final y el desglose de puntaje por nivel.
+        Usa los conteos acumulados en `save_answer`, por lo que solo
+        escribe las respuestas pendientes y actualiza el TestAttempt.
+        Con `session`, escribe en esa transacción (sin commit) y deja que
+        los errores de la BD lleguen al llamador.
         """
         if not self.active_test:
             return {"error": "No hay examen activo que finalizar."}
 
-        try:
-            self.db_session.commit()
-        except Exception as e:
-            self.db_session.rollback()
-            return {"error": f"Error al guardar respuestas pendientes: {e}"}
+        # 1. Calcular puntuación y nivel
+        score, level = self._final_score()
 
-        # 1. Obtener todas las respuestas
-        stmt = select(AttemptAnswer).options(
-            selectinload(AttemptAnswer.selected_option),
-            selectinload(AttemptAnswer.question)
-        ).filter_by(
-            test_attempt_id=self.active_test.id
-        )
-        result = self.db_session.execute(stmt)
-        answers = result.scalars().all()
-        
-        # Lógica de Desglose de Puntaje
-        level_scores = {}
-        all_levels = ["Beginner", "Elementary", "Pre-intermediate", "Intermediate", "Upper-intermediate", "Advanced"]
-        for level in all_levels:
-            level_scores[level] = {"correct": 0, "total": 0}
+        # 2. Guardar respuestas pendientes, resultados y el resumen
+        #    del usuario en una sola transacción
+        if session is not None:
+            self._save_results(session, score, level)
+        else:
+            try:
+                with session_scope(self.session_factory) as session:
+                    self._save_results(session, score, level)
+            except Exception as e:
+                return {"error": f"Error al guardar resultados finales: {e}"}
+        record_write(self.active_test.user_id) # Su dashboard se leerá de la principal por un rato
 
-        total_correct_count = 0
-        
-        for ans in answers:
-            if not ans.question:
-                continue
-                
-            level = ans.question.level
-            if level in level_scores:
-                level_scores[level]["total"] += 1
-                
-                if ans.selected_option and ans.selected_option.is_correct:
-                    level_scores[level]["correct"] += 1
-                    total_correct_count += 1
-        
-        total_questions = len(self.question_list)
-        
-        # 2. Calcular puntuación y nivel
+        # 3. Limpiar estado y retornar
+        return self._close_exam(score, level)
+
+    def _reader(self, user_id: int | None = None, fresh: bool = False) -> sessionmaker:
+        """
+        Fábrica para una lectura analítica: la de lectura (réplica), salvo
+        que se pida `fresh` o que `user_id` haya escrito hace poco; en ese
+        caso la principal, para que el usuario vea sus propios cambios.
+        """
+        if fresh or (user_id is not None and wrote_recently(user_id)):
+            return self.session_factory
+        return self.read_session_factory
+
+    def _final_score(self) -> tuple[float, str]:
+        """Puntuación y nivel del examen activo, a partir de los conteos en memoria."""
         if self.active_test.test_type == 'practice':
-            score = total_correct_count * 5 
+            score = self.correct_count * 5 
             level = self._estimate_level_by_score(score)
         
         elif self.active_test.test_type == 'final':
-            score = total_correct_count * 2.5
-            level = self.calculate_placement_level(answers) 
+            score = self.correct_count * 2.5
+            level = self.calculate_placement_level(self.level_scores) 
         else:
             score = 0
             level = "N/A"
+        return score, level
+
+    def _save_results(self, session: Session, score: float, level: str):
+        """Escribe el último lote de respuestas, el resultado y el resumen del usuario (sin commit)."""
+        self._flush_answers(session)
+        session.execute(
+            update(TestAttempt)
+            .where(TestAttempt.id == self.active_test.id)
+            .values(score_percentage=score, assigned_level=level)
+        )
+        if self.active_test.test_type in ('practice', 'final'):
+            self._update_user_stats(session, score, level, self.level_scores)
 
-        # 3. Guardar resultados en el TestAttempt
-        self.active_test.score_percentage = score
-        self.active_test.assigned_level = level
-        
-        try:
-            self.db_session.commit()
-        except Exception as e:
-            self.db_session.rollback()
-            return {"error": f"Error al guardar resultados finales: {e}"}
-
-        # 4. Limpiar estado y retornar
+    def _close_exam(self, score: float, level: str) -> dict:
+        """Arma el diccionario de resultados y limpia el estado del examen."""
         results = {
             "score": score,
             "level": level,
-            "correct": total_correct_count,
-            "total": total_questions,
-            "level_scores": level_scores
+            "correct": self.correct_count,
+            "total": len(self.question_list),
+            "level_scores": self.level_scores
         }
+        self._reset_exam_state()
+        
+        return results
+
+    def _update_user_stats(self, session: Session, score: float, level: str, level_scores: dict):
+        """
+        Acumula el intento activo en la fila de `user_stats` del usuario
+        y actualiza sus columnas de resumen de `users` (sin commit).
+        """
+        key = (self.active_test.user_id, self.active_test.test_type)
+        stats = session.get(UserStats, key, with_for_update=True)
+        if stats is None:
+            stats = UserStats(user_id=key[0], test_type=key[1])
+            session.add(stats)
+        stats.record_attempt(score, level, level_scores, self.active_test.start_time)
+
+        # Columnas de resumen en `users` (tabla paginada del admin). Los
+        # conteos ya se sumaron al crear el intento; el promedio de práctica
+        # sale de `user_stats` (solo intentos terminados, fila ya bloqueada).
+        if key[1] == 'practice':
+            values = {User.avg_practice_score: stats.avg_score}
+        else:
+            values = {User.last_final_level: level}
+        session.execute(update(User).where(User.id == key[0]).values(values))
+
+    def _reset_exam_state(self):
+        """Limpia el estado del examen activo y los conteos de calificación."""
         self.active_test = None
         self.question_list = []
         self.current_question_index = -1
-        
-        return results
+        self.pending_answers = []
+        self.option_is_correct = {}
+        self.level_scores = {level: {"correct": 0, "total": 0} for level in LEVELS}
+        self.correct_count = 0
+
+    def export_state(self) -> dict | None:
+        """
+        Retorna el estado del examen activo como un diccionario serializable
+        en JSON (o None si no hay examen). Las preguntas se guardan por id;
+        `load_state` las recupera del banco en memoria.
+        """
+        if not self.active_test:
+            return None
+        return {
+            "attempt_id": self.active_test.id,
+            "user_id": self.active_test.user_id,
+            "test_type": self.active_test.test_type,
+            "question_ids": [q.id for q in self.question_list],
+            "current_question_index": self.current_question_index,
+            "pending_answers": [list(answer) for answer in self.pending_answers],
+            "level_scores": self.level_scores,
+            "correct_count": self.correct_count
+        }
+
+    def load_state(self, state: dict | None, session: Session | None = None):
+        """
+        Restaura un examen exportado con `export_state` (posiblemente en otro
+        proceso). Con None deja el controlador sin examen activo. Con
+        `session`, el banco se consulta (si hace falta) en esa transacción.
+        """
+        self._reset_exam_state()
+        if not state:
+            return
+
+        if session is None:
+            with session_scope(self.session_factory) as session:
+                bank = self._state_bank(session, state)
+        else:
+            bank = self._state_bank(session, state)
+        self._restore_state(bank, state)
+
+    def _state_bank(self, session: Session, state: dict):
+        bank = question_bank.get(session)
+        if self._missing_questions(bank, state):
+            # Lo pudo crear otro proceso con un banco más nuevo que nuestra copia
+            bank = question_bank.get(session, refresh=True)
+        return bank
+
+    def _missing_questions(self, bank, state: dict) -> list[int]:
+        return [qid for qid in state["question_ids"] if qid not in bank.by_id]
+
+    def _restore_state(self, bank, state: dict):
+        missing = self._missing_questions(bank, state)
+        if missing:
+            raise ValueError(f"Las preguntas {missing} ya no existen en el banco.")
+
+        # El intento ya existe en la BD; finish_test solo necesita su id, usuario y tipo
+        self.active_test = TestAttempt(
+            id=state["attempt_id"], user_id=state["user_id"], test_type=state["test_type"]
+        )
+        self.question_list = [bank.by_id[qid] for qid in state["question_ids"]]
+        self.current_question_index = state["current_question_index"]
+        self.pending_answers = [tuple(answer) for answer in state["pending_answers"]]
+        self.option_is_correct = bank.option_is_correct
+        self.level_scores = {level: dict(scores) for level, scores in state["level_scores"].items()}
+        self.correct_count = state["correct_count"]
 
     def _estimate_level_by_score(self, score: float) -> str:
         """
@@ -225,30 +482,17 @@ class TestController:
         if score < 95: return "Upper-intermediate"
         return "Advanced"
 
-    def calculate_placement_level(self, answers: list[AttemptAnswer]) -> str:
+    def calculate_placement_level(self, level_scores: dict) -> str:
         """
         Implementa la lógica de ubicación detallada
         basada en fallos por sección, según el Archivo 2.
+        Recibe el desglose {nivel: {"correct": n, "total": m}}.
         """
-        failures = {
-            "Beginner": 0,
-            "Elementary": 0,
-            "Pre-intermediate": 0,
-            "Intermediate": 0,
-            "Upper-intermediate": 0,
-            "Advanced": 0
-        }
+        failures = {level: 0 for level in LEVELS}
         
-        for ans in answers:
-            if not ans.question:
-                continue
-                
-            level = ans.question.level
-            is_correct = (ans.selected_option and ans.selected_option.is_correct)
-            
-            if not is_correct:
-                if level in failures:
-                    failures[level] += 1
+        for level, scores in level_scores.items():
+            if level in failures:
+                failures[level] = scores["total"] - scores["correct"]
         
         # Aplicar las reglas de ubicación
         if failures["Beginner"] >= 2:
@@ -267,18 +511,25 @@ class TestController:
         return "Advanced"
 
     # --- (FUNCIÓN DRÁSTICAMENTE ACTUALIZADA) ---
-    def get_dashboard_data(self) -> dict:
+    def get_dashboard_data(self, user_id: int | None = None, fresh: bool = False) -> dict:
         """
         (ACTUALIZADO) Recopila estadísticas detalladas de todos los intentos
         del usuario, separadas por tipo de examen y nivel de pregunta.
+        Lee el resumen materializado en `user_stats` (una fila por tipo),
+        así que el costo no depende del tamaño del historial.
+        Si no se indica `user_id`, usa el usuario activo. Con `fresh` lee
+        de la principal aunque haya réplica.
         """
-        if not self.current_user:
-            return {}
+        if user_id is None:
+            if not self.current_user:
+                return {}
+            user_id = self.current_user.id
         
+        with session_scope(self._reader(user_id, fresh)) as session:
+            return self._dashboard_data(session, user_id)
+
+    def _dashboard_data(self, session: Session, user_id: int) -> dict:
         # 1. Definir la estructura de datos que devolveremos
-        all_levels = ["Beginner", "Elementary", "Pre-intermediate", "Intermediate", "Upper-intermediate", "Advanced"]
-        level_template = {level: {"correct": 0, "total": 0} for level in all_levels}
-        
         data = {
             "practice_stats": {
                 "attempts_count": 0,
@@ -286,7 +537,7 @@ class TestController:
                 "avg_score": 0.0,
                 "high_score": 0.0,
                 "scores_over_time": [],
-                "performance_by_level": {level: {"correct": 0, "total": 0} for level in all_levels}
+                "performance_by_level": {level: {"correct": 0, "total": 0} for level in LEVELS}
             },
             "final_stats": {
                 "attempts_count": 0,
@@ -295,140 +546,65 @@ class TestController:
                 "high_score": 0.0,
                 "last_level": "N/A",
                 "scores_over_time": [],
-                "performance_by_level": {level: {"correct": 0, "total": 0} for level in all_levels}
+                "performance_by_level": {level: {"correct": 0, "total": 0} for level in LEVELS}
             }
         }
+        max_attempts = {"practice": 5, "final": 2}
 
-        # 2. Consultar todos los intentos y todas sus respuestas de una vez
-        stmt = select(TestAttempt).options(
-            selectinload(TestAttempt.answers).options(
-                selectinload(AttemptAnswer.selected_option),
-                selectinload(AttemptAnswer.question)
-            )
-        ).filter_by(
-            user_id=self.current_user.id
-        ).order_by(TestAttempt.start_time)
-        
-        all_attempts = self.db_session.execute(stmt).scalars().all()
-
-        if not all_attempts:
-            return data # Devuelve la plantilla vacía si no hay intentos
+        # 2. Consultar el resumen del usuario (búsqueda por llave primaria)
+        stmt = select(UserStats).where(UserStats.user_id == user_id)
+        all_stats = session.execute(stmt).scalars().all()
 
-        # 3. Procesar los intentos
-        practice_scores = []
-        final_scores = []
-        
-        for attempt in all_attempts:
-            # 3a. Separar por tipo de examen
-            stats_key = ""
-            if attempt.test_type == 'practice':
-                stats_key = "practice_stats"
-                if attempt.score_percentage is not None:
-                    practice_scores.append(attempt.score_percentage)
-                
-            elif attempt.test_type == 'final':
-                stats_key = "final_stats"
-                if attempt.score_percentage is not None:
-                    final_scores.append(attempt.score_percentage)
-                if attempt.assigned_level:
-                    data["final_stats"]["last_level"] = attempt.assigned_level
-
-            if not stats_key:
+        # 3. Copiar el resumen a la plantilla
+        for stats in all_stats:
+            if stats.test_type not in max_attempts or not stats.attempts_count:
                 continue
-
-            # 3b. Procesar las respuestas de CADA intento
-            for ans in attempt.answers:
-                if not ans.question:
-                    continue
-                
-                level = ans.question.level
-                if level in all_levels:
-                    data[stats_key]["performance_by_level"][level]["total"] += 1
-                    if ans.selected_option and ans.selected_option.is_correct:
-                        data[stats_key]["performance_by_level"][level]["correct"] += 1
-
-        # 4. Calcular estadísticas finales para Práctica
-        if practice_scores:
-            data["practice_stats"]["attempts_count"] = len(practice_scores)
-            data["practice_stats"]["attempts_remaining"] = max(0, 5 - len(practice_scores))
-            data["practice_stats"]["avg_score"] = sum(practice_scores) / len(practice_scores)
-            data["practice_stats"]["high_score"] = max(practice_scores)
-            data["practice_stats"]["scores_over_time"] = practice_scores
-
-        # 5. Calcular estadísticas finales para Examen Final
-        if final_scores:
-            data["final_stats"]["attempts_count"] = len(final_scores)
-            data["final_stats"]["attempts_remaining"] = max(0, 2 - len(final_scores))
-            data["final_stats"]["avg_score"] = sum(final_scores) / len(final_scores)
-            data["final_stats"]["high_score"] = max(final_scores)
-            data["final_stats"]["scores_over_time"] = final_scores
+            section = data[f"{stats.test_type}_stats"]
+            section["attempts_count"] = stats.attempts_count
+            section["attempts_remaining"] = max(0, max_attempts[stats.test_type] - stats.attempts_count)
+            section["avg_score"] = stats.avg_score
+            section["high_score"] = stats.high_score
+            section["scores_over_time"] = list(stats.scores_over_time or [])
+            for level, scores in (stats.level_performance or {}).items():
+                if level in section["performance_by_level"]:
+                    section["performance_by_level"][level] = dict(scores)
+            if stats.test_type == 'final' and stats.last_level:
+                section["last_level"] = stats.last_level
             
         return data
     
     def get_admin_dashboard_data(self) -> dict:
         """
         Recopila estadísticas globales de TODOS los usuarios para el admin.
+        Todo se calcula con un número fijo de consultas agregadas,
+        sin importar cuántos usuarios haya. La tabla de usuarios se
+        carga aparte, por páginas (ver `get_admin_user_page`).
         """
-        # 1. KPIs Globales
-        total_users = self.db_session.execute(select(func.count(User.id)).where(User.username != 'admin')).scalar()
-        total_practice = self.db_session.execute(select(func.count(TestAttempt.id)).where(TestAttempt.test_type == 'practice')).scalar()
-        total_final = self.db_session.execute(select(func.count(TestAttempt.id)).where(TestAttempt.test_type == 'final')).scalar()
-        
-        avg_practice_score = self.db_session.execute(select(func.avg(TestAttempt.score_percentage)).where(TestAttempt.test_type == 'practice')).scalar() or 0.0
-        avg_final_score = self.db_session.execute(select(func.avg(TestAttempt.score_percentage)).where(TestAttempt.test_type == 'final')).scalar() or 0.0
-
-        # 2. Desempeño global por nivel de pregunta
-        all_levels = ["Beginner", "Elementary", "Pre-intermediate", "Intermediate", "Upper-intermediate", "Advanced"]
-        global_level_performance = {level: {"correct": 0, "total": 0} for level in all_levels}
-        
-        # Consultamos TODAS las respuestas de todos los intentos
-        stmt_all_ans = select(AttemptAnswer).options(
-            selectinload(AttemptAnswer.selected_option),
-            selectinload(AttemptAnswer.question)
+        with session_scope(self._reader()) as session:
+            return self._admin_dashboard_data(session)
+
+    def _admin_dashboard_data(self, session: Session) -> dict:
+        is_practice = TestAttempt.test_type == 'practice'
+        is_final = TestAttempt.test_type == 'final'
+
+        # 1. KPIs Globales (una sola consulta con agregados condicionales)
+        total_users_subq = select(func.count(User.id)).where(User.username != 'admin').scalar_subquery()
+        kpi_stmt = select(
+            total_users_subq,
+            func.count(case((is_practice, TestAttempt.id))),
+            func.count(case((is_final, TestAttempt.id))),
+            func.avg(case((is_practice, TestAttempt.score_percentage))),
+            func.avg(case((is_final, TestAttempt.score_percentage)))
         )
-        all_answers = self.db_session.execute(stmt_all_ans).scalars().all()
-        
-        for ans in all_answers:
-            if not ans.question: continue
-            level = ans.question.level
-            if level in global_level_performance:
-                global_level_performance[level]["total"] += 1
-                if ans.selected_option and ans.selected_option.is_correct:
-                    global_level_performance[level]["correct"] += 1
-
-        # 3. Datos por usuario
-        user_data = []
-        # Obtenemos todos los usuarios (excepto el admin)
-        all_users = self.db_session.execute(select(User).where(User.username != 'admin')).scalars().all()
-        
-        for user in all_users:
-            user_practice = self.db_session.execute(select(TestAttempt).where(
-                TestAttempt.user_id == user.id, TestAttempt.test_type == 'practice'
-            )).scalars().all()
-            
-            user_final = self.db_session.execute(select(TestAttempt).where(
-                TestAttempt.user_id == user.id, TestAttempt.test_type == 'final'
-            )).scalars().all()
+        total_users, total_practice, total_final, avg_practice_score, avg_final_score = \
+            session.execute(kpi_stmt).one()
 
-            practice_scores = [a.score_percentage for a in user_practice if a.score_percentage is not None]
-            avg_practice = sum(practice_scores) / len(practice_scores) if practice_scores else 0.0
-            
-            last_level = "N/A"
-            if user_final:
-                # Ordenamos por fecha y tomamos el último
-                user_final.sort(key=lambda x: x.start_time, reverse=True)
-                if user_final[0].assigned_level:
-                    last_level = user_final[0].assigned_level
-            
-            user_data.append({
-                "username": user.username,
-                "practice_attempts": len(user_practice),
-                "final_attempts": len(user_final),
-                "avg_practice_score": avg_practice,
-                "last_final_level": last_level
-            })
+        # 2. Desempeño global por nivel de pregunta
+        global_level_performance = self._global_level_performance(session)
+        avg_practice_score = float(avg_practice_score or 0.0)
+        avg_final_score = float(avg_final_score or 0.0)
 
-        # 4. Ensamblar el diccionario final
+        # 3. Ensamblar el diccionario final
         admin_data = {
             "global_stats": {
                 "total_users": total_users,
@@ -437,81 +613,187 @@ class TestController:
                 "avg_practice_score": avg_practice_score,
                 "avg_final_score": avg_final_score
             },
-            "global_level_performance": global_level_performance,
-            "user_details": user_data
+            "global_level_performance": global_level_performance
         }
         
         return admin_data
     
+    def get_admin_user_page(self, sort_key: str = "username", descending: bool = False,
+                            username_prefix: str = "", after: tuple | None = None,
+                            limit: int = 200) -> list[dict]:
+        """
+        Retorna una página de la tabla de usuarios del admin, usando
+        paginación por llave (keyset): `after` es el (valor de orden, id)
+        de la última fila ya mostrada. El orden y el filtro se resuelven
+        en la BD con los índices (columna, id) de `users`.
+        """
+        with session_scope(self._reader()) as session:
+            return self._admin_user_page(session, sort_key, descending, username_prefix, after, limit)
+
+    def _admin_user_page(self, session: Session, sort_key: str, descending: bool,
+                         username_prefix: str, after: tuple | None, limit: int) -> list[dict]:
+        if sort_key not in ADMIN_USER_SORT_COLUMNS:
+            sort_key = "username"
+        sort_column = ADMIN_USER_SORT_COLUMNS[sort_key]
+        
+        stmt = select(
+            User.id, User.username, User.practice_attempts, User.final_attempts,
+            User.avg_practice_score, User.last_final_level
+        ).where(User.username != 'admin')
+        
+        if username_prefix:
+            stmt = stmt.where(User.username.startswith(username_prefix, autoescape=True))
+        
+        key = tuple_(sort_column, User.id)
+        if after is not None:
+            stmt = stmt.where(key < tuple_(*after) if descending else key > tuple_(*after))
+        
+        if descending:
+            stmt = stmt.order_by(sort_column.desc(), User.id.desc())
+        else:
+            stmt = stmt.order_by(sort_column, User.id)
+        
+        rows = session.execute(stmt.limit(limit)).all()
+        
+        page = []
+        for row in rows:
+            user_row = {
+                "id": row.id,
+                "username": row.username,
+                "practice_attempts": row.practice_attempts,
+                "final_attempts": row.final_attempts,
+                "avg_practice_score": row.avg_practice_score,
+                "last_final_level": row.last_final_level
+            }
+            user_row["cursor"] = (user_row[sort_key], row.id)
+            page.append(user_row)
+        return page
+
+    def get_global_level_performance(self) -> dict:
+        """
+        Aciertos y total de respuestas por nivel de pregunta en toda la plataforma.
+        Usa los contadores materializados de `level_stats` (O(niveles)) si
+        están construidos; si no, los agrupa en la BD con una sola consulta
+        sobre `attempt_answers`.
+        """
+        with session_scope(self._reader()) as session:
+            return self._global_level_performance(session)
+
+    def _global_level_performance(self, session: Session) -> dict:
+        performance = {level: {"correct": 0, "total": 0} for level in LEVELS}
+
+        counters = session.execute(
+            select(LevelStats.level, LevelStats.correct, LevelStats.total)
+        ).all()
+        if not counters:
+            correct = func.sum(case((AttemptAnswer.is_correct, 1), else_=0))
+            stmt = select(
+                AttemptAnswer.question_level, correct, func.count(AttemptAnswer.id)
+            ).group_by(AttemptAnswer.question_level)
+            counters = session.execute(stmt).all()
+
+        for level, n_correct, n_total in counters:
+            if level in performance:
+                performance[level] = {"correct": int(n_correct or 0), "total": int(n_total or 0)}
+        return performance
+
     def get_user_detail_data(self, username: str) -> dict:
         """
-        Recopila el historial de intentos COMPLETO de un solo usuario,
-        incluyendo cada respuesta individual.
+        Recopila la lista de intentos de un solo usuario.
+        Solo lee columnas de TestAttempt; las respuestas de cada intento
+        se cargan bajo demanda con `get_attempt_answers`.
         """
         print(f"DEBUG: Buscando datos detallados para el usuario: {username}")
         
+        with session_scope(self._reader()) as session:
+            return self._user_detail_data(session, username)
+
+    def _user_detail_data(self, session: Session, username: str) -> dict:
         # 1. Encontrar al usuario por su nombre
-        user = self.db_session.execute(
+        user = session.execute(
             select(User).filter_by(username=username)
         ).scalar_one_or_none()
         
         if not user:
             return {"error": f"No se encontró al usuario {username}"}
 
-        # 2. Cargar TODOS los intentos de ESE usuario, incluyendo
-        #    respuestas, opciones seleccionadas y preguntas.
-        stmt = select(TestAttempt).options(
-            selectinload(TestAttempt.answers).options(
-                selectinload(AttemptAnswer.selected_option),
-                selectinload(AttemptAnswer.question)
-            )
+        # 2. Cargar los intentos de ESE usuario (sin respuestas)
+        stmt = select(
+            TestAttempt.id, TestAttempt.test_type, TestAttempt.start_time,
+            TestAttempt.score_percentage, TestAttempt.assigned_level
         ).filter_by(
             user_id=user.id
         ).order_by(TestAttempt.start_time.desc()) # El más reciente primero
-        
-        all_attempts = self.db_session.execute(stmt).scalars().all()
+        attempts = session.execute(stmt).all()
         
         # 3. Procesar los datos en un formato limpio para la vista
         processed_attempts = []
-        for attempt in all_attempts:
-            total_time = 0
-            processed_answers = []
-            
-            for ans in attempt.answers:
-                total_time += ans.time_taken_seconds
-                
-                # Manejar casos donde la pregunta o la opción fue eliminada
-                q_text = "Pregunta eliminada"
-                q_level = "N/A"
-                if ans.question:
-                    q_text = ans.question.text
-                    q_level = ans.question.level
-                
-                opt_text = "N/A (sin respuesta)"
-                is_correct = False
-                if ans.selected_option:
-                    opt_text = ans.selected_option.text
-                    is_correct = ans.selected_option.is_correct
-
-                processed_answers.append({
-                    "question_text": q_text[:50] + "...", # Acortamos el texto
-                    "question_level": q_level,
-                    "selected_option": opt_text,
-                    "is_correct": is_correct,
-                    "time_taken": ans.time_taken_seconds
-                })
-            
+        for attempt in attempts:
             processed_attempts.append({
                 "id": attempt.id,
                 "type": "Práctica" if attempt.test_type == 'practice' else "Examen Final",
                 "date": attempt.start_time.strftime("%Y-%m-%d %H:%M"),
                 "score": attempt.score_percentage,
-                "level": attempt.assigned_level,
-                "total_time_seconds": total_time,
-                "answers": processed_answers
+                "level": attempt.assigned_level
             })
 
         return {
             "username": user.username,
             "attempts": processed_attempts
-        }
\ No newline at end of file
+        }
+
+    def get_attempt_answers(self, attempt_id: int) -> dict:
+        """
+        Recopila cada respuesta individual de un intento (para el visor de
+        detalle). Los intentos terminados ya no cambian, así que los más
+        recientes se guardan en una pequeña caché LRU (`attempt_answers_cache`).
+        """
+        cached = attempt_answers_cache.get(attempt_id)
+        if cached is not None:
+            return cached
+
+        with session_scope(self._reader()) as session:
+            return self._attempt_answers(session, attempt_id)
+
+    def _attempt_answers(self, session: Session, attempt_id: int) -> dict:
+        # Una sola consulta; el nivel y el resultado vienen de la propia respuesta
+        stmt = select(
+            AttemptAnswer.time_taken_seconds, AttemptAnswer.is_correct, AttemptAnswer.question_level,
+            Question.text, Option.text, TestAttempt.score_percentage
+        ).select_from(AttemptAnswer).join(
+            TestAttempt, AttemptAnswer.test_attempt_id == TestAttempt.id
+        ).outerjoin(
+            Question, AttemptAnswer.question_id == Question.id
+        ).outerjoin(
+            Option, AttemptAnswer.selected_option_id == Option.id
+        ).where(
+            AttemptAnswer.test_attempt_id == attempt_id
+        ).order_by(AttemptAnswer.id)
+        
+        total_time = 0
+        finished = False
+        processed_answers = []
+        rows = session.execute(stmt).all()
+        
+        for time_taken, is_correct, q_level, q_text, opt_text, score in rows:
+            total_time += time_taken
+            finished = score is not None
+            
+            # Manejar casos donde la pregunta o la opción fue eliminada
+            processed_answers.append({
+                "question_text": (q_text or "Pregunta eliminada")[:50] + "...", # Acortamos el texto
+                "question_level": q_level or "N/A",
+                "selected_option": opt_text or "N/A (sin respuesta)",
+                "is_correct": is_correct,
+                "time_taken": time_taken
+            })
+
+        detail = {
+            "attempt_id": attempt_id,
+            "total_time_seconds": total_time,
+            "answers": processed_answers
+        }
+        
+        if finished:
+            attempt_answers_cache.put(attempt_id, detail)
+        return detail
@@ -1,77 +1,108 @@
-import bcrypt
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import sessionmaker
 from sqlalchemy import select, func
 from sqlalchemy.exc import IntegrityError
-from model import User, TestAttempt
+from model import SessionLocal, session_scope, User, TestAttempt
+from controller import security
 
 class UserController:
     
-    def __init__(self, session: Session):
-        self.db_session = session
+    def __init__(self, session_factory: sessionmaker = SessionLocal):
+        # Cada operación abre su propia sesión corta (ver `session_scope`)
+        self.session_factory = session_factory
 
     def hash_password(self, password: str) -> bytes:
-        """Genera un hash seguro para la contraseña."""
-        salt = bcrypt.gensalt()
-        return bcrypt.hashpw(password.encode('utf-8'), salt)
+        """Genera un hash seguro para la contraseña (costo calibrado)."""
+        return security.hash_password(password)
 
     def check_password(self, password: str, hashed: bytes) -> bool:
         """Verifica si la contraseña coincide con el hash."""
-        return bcrypt.checkpw(password.encode('utf-8'), hashed)
+        return security.check_password(password, hashed)
 
     def register_user(self, username: str, password: str) -> (User | str):
         """
         (ACTUALIZADO) Intenta registrar un nuevo usuario.
         Prohíbe el registro del nombre 'admin'.
         """
-        if not username or not password:
-            return "El nombre de usuario y la contraseña no pueden estar vacíos."
-            
-        # --- (NUEVO) Bloqueo de 'admin' ---
-        if username.lower() == 'admin':
-            return "El nombre 'admin' es reservado y no puede ser registrado."
-        # --- Fin del cambio ---
+        error = self._registration_error(username, password)
+        if error:
+            return error
         
         try:
+            # El hash (lento) se calcula antes de abrir la transacción
             hashed_pw = self.hash_password(password)
-            new_user = User(username=username, password_hash=hashed_pw)
-            self.db_session.add(new_user)
-            self.db_session.commit()
-            self.db_session.refresh(new_user)
+            with session_scope(self.session_factory) as session:
+                new_user = User(username=username, password_hash=hashed_pw)
+                session.add(new_user)
             return new_user
         except IntegrityError:
-            self.db_session.rollback()
             return "Ese nombre de usuario ya existe."
         except Exception as e:
-            self.db_session.rollback()
             return f"Error inesperado: {e}"
 
+    def _registration_error(self, username: str, password: str) -> str | None:
+        """Valida los datos de registro; retorna el mensaje de error o None."""
+        if not username or not password:
+            return "El nombre de usuario y la contraseña no pueden estar vacíos."
+            
+        # --- (NUEVO) Bloqueo de 'admin' ---
+        if username.lower() == 'admin':
+            return "El nombre 'admin' es reservado y no puede ser registrado."
+        # --- Fin del cambio ---
+        return None
+
     def login_user(self, username: str, password: str) -> (User | str):
         """
         Intenta autenticar un usuario.
         Retorna el objeto User si tiene éxito, o un string de error si falla.
         """
         stmt = select(User).filter_by(username=username)
-        user = self.db_session.execute(stmt).scalar_one_or_none()
+        with session_scope(self.session_factory) as session:
+            user = session.execute(stmt).scalar_one_or_none()
         
+        # bcrypt corre ya sin conexión tomada del pool
         if user and self.check_password(password, user.password_hash):
+            self._rehash_if_needed(user, password)
             return user
         else:
             return "Nombre de usuario o contraseña incorrectos."
 
+    def _rehash_if_needed(self, user: User, password: str):
+        """
+        Si el hash guardado usa un costo menor al calibrado para este
+        equipo, lo regenera aprovechando que tenemos la contraseña en claro.
+        Un error aquí no impide el login.
+        """
+        if not security.needs_rehash(user.password_hash):
+            return
+        try:
+            new_hash = self.hash_password(password)
+            with session_scope(self.session_factory) as session:
+                session.merge(user, load=False).password_hash = new_hash
+            user.password_hash = new_hash
+        except Exception as e:
+            print(f"No se pudo actualizar el hash de '{user.username}': {e}")
+
     def get_attempt_counts(self, user: User) -> dict:
         """
         Cuenta cuántos intentos de cada tipo ha realizado un usuario.
         """
+        practice_stmt, final_stmt = self._attempt_count_statements(user.id)
+        with session_scope(self.session_factory) as session:
+            practice_count = session.execute(practice_stmt).scalar() or 0
+            final_count = session.execute(final_stmt).scalar() or 0
+        
+        return self._attempt_counts(practice_count, final_count)
+
+    def _attempt_count_statements(self, user_id: int):
         practice_stmt = select(func.count(TestAttempt.id)).filter_by(
-            user_id=user.id, test_type='practice'
+            user_id=user_id, test_type='practice'
         )
-        practice_count = self.db_session.execute(practice_stmt).scalar() or 0
-        
         final_stmt = select(func.count(TestAttempt.id)).filter_by(
-            user_id=user.id, test_type='final'
+            user_id=user_id, test_type='final'
         )
-        final_count = self.db_session.execute(final_stmt).scalar() or 0
-        
+        return practice_stmt, final_stmt
+
+    def _attempt_counts(self, practice_count: int, final_count: int) -> dict:
         return {
             'practice_total': practice_count,
             'practice_remaining': max(0, 5 - practice_count),
@@ -0,0 +1,107 @@
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from constants import WORKER_THREADS
+
+
+class WorkerSignals(QObject):
+    """
+    Señales de un `Worker`. El objeto se crea en el hilo de la GUI, así que
+    los slots conectados se ejecutan en ese hilo aunque se emita desde el worker.
+    """
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+
+class Worker(QRunnable):
+    """
+    Ejecuta `job()` fuera del hilo de la GUI.
+    Los controladores abren y cierran su propia sesión por operación,
+    así que el worker no necesita manejar conexiones.
+    """
+
+    def __init__(self, job):
+        super().__init__()
+        self.job = job
+        self.signals = WorkerSignals()
+        self.cancelled = False
+
+    def cancel(self):
+        """
+        Marca el trabajo como cancelado. Una consulta ya en curso no se
+        interrumpe, pero su resultado se descarta.
+        """
+        self.cancelled = True
+
+    def run(self):
+        if self.cancelled:
+            return
+        try:
+            result = self.job()
+        except Exception as e:
+            if not self.cancelled:
+                self.signals.failed.emit(str(e))
+            return
+        if not self.cancelled:
+            self.signals.finished.emit(result)
+
+
+class WorkerPool:
+    """
+    Capa de ejecución en segundo plano para las cargas de las ventanas.
+
+    Cada trabajo se registra con una clave (p. ej. "dashboard"). Enviar otro
+    trabajo con la misma clave cancela el anterior, y `cancel(key)` permite
+    descartar una carga cuando el usuario navega a otra ventana.
+    """
+
+    def __init__(self, max_threads: int = WORKER_THREADS):
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(max_threads)
+        self._active: dict[str, Worker] = {}
+
+    def submit(self, key: str, job, on_done, on_error=None) -> Worker:
+        """Ejecuta `job()` en el pool y entrega el resultado a `on_done`."""
+        self.cancel(key)
+        worker = Worker(job)
+
+        # Los callbacks corren en el hilo de la GUI; comprobamos ahí si el
+        # trabajo sigue vigente para no pintar resultados viejos.
+        def done(result):
+            if self._release(key, worker):
+                on_done(result)
+
+        def failed(message):
+            if self._release(key, worker):
+                if on_error:
+                    on_error(message)
+                else:
+                    print(f"Error en la carga '{key}': {message}")
+
+        worker.signals.finished.connect(done)
+        worker.signals.failed.connect(failed)
+        self._active[key] = worker
+        self.pool.start(worker)
+        return worker
+
+    def _release(self, key: str, worker: Worker) -> bool:
+        if worker.cancelled or self._active.get(key) is not worker:
+            return False
+        del self._active[key]
+        return True
+
+    def is_running(self, key: str) -> bool:
+        return key in self._active
+
+    def cancel(self, key: str):
+        worker = self._active.pop(key, None)
+        if worker is not None:
+            worker.cancel()
+            self.pool.tryTake(worker) # Si aún no empezó, ni siquiera se ejecuta
+
+    def cancel_all(self):
+        for key in list(self._active):
+            self.cancel(key)
+
+    def shutdown(self, timeout_ms: int = 5000):
+        """Cancela lo pendiente y espera a que terminen los workers en curso."""
+        self.cancel_all()
+        self.pool.waitForDone(timeout_ms)
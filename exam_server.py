@@ -0,0 +1,209 @@
+"""
+Servicio HTTP/JSON de exámenes: varias terminales (kioscos) comparten un
+mismo backend en lugar de conectarse cada una a MySQL.
+
+Cada proceso tiene su propio pool de conexiones y su propia caché del banco
+de preguntas, y atiende las peticiones en hilos. El estado de los exámenes
+vive en la BD (`exam_sessions`), así que con `--workers N` varios procesos
+escuchan el mismo puerto (SO_REUSEPORT) y cualquiera atiende a cualquier
+cliente.
+
+Rutas (todas responden JSON; las que llevan token usan `Authorization: Bearer <token>`):
+    POST /api/register              {"username", "password"}
+    POST /api/login                 {"username", "password"} -> {"token", "user"}
+    POST /api/logout
+    GET  /api/attempt-counts
+    POST /api/exams                 {"test_type"} -> primera pregunta
+    POST /api/exams/answer          {"option_id", "time_taken", "number"} -> siguiente pregunta
+    POST /api/exams/finish          -> resultados
+    GET  /api/dashboard
+    GET  /api/admin/dashboard
+    GET  /api/admin/users?sort=&desc=&prefix=&after=&limit=
+    GET  /api/admin/users/<usuario>
+    GET  /api/admin/attempts/<id>/answers
+
+Uso:
+    python exam_server.py [--host 127.0.0.1] [--port 8765] [--workers 4]
+"""
+import argparse
+import json
+import re
+import socket
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import get_context
+from urllib.parse import urlsplit, parse_qs, unquote
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from model import engine_options
+from controller.exam_service import ExamService, ServiceError
+from controller.question_bank import question_bank
+from constants import (
+    DATABASE_URL, DATABASE_READ_URL, EXAM_SERVICE_HOST, EXAM_SERVICE_PORT, EXAM_SERVICE_WORKERS, EXAM_SERVICE_POOL_SIZE
+)
+
+# (método, patrón de la ruta, función(service, token, body, query, *grupos))
+ROUTES = [
+    ("POST", r"/api/register", lambda s, t, b, q: s.register(b.get("username", ""), b.get("password", ""))),
+    ("POST", r"/api/login", lambda s, t, b, q: s.login(b.get("username", ""), b.get("password", ""))),
+    ("POST", r"/api/logout", lambda s, t, b, q: s.logout(t)),
+    ("GET", r"/api/attempt-counts", lambda s, t, b, q: s.attempt_counts(t)),
+    ("POST", r"/api/exams", lambda s, t, b, q: s.start_test(t, b.get("test_type", ""))),
+    ("POST", r"/api/exams/answer",
+     lambda s, t, b, q: s.answer(t, b.get("option_id"), int(b.get("time_taken", 0)), b.get("number"))),
+    ("POST", r"/api/exams/finish", lambda s, t, b, q: s.finish(t)),
+    ("GET", r"/api/dashboard", lambda s, t, b, q: s.dashboard(t)),
+    ("GET", r"/api/admin/dashboard", lambda s, t, b, q: s.admin_dashboard(t)),
+    ("GET", r"/api/admin/users", lambda s, t, b, q: s.admin_user_page(
+        t, q.get("sort", "username"), q.get("desc") == "1", q.get("prefix", ""),
+        json.loads(q["after"]) if q.get("after") else None, int(q.get("limit", 200))
+    )),
+    ("GET", r"/api/admin/users/([^/]+)", lambda s, t, b, q, username: s.user_detail(t, unquote(username))),
+    ("GET", r"/api/admin/attempts/(\d+)/answers", lambda s, t, b, q, attempt_id: s.attempt_answers(t, int(attempt_id))),
+]
+_COMPILED_ROUTES = [(method, re.compile(pattern + "$"), handler) for method, pattern, handler in ROUTES]
+
+
+class ExamRequestHandler(BaseHTTPRequestHandler):
+    service: ExamService # Lo asigna `create_server`
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def _dispatch(self, method: str):
+        url = urlsplit(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            handler, groups = self._match(method, url.path)
+            body = self._read_json() if method == "POST" else {}
+            result = handler(self.service, self._token(), body, query, *groups)
+            self._send_json(200, result)
+        except ServiceError as e:
+            self._send_json(e.status, {"error": e.message})
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json(400, {"error": f"Petición inválida: {e}"})
+        except Exception as e:
+            self._send_json(500, {"error": f"Error interno: {e}"})
+
+    def _match(self, method: str, path: str):
+        for route_method, pattern, handler in _COMPILED_ROUTES:
+            match = pattern.match(path)
+            if match and route_method == method:
+                return handler, match.groups()
+        raise ServiceError(404, f"Ruta no encontrada: {method} {path}")
+
+    def _token(self) -> str | None:
+        header = self.headers.get("Authorization", "")
+        return header[7:] if header.startswith("Bearer ") else None
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        body = json.loads(self.rfile.read(length))
+        if not isinstance(body, dict):
+            raise ValueError("se esperaba un objeto JSON")
+        return body
+
+    def _send_json(self, status: int, payload):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass # Sin una línea por petición; los errores van en la respuesta
+
+
+class ExamHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, handler, reuse_port: bool = False):
+        self.reuse_port = reuse_port
+        super().__init__(address, handler)
+
+    def server_bind(self):
+        if self.reuse_port:
+            # Varios procesos aceptan conexiones en el mismo puerto; el kernel las reparte
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
+
+
+def _create_session_factory(url: str, pool_size: int) -> sessionmaker:
+    options = engine_options(url)
+    if "pool_size" in options:
+        options.update(pool_size=pool_size, max_overflow=pool_size)
+    engine = create_engine(url, **options)
+    return sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+
+def create_server(host: str, port: int, url: str = DATABASE_URL,
+                  pool_size: int = EXAM_SERVICE_POOL_SIZE, reuse_port: bool = False,
+                  read_url: str | None = DATABASE_READ_URL) -> ExamHTTPServer:
+    """
+    Crea el servidor de un proceso, con su propio engine (y pool) sobre `url`
+    y, si se indica `read_url`, otro sobre la réplica para los dashboards.
+    """
+    session_factory = _create_session_factory(url, pool_size)
+    read_session_factory = _create_session_factory(read_url, pool_size) if read_url else None
+
+    # El banco se carga una vez por proceso, antes de aceptar peticiones
+    with session_factory() as session:
+        question_bank.warm(session)
+
+    handler = type("BoundExamRequestHandler", (ExamRequestHandler,), {"service": ExamService(session_factory, read_session_factory)})
+    return ExamHTTPServer((host, port), handler, reuse_port)
+
+
+def serve(host: str, port: int, url: str = DATABASE_URL, reuse_port: bool = False,
+          read_url: str | None = DATABASE_READ_URL):
+    server = create_server(host, port, url, reuse_port=reuse_port, read_url=read_url)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servicio HTTP/JSON de exámenes.")
+    parser.add_argument("--host", default=EXAM_SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=EXAM_SERVICE_PORT)
+    parser.add_argument("--workers", type=int, default=EXAM_SERVICE_WORKERS, help="procesos que atienden el puerto")
+    parser.add_argument("--url", default=DATABASE_URL, help="URL de la BD")
+    parser.add_argument("--read-url", default=DATABASE_READ_URL, help="URL de la réplica de lectura (opcional)")
+    args = parser.parse_args()
+
+    workers = args.workers
+    if workers > 1 and not hasattr(socket, "SO_REUSEPORT"):
+        print("Advertencia: este sistema no soporta SO_REUSEPORT; se usará un solo proceso.")
+        workers = 1
+
+    print(f"Servicio de exámenes en http://{args.host}:{args.port} ({workers} proceso(s)). Ctrl+C para detener.")
+    if workers == 1:
+        serve(args.host, args.port, args.url, read_url=args.read_url)
+        return
+
+    context = get_context("spawn")
+    processes = [
+        context.Process(target=serve, args=(args.host, args.port, args.url, True, args.read_url), daemon=True)
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+    print("Servicio detenido.")
+
+
+if __name__ == "__main__":
+    main()
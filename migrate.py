@@ -0,0 +1,13 @@
+# migrate.py
+
+from model import engine, Base, upgrade_schema
+
+if __name__ == "__main__":
+    # Crea las tablas nuevas y aplica las migraciones pendientes
+    # (columnas e índices que create_all no puede agregar a tablas existentes).
+    Base.metadata.create_all(bind=engine, checkfirst=True)
+    applied = upgrade_schema(engine)
+    if applied:
+        print(f"Migraciones aplicadas: {applied}")
+    else:
+        print("La BD ya está al día.")
@@ -9,7 +9,7 @@ class AttemptAnswer(Base):
     __table_args__ = {'extend_existing':True}
     
     id: Mapped[int] = mapped_column(primary_key=True)
-    test_attempt_id: Mapped[int] = mapped_column(ForeignKey('test_attempts.id'), nullable=False)
+    test_attempt_id: Mapped[int] = mapped_column(ForeignKey('test_attempts.id'), nullable=False, index=True)
     
     # Lógica Cascade (ondelete): Si se borra una Pregunta o una Opción,
     # no queremos borrar todo el intento. Simplemente ponemos la FK a NULL.
@@ -25,6 +25,12 @@ class AttemptAnswer(Base):
     
     time_taken_seconds: Mapped[int] = mapped_column(default=0) 
     
+    # Copias desnormalizadas, capturadas una sola vez al escribir la respuesta.
+    # Permiten calificar y agregar sin unir con Option/Question, y conservan
+    # el historial aunque la pregunta se borre y las FKs queden en NULL.
+    is_correct: Mapped[bool] = mapped_column(default=False, nullable=False)
+    question_level: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
+    
     test_attempt: Mapped["TestAttempt"] = relationship(back_populates="answers")
     
     question: Mapped[Optional["Question"]] = relationship(back_populates="attempt_answers")
@@ -1,11 +1,82 @@
+import threading
+import time
+from contextlib import contextmanager
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
-from constants import DATABASE_URL
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, sessionmaker, DeclarativeBase
+from constants import (
+    DATABASE_URL, DATABASE_READ_URL, READ_YOUR_WRITES_SECONDS,
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING
+)
 
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def engine_options(url: str) -> dict:
+    """
+    Opciones del pool de conexiones. SQLite usa su propio pool (sin
+    tamaño ni desborde), así que solo se le aplica el pre-ping.
+    """
+    if make_url(url).get_backend_name() == "sqlite":
+        return {"pool_pre_ping": DB_POOL_PRE_PING}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+# Los objetos siguen legibles después del commit: cada operación usa una
+# sesión corta y sus resultados se consumen cuando la sesión ya se cerró.
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+# Engine de lectura para las consultas analíticas (una réplica, o la misma principal)
+if DATABASE_READ_URL:
+    read_engine = create_engine(DATABASE_READ_URL, **engine_options(DATABASE_READ_URL))
+else:
+    read_engine = engine
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=read_engine)
+
+# Última escritura de cada usuario en la principal (monotonic), para leer lo propio
+_recent_writes: dict[int, float] = {}
+_recent_writes_lock = threading.Lock()
+
+
+def record_write(user_id: int):
+    """Registra que `user_id` acaba de escribir en la principal."""
+    now = time.monotonic()
+    with _recent_writes_lock:
+        _recent_writes[user_id] = now
+        if len(_recent_writes) > 10000:
+            for key in [k for k, t in _recent_writes.items() if now - t > READ_YOUR_WRITES_SECONDS]:
+                del _recent_writes[key]
+
+
+def wrote_recently(user_id: int) -> bool:
+    """True si `user_id` escribió hace menos de READ_YOUR_WRITES_SECONDS (la réplica podría no tenerlo)."""
+    with _recent_writes_lock:
+        written = _recent_writes.get(user_id)
+    return written is not None and time.monotonic() - written < READ_YOUR_WRITES_SECONDS
+
+
+@contextmanager
+def session_scope(session_factory: sessionmaker = SessionLocal):
+    """
+    Unidad de trabajo de una operación: abre una sesión, hace commit si el
+    bloque termina bien, rollback si lanza una excepción, y siempre la cierra
+    (la conexión vuelve al pool).
+    """
+    session: Session = session_factory()
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
 
 
 class Base(DeclarativeBase):
-    pass
\ No newline at end of file
+    pass
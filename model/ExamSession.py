@@ -0,0 +1,32 @@
+import datetime
+from typing import Optional
+from sqlalchemy import String, JSON, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+from model import Base
+
+class ExamSession(Base):
+    """
+    Sesión de un cliente del servicio HTTP (`exam_server.py`), identificada
+    por un token. Guarda el estado del examen en curso exportado por
+    `TestController.export_state`, así que cualquier proceso del servicio
+    puede atender la siguiente petición del mismo cliente.
+    """
+    __tablename__ = 'exam_sessions'
+    __table_args__ = {'extend_existing':True}
+
+    token: Mapped[str] = mapped_column(String(64), primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey('users.id'), nullable=False, index=True)
+    # Copia del nombre para autorizar las rutas de admin sin leer `users`
+    username: Mapped[str] = mapped_column(String(100), nullable=False)
+
+    # Estado del examen activo (None si no hay examen en curso)
+    state: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    # Aumenta con cada cambio de `state`; una petición solo guarda su estado
+    # si nadie lo cambió desde que lo leyó (ver `ExamService._store_state`)
+    state_version: Mapped[int] = mapped_column(default=0, nullable=False)
+
+    created_at: Mapped[datetime.datetime] = mapped_column(default=datetime.datetime.utcnow)
+    updated_at: Mapped[datetime.datetime] = mapped_column(default=datetime.datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f"<ExamSession(user='{self.username}', active={self.state is not None})>"
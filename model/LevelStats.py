@@ -0,0 +1,25 @@
+from sqlalchemy import String
+from sqlalchemy.orm import Mapped, mapped_column
+from model import Base
+
+class LevelStats(Base):
+    """
+    Contadores globales de aciertos por nivel de pregunta, sobre todas las
+    filas de `attempt_answers`. `TestController` los incrementa en la misma
+    transacción en que escribe cada lote de respuestas.
+
+    Las filas (una por nivel) las crea la migración 6, que también corre
+    `populate_db.py` en una BD nueva; `backfill_stats.py` las reconstruye.
+    Mientras la tabla esté vacía se considera que los contadores no están
+    al día y el dashboard de admin calcula los totales con una consulta
+    agregada.
+    """
+    __tablename__ = 'level_stats'
+    __table_args__ = {'extend_existing':True}
+    
+    level: Mapped[str] = mapped_column(String(50), primary_key=True)
+    correct: Mapped[int] = mapped_column(default=0, nullable=False)
+    total: Mapped[int] = mapped_column(default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<LevelStats(level='{self.level}', correct={self.correct}, total={self.total})>"
@@ -9,7 +9,7 @@ class Option(Base):
     __table_args__ = {'extend_existing':True}
     
     id: Mapped[int] = mapped_column(primary_key=True)
-    question_id: Mapped[int] = mapped_column(ForeignKey('questions.id'), nullable=False)
+    question_id: Mapped[int] = mapped_column(ForeignKey('questions.id'), nullable=False, index=True)
     text: Mapped[str] = mapped_column(String(500), nullable=False)
     is_correct: Mapped[bool] = mapped_column(default=False, nullable=False)
     
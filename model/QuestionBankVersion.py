@@ -0,0 +1,20 @@
+from sqlalchemy.orm import Mapped, mapped_column
+from model import Base
+
+class QuestionBankVersion(Base):
+    """
+    Versión del banco de preguntas compartida por todos los procesos (una
+    sola fila, id=1). Cualquier escritura a `questions`/`options` hecha con
+    la ORM la incrementa en la misma transacción (ver
+    `controller/question_bank.py`); cada proceso la compara con la de su
+    copia en memoria para saber si debe recargarla. Quien escriba esas
+    tablas con SQL directo debe llamar a `mark_questions_changed`.
+    """
+    __tablename__ = 'question_bank_version'
+    __table_args__ = {'extend_existing':True}
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    version: Mapped[int] = mapped_column(default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<QuestionBankVersion(version={self.version})>"
@@ -1,12 +1,17 @@
 import datetime
 from typing import List, Optional
-from sqlalchemy import Column, Integer, String, Boolean, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, Float, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from model import Base
 
 class TestAttempt(Base):
     __tablename__ = 'test_attempts'
-    __table_args__ = {'extend_existing':True}
+    __table_args__ = (
+        # Cubre los filtros por usuario + tipo ordenados por fecha
+        # (dashboard, conteo de intentos, detalle de usuario).
+        Index('ix_test_attempts_user_type_start', 'user_id', 'test_type', 'start_time'),
+        {'extend_existing':True}
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey('users.id'), nullable=False)
@@ -1,17 +1,36 @@
 import datetime
 from typing import List, Optional
-from sqlalchemy import Column, Integer, String, Boolean, Float, DateTime, LargeBinary, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, Float, DateTime, LargeBinary, ForeignKey, Index, Double
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from model import Base
 
 class User(Base):
     __tablename__ = 'users'
-    __table_args__ = {'extend_existing':True}
+    __table_args__ = (
+        # Índices (columna, id) para ordenar y paginar por llave la tabla
+        # de usuarios del panel de admin.
+        Index('ix_users_practice_attempts', 'practice_attempts', 'id'),
+        Index('ix_users_final_attempts', 'final_attempts', 'id'),
+        Index('ix_users_avg_practice_score', 'avg_practice_score', 'id'),
+        Index('ix_users_last_final_level', 'last_final_level', 'id'),
+        {'extend_existing':True}
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True)
     username: Mapped[str] = mapped_column(String(100), unique=True, nullable=False)
     password_hash: Mapped[bytes] = mapped_column(LargeBinary(200), nullable=False)
     
+    # Resumen para la tabla del admin, con el mismo criterio que tenía la
+    # tabla original: los conteos incluyen los intentos iniciados (terminados
+    # o no), el promedio solo las prácticas terminadas, y el nivel es el del
+    # último examen final (N/A mientras no termina). Lo mantiene
+    # TestController al crear y al terminar cada intento (se reconstruye con backfill_stats.py).
+    practice_attempts: Mapped[int] = mapped_column(default=0, nullable=False)
+    final_attempts: Mapped[int] = mapped_column(default=0, nullable=False)
+    # DOUBLE: el valor se usa como llave de paginación y debe ir y volver sin redondeo
+    avg_practice_score: Mapped[float] = mapped_column(Double, default=0.0, nullable=False)
+    last_final_level: Mapped[str] = mapped_column(String(50), default="N/A", nullable=False)
+    
     # Relación: Si se borra un usuario, sus intentos NO se borran por defecto.
     # Esto es generalmente más seguro.
     attempts: Mapped[List["TestAttempt"]] = relationship(back_populates="user")
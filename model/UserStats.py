@@ -0,0 +1,58 @@
+import datetime
+from typing import Optional
+from sqlalchemy import String, JSON, ForeignKey
+from sqlalchemy.orm import relationship, Mapped, mapped_column
+from model import Base
+
+class UserStats(Base):
+    """
+    Resumen materializado de los intentos de un usuario por tipo de examen.
+    Lo mantiene `TestController.finish_test` en la misma transacción que el
+    resultado del intento. La migración 5 lo construye a partir del
+    historial existente, y se puede reconstruir con `backfill_stats.py`.
+    """
+    __tablename__ = 'user_stats'
+    __table_args__ = {'extend_existing':True}
+    
+    user_id: Mapped[int] = mapped_column(ForeignKey('users.id'), primary_key=True)
+    test_type: Mapped[str] = mapped_column(String(20), primary_key=True)
+    
+    attempts_count: Mapped[int] = mapped_column(default=0, nullable=False)
+    score_sum: Mapped[float] = mapped_column(default=0.0, nullable=False)
+    avg_score: Mapped[float] = mapped_column(default=0.0, nullable=False)
+    high_score: Mapped[float] = mapped_column(default=0.0, nullable=False)
+    last_level: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
+    last_attempt_time: Mapped[Optional[datetime.datetime]] = mapped_column(nullable=True)
+    
+    # Puntajes en orden cronológico (para la gráfica del dashboard)
+    scores_over_time: Mapped[list] = mapped_column(JSON, default=list, nullable=False)
+    # {nivel: {"correct": n, "total": m}}
+    level_performance: Mapped[dict] = mapped_column(JSON, default=dict, nullable=False)
+    
+    user: Mapped["User"] = relationship()
+
+    def record_attempt(self, score: float, level: str | None, level_scores: dict,
+                       attempt_time: datetime.datetime):
+        """Acumula un intento terminado en el resumen."""
+        self.attempts_count = (self.attempts_count or 0) + 1
+        self.score_sum = (self.score_sum or 0.0) + score
+        self.avg_score = self.score_sum / self.attempts_count
+        self.high_score = max(self.high_score or 0.0, score)
+        if level:
+            self.last_level = level
+        self.last_attempt_time = attempt_time
+        
+        # Asignamos objetos nuevos (en lugar de mutar los existentes)
+        # para que SQLAlchemy detecte el cambio en las columnas JSON.
+        self.scores_over_time = [*(self.scores_over_time or []), score]
+        performance = {lvl: dict(data) for lvl, data in (self.level_performance or {}).items()}
+        for lvl, data in level_scores.items():
+            if not data["total"]:
+                continue # Igual que el backfill: sin preguntas no hay fila
+            current = performance.setdefault(lvl, {"correct": 0, "total": 0})
+            current["correct"] += data["correct"]
+            current["total"] += data["total"]
+        self.level_performance = performance
+
+    def __repr__(self):
+        return f"<UserStats(user_id={self.user_id}, type='{self.test_type}', attempts={self.attempts_count})>"
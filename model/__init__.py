@@ -1,19 +1,44 @@
 from .Base import Base
 from .Base import engine
 from .Base import SessionLocal
+from .Base import session_scope
+from .Base import engine_options
+from .Base import read_engine
+from .Base import ReadSessionLocal
+from .Base import record_write, wrote_recently
 from .User import User
 from .Question import Question
 from .Option import Option
 from .TestAttempt import TestAttempt
 from .AttemptAnswer import AttemptAnswer
+from .UserStats import UserStats
+from .LevelStats import LevelStats
+from .ExamSession import ExamSession
+from .QuestionBankVersion import QuestionBankVersion
+from .migrations import SchemaVersion, upgrade_schema
+from .instrumentation import QueryProfiler, profile_queries
 
 __all__ = [
     "Base",
     "engine",
     "SessionLocal",
+    "session_scope",
+    "engine_options",
+    "read_engine",
+    "ReadSessionLocal",
+    "record_write",
+    "wrote_recently",
     "User",
     "Question",
     "Option",
     "TestAttempt",
-    "AttemptAnswer"
+    "AttemptAnswer",
+    "UserStats",
+    "LevelStats",
+    "ExamSession",
+    "QuestionBankVersion",
+    "SchemaVersion",
+    "upgrade_schema",
+    "QueryProfiler",
+    "profile_queries"
 ]
\ No newline at end of file
@@ -0,0 +1,77 @@
+"""
+Engine y sesiones asíncronas (`AsyncSession`) para los controladores asíncronos.
+
+Es opcional: necesita `greenlet` y un driver asíncrono (`aiomysql` para
+MySQL, `aiosqlite` para SQLite). Por eso no se importa desde `model`.
+"""
+from contextlib import asynccontextmanager
+from sqlalchemy.engine import make_url, URL
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from constants import DATABASE_URL, DATABASE_READ_URL
+from .Base import engine_options
+
+# Driver síncrono -> equivalente asíncrono
+ASYNC_DRIVERS = {
+    "mysql": "aiomysql",
+    "mysql+pymysql": "aiomysql",
+    "mysql+mysqldb": "aiomysql",
+    "sqlite": "aiosqlite",
+    "sqlite+pysqlite": "aiosqlite",
+}
+
+_default_factory: async_sessionmaker | None = None
+_default_read_factory: async_sessionmaker | None = None
+
+
+def async_url(url: str | URL) -> URL:
+    """Traduce una URL con driver síncrono a su driver asíncrono (p. ej. pymysql -> aiomysql)."""
+    url = make_url(url)
+    driver = ASYNC_DRIVERS.get(url.drivername)
+    if driver is None:
+        return url # Ya es asíncrona (o no la conocemos); se usa tal cual
+    return url.set(drivername=f"{url.get_backend_name()}+{driver}")
+
+
+def create_async_db_engine(url: str | URL = DATABASE_URL, **kwargs) -> AsyncEngine:
+    """Engine asíncrono con las mismas opciones de pool que el síncrono."""
+    options = engine_options(str(url))
+    options.update(kwargs)
+    return create_async_engine(async_url(url), **options)
+
+
+def create_async_session_factory(bind: AsyncEngine) -> async_sessionmaker:
+    # Misma configuración que `SessionLocal`
+    return async_sessionmaker(bind=bind, autoflush=False, expire_on_commit=False)
+
+
+def default_async_session_factory() -> async_sessionmaker:
+    """Fábrica sobre `DATABASE_URL`; el engine se crea la primera vez que se pide."""
+    global _default_factory
+    if _default_factory is None:
+        _default_factory = create_async_session_factory(create_async_db_engine())
+    return _default_factory
+
+
+def default_async_read_session_factory() -> async_sessionmaker:
+    """Fábrica sobre `DATABASE_READ_URL` (o la principal si no hay réplica)."""
+    global _default_read_factory
+    if _default_read_factory is None:
+        if DATABASE_READ_URL:
+            _default_read_factory = create_async_session_factory(create_async_db_engine(DATABASE_READ_URL))
+        else:
+            _default_read_factory = default_async_session_factory()
+    return _default_read_factory
+
+
+@asynccontextmanager
+async def async_session_scope(session_factory: async_sessionmaker | None = None):
+    """Equivalente asíncrono de `session_scope`: commit al salir, rollback si hay error."""
+    session: AsyncSession = (session_factory or default_async_session_factory())()
+    try:
+        yield session
+        await session.commit()
+    except Exception:
+        await session.rollback()
+        raise
+    finally:
+        await session.close()
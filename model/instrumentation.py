@@ -0,0 +1,175 @@
+import heapq
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from sqlalchemy import event
+from .Base import engine as default_engine
+
+# Una misma consulta repetida estas veces dentro de una sola llamada se marca como N+1
+N_PLUS_ONE_THRESHOLD = 5
+
+# Las consultas se atribuyen a los métodos de los controladores de lógica.
+# El orquestador y el pool de hilos no emiten SQL propio, así que se saltan.
+_CONTROLLER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "controller")
+_SKIPPED_FILES = {"app_controller.py", "workers.py"}
+_UNATTRIBUTED = "(fuera de los controladores)"
+
+_is_controller_file: dict[str, bool] = {}
+
+
+def _controller_frame(frame):
+    """Retorna el frame más externo de la pila que pertenece a un controlador."""
+    found = None
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        is_controller = _is_controller_file.get(filename)
+        if is_controller is None:
+            path = os.path.abspath(filename)
+            is_controller = (os.path.dirname(path) == _CONTROLLER_DIR
+                             and os.path.basename(path) not in _SKIPPED_FILES)
+            _is_controller_file[filename] = is_controller
+        if is_controller:
+            found = frame
+        frame = frame.f_back
+    return found
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return getattr(code, "co_qualname", code.co_name) # p. ej. "TestController.finish_test"
+
+
+class QueryProfiler:
+    """
+    Instrumentación opcional de SQL.
+
+    Se engancha a `before_cursor_execute`/`after_cursor_execute` de un engine
+    y atribuye cada sentencia al método de controlador que la originó (el
+    más externo de la pila, p. ej. `TestController.get_admin_dashboard_data`
+    aunque la consulta salga de un helper). Por cada método guarda llamadas,
+    consultas y tiempo total; además conserva las sentencias más lentas y
+    marca como sospechosas de N+1 las que se repiten idénticas dentro de
+    una sola llamada.
+    """
+
+    def __init__(self, n_plus_one_threshold: int = N_PLUS_ONE_THRESHOLD, keep_slowest: int = 10):
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.keep_slowest = keep_slowest
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._engines = []
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.callers: dict[str, dict] = {}
+            self.slowest: list[tuple[float, str, str]] = []
+            self.suspects: dict[tuple[str, str], int] = {}
+
+    # --- Enganche al engine ---
+    def attach(self, bind=default_engine):
+        event.listen(bind, "before_cursor_execute", self._before_execute)
+        event.listen(bind, "after_cursor_execute", self._after_execute)
+        self._engines.append(bind)
+        return self
+
+    def detach(self):
+        for bind in self._engines:
+            event.remove(bind, "before_cursor_execute", self._before_execute)
+            event.remove(bind, "after_cursor_execute", self._after_execute)
+        self._engines = []
+        self._local = threading.local() # Suelta los frames que quedaron referenciados
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("profiler_start", []).append(time.perf_counter())
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("profiler_start")
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+
+        frame = _controller_frame(sys._getframe(1))
+        caller = _frame_name(frame) if frame is not None else _UNATTRIBUTED
+
+        # Una "llamada" dura mientras el frame del controlador siga siendo el
+        # mismo objeto. Guardamos una referencia para que su id no se reutilice.
+        local = self._local
+        new_call = frame is None or getattr(local, "frame", None) is not frame
+        if new_call:
+            local.frame = frame
+            local.repeats = Counter()
+        repeats = local.repeats[statement] + 1
+        local.repeats[statement] = repeats
+
+        with self._lock:
+            stats = self.callers.setdefault(caller, {"calls": 0, "statements": 0, "total_time": 0.0})
+            stats["calls"] += new_call
+            stats["statements"] += 1
+            stats["total_time"] += elapsed
+
+            entry = (elapsed, caller, statement)
+            if len(self.slowest) < self.keep_slowest:
+                heapq.heappush(self.slowest, entry)
+            elif elapsed > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, entry)
+
+            if frame is not None and repeats >= self.n_plus_one_threshold:
+                key = (caller, statement)
+                self.suspects[key] = max(self.suspects.get(key, 0), repeats)
+
+    # --- Consultas sobre lo registrado ---
+    def count(self, caller: str | None = None) -> int:
+        """Número de sentencias registradas (de un método, o en total)."""
+        with self._lock:
+            if caller is not None:
+                return self.callers.get(caller, {}).get("statements", 0)
+            return sum(s["statements"] for s in self.callers.values())
+
+    def n_plus_one_suspects(self) -> list[tuple[str, str, int]]:
+        """[(método, sentencia, repeticiones en una llamada)], de más a menos repetida."""
+        with self._lock:
+            return sorted(((c, s, n) for (c, s), n in self.suspects.items()), key=lambda x: -x[2])
+
+    def report(self) -> str:
+        with self._lock:
+            callers = sorted(self.callers.items(), key=lambda item: -item[1]["total_time"])
+            slowest = sorted(self.slowest, reverse=True)
+        lines = ["Consultas SQL por método de controlador:"]
+        for caller, s in callers:
+            per_call = s["total_time"] / s["calls"] * 1000 if s["calls"] else 0.0
+            lines.append(f"  {caller:<45} llamadas={s['calls']:<5} consultas={s['statements']:<6} "
+                         f"total={s['total_time'] * 1000:9.2f} ms  por llamada={per_call:8.2f} ms")
+        lines.append("Consultas más lentas:")
+        for elapsed, caller, statement in slowest:
+            lines.append(f"  {elapsed * 1000:9.2f} ms  {caller}: {_shorten(statement)}")
+        suspects = self.n_plus_one_suspects()
+        if suspects:
+            lines.append("Posibles N+1 (la misma consulta repetida dentro de una llamada):")
+            for caller, statement, repeats in suspects:
+                lines.append(f"  {caller} x{repeats}: {_shorten(statement)}")
+        return "\n".join(lines)
+
+
+def _shorten(statement: str, width: int = 120) -> str:
+    flat = " ".join(statement.split())
+    return flat if len(flat) <= width else flat[:width - 3] + "..."
+
+
+@contextmanager
+def profile_queries(bind=default_engine, **kwargs):
+    """
+    Perfila las consultas emitidas dentro del bloque `with`:
+
+        with profile_queries(engine) as profiler:
+            controller.get_admin_dashboard_data()
+        assert not profiler.n_plus_one_suspects()
+    """
+    profiler = QueryProfiler(**kwargs).attach(bind)
+    try:
+        yield profiler
+    finally:
+        profiler.detach()
@@ -0,0 +1,194 @@
+import datetime
+from sqlalchemy import String, select, update, inspect, text, func
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Mapped, Session, mapped_column
+from model import Base, engine as default_engine
+from model import User, Question, Option, TestAttempt, AttemptAnswer, ExamSession, UserStats, LevelStats
+from model import QuestionBankVersion
+
+# Filas por UPDATE al rellenar columnas nuevas en tablas grandes
+BACKFILL_CHUNK_SIZE = 50000
+
+
+class SchemaVersion(Base):
+    """Registro de las migraciones aplicadas a la BD."""
+    __tablename__ = 'schema_version'
+    __table_args__ = {'extend_existing':True}
+    
+    version: Mapped[int] = mapped_column(primary_key=True)
+    description: Mapped[str] = mapped_column(String(255), nullable=False)
+    applied_at: Mapped[datetime.datetime] = mapped_column(default=datetime.datetime.utcnow)
+
+
+# --- Registro de migraciones ---
+# `Base.metadata.create_all` solo crea tablas que no existen; no puede agregar
+# columnas ni índices a una BD en producción. Cada migración hace ese trabajo y
+# debe ser idempotente: en una BD nueva (creada con create_all) simplemente no
+# encuentra nada que cambiar.
+
+MIGRATIONS: list[tuple[int, str, callable]] = []
+
+
+def migration(version: int, description: str):
+    """Decorador que registra una función `fn(conn)` como migración."""
+    def decorator(fn):
+        MIGRATIONS.append((version, description, fn))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return fn
+    return decorator
+
+
+def _column_names(conn: Connection, table: str) -> set[str]:
+    return {col["name"] for col in inspect(conn).get_columns(table)}
+
+
+def _add_column(conn: Connection, table: str, name: str, ddl: str):
+    """Agrega una columna si no existe (`ddl` es el tipo y sus restricciones)."""
+    if name not in _column_names(conn, table):
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+
+
+def _create_index(conn: Connection, index):
+    """Crea un índice declarado en los modelos si la tabla aún no lo tiene."""
+    existing = {ix["name"] for ix in inspect(conn).get_indexes(index.table.name)}
+    if index.name not in existing:
+        index.create(bind=conn)
+
+
+def _model_index(table, name: str):
+    return next(ix for ix in table.indexes if ix.name == name)
+
+
+def _chunked_ranges(conn: Connection, id_column):
+    """Recorre los ids de una tabla en rangos de BACKFILL_CHUNK_SIZE."""
+    low, high = conn.execute(select(func.min(id_column), func.max(id_column))).one()
+    if low is None:
+        return
+    while low <= high:
+        yield low, low + BACKFILL_CHUNK_SIZE - 1
+        low += BACKFILL_CHUNK_SIZE
+
+
+@migration(1, "attempt_answers: columnas desnormalizadas is_correct y question_level")
+def _denormalize_answer_columns(conn: Connection):
+    _add_column(conn, "attempt_answers", "is_correct", "BOOLEAN NOT NULL DEFAULT 0")
+    _add_column(conn, "attempt_answers", "question_level", "VARCHAR(50)")
+
+    # Rellenar las filas existentes desde Option/Question, por rangos de id
+    answers = AttemptAnswer.__table__
+    is_correct = select(Option.is_correct).where(
+        Option.id == answers.c.selected_option_id
+    ).scalar_subquery()
+    level = select(Question.level).where(
+        Question.id == answers.c.question_id
+    ).scalar_subquery()
+
+    for low, high in _chunked_ranges(conn, answers.c.id):
+        conn.execute(
+            update(answers)
+            .where(answers.c.id.between(low, high))
+            .values(is_correct=func.coalesce(is_correct, False), question_level=level)
+        )
+
+
+@migration(2, "Índices para las consultas frecuentes de los controladores")
+def _add_hot_path_indexes(conn: Connection):
+    # Respuestas de un intento (selectinload de TestAttempt.answers, detalle de usuario)
+    _create_index(conn, _model_index(AttemptAnswer.__table__, "ix_attempt_answers_test_attempt_id"))
+    # Intentos por usuario y tipo en orden cronológico (conteos, dashboards)
+    _create_index(conn, _model_index(TestAttempt.__table__, "ix_test_attempts_user_type_start"))
+    # Opciones de una pregunta (selectinload de Question.options al cargar el banco)
+    _create_index(conn, _model_index(Option.__table__, "ix_options_question_id"))
+
+
+@migration(3, "users: resumen ordenable para la tabla paginada del panel de admin")
+def _add_user_summary_columns(conn: Connection):
+    _add_column(conn, "users", "practice_attempts", "INTEGER NOT NULL DEFAULT 0")
+    _add_column(conn, "users", "final_attempts", "INTEGER NOT NULL DEFAULT 0")
+    _add_column(conn, "users", "avg_practice_score", "DOUBLE PRECISION NOT NULL DEFAULT 0")
+    _add_column(conn, "users", "last_final_level", "VARCHAR(50) NOT NULL DEFAULT 'N/A'")
+
+    from backfill_stats import backfill_user_summaries
+    with Session(bind=conn) as session:
+        backfill_user_summaries(session)
+
+    users = User.__table__
+    for name in ("ix_users_practice_attempts", "ix_users_final_attempts",
+                 "ix_users_avg_practice_score", "ix_users_last_final_level"):
+        _create_index(conn, _model_index(users, name))
+
+
+@migration(4, "exam_sessions: estado de los exámenes del servicio HTTP")
+def _create_exam_sessions(conn: Connection):
+    ExamSession.__table__.create(bind=conn, checkfirst=True)
+
+
+@migration(5, "user_stats: construir el resumen a partir del historial existente")
+def _build_user_stats(conn: Connection):
+    # Sin esto, el primer `finish_test` tras actualizar crearía una fila con
+    # un solo intento que el dashboard tomaría como el historial completo.
+    from backfill_stats import backfill_user_stats # Script de la raíz; importa `model`
+    UserStats.__table__.create(bind=conn, checkfirst=True)
+    with Session(bind=conn) as session:
+        backfill_user_stats(session)
+
+
+@migration(6, "level_stats: una fila por nivel con los contadores del historial")
+def _build_level_stats(conn: Connection):
+    # Sin filas, el UPDATE de cada lote de respuestas no afecta nada y el
+    # dashboard de admin se queda siempre en la consulta agregada.
+    from backfill_stats import backfill_level_stats
+    LevelStats.__table__.create(bind=conn, checkfirst=True)
+    with Session(bind=conn) as session:
+        backfill_level_stats(session)
+
+
+@migration(7, "question_bank_version: versión del banco compartida entre procesos")
+def _create_question_bank_version(conn: Connection):
+    table = QuestionBankVersion.__table__
+    table.create(bind=conn, checkfirst=True)
+    if conn.execute(select(table.c.id).where(table.c.id == 1)).first() is None:
+        conn.execute(table.insert().values(id=1, version=0))
+
+
+@migration(8, "exam_sessions: versión del estado para rechazar peticiones repetidas")
+def _add_exam_session_state_version(conn: Connection):
+    _add_column(conn, "exam_sessions", "state_version", "INTEGER NOT NULL DEFAULT 0")
+
+
+@migration(9, "users: el resumen del admin vuelve a contar los intentos iniciados")
+def _refill_user_summaries(conn: Connection):
+    # Las BD que aplicaron la migración 3 antes de este cambio solo contaban
+    # los intentos terminados
+    from backfill_stats import backfill_user_summaries
+    with Session(bind=conn) as session:
+        backfill_user_summaries(session)
+
+
+def current_version(conn: Connection) -> int:
+    SchemaVersion.__table__.create(bind=conn, checkfirst=True)
+    return conn.execute(select(func.max(SchemaVersion.version))).scalar() or 0
+
+
+def upgrade_schema(bind: Engine = default_engine) -> list[int]:
+    """
+    Aplica en orden las migraciones pendientes, cada una en su propia
+    transacción. Retorna las versiones aplicadas.
+    """
+    applied = []
+    with bind.begin() as conn:
+        version = current_version(conn)
+
+    for number, description, fn in MIGRATIONS:
+        if number <= version:
+            continue
+        print(f"Aplicando migración {number}: {description}...")
+        with bind.begin() as conn:
+            fn(conn)
+            conn.execute(SchemaVersion.__table__.insert().values(
+                version=number, description=description,
+                applied_at=datetime.datetime.utcnow()
+            ))
+        applied.append(number)
+    return applied
+
@@ -1,7 +1,7 @@
 from model import engine, Base, SessionLocal
-from model import Question, Option, User
+from model import Question, Option, User, upgrade_schema
 from sqlalchemy.exc import IntegrityError
-import bcrypt
+from controller.security import hash_password
 
 # -------------------------------------------------------------------
 # DATOS DE LAS PREGUNTAS
@@ -430,9 +430,10 @@ questions_data = {
 
 
 def create_tables():
-    """Crea todas las tablas en la base de datos."""
+    """Crea todas las tablas en la base de datos y aplica las migraciones pendientes."""
     print("Creando tablas en la base de datos...")
     Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
     print("Tablas creadas exitosamente.")
 
 def populate_questions():
@@ -505,8 +506,7 @@ def create_admin_user():
         print("Creando usuario 'admin'...")
         # Hasheamos la contraseña 'admin123'
         password = 'admin123'
-        salt = bcrypt.gensalt()
-        hashed_pw = bcrypt.hashpw(password.encode('utf-8'), salt)
+        hashed_pw = hash_password(password)
         
         new_admin = User(username='admin', password_hash=hashed_pw)
         db.add(new_admin)
@@ -1,18 +1,20 @@
 # populate_simulated_users.py
 
-import bcrypt
+import argparse
 import random
 import datetime
-from sqlalchemy import select
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from sqlalchemy import create_engine, select, insert, func
 from sqlalchemy.orm import selectinload, Session  # <-- (NUEVO) Importa Session
 from model import SessionLocal, engine, Base
 from model import User, Question, Option, TestAttempt, AttemptAnswer
-
-# --- Helper copiado de user_controller.py ---
-def hash_password(password: str) -> bytes:
-    """Genera un hash seguro para la contraseña."""
-    salt = bcrypt.gensalt()
-    return bcrypt.hashpw(password.encode('utf-8'), salt)
+from controller.exam_sampler import ExamSampler
+from constants import LEVELS, PRACTICE_QUESTION_COUNT, FINAL_EXAM_STRATA
+from backfill_stats import backfill_all
+from controller.security import hash_password
 
 # --- Helpers copiados de test_controller.py ---
 def _estimate_level_by_score(score: float) -> str:
@@ -47,36 +49,9 @@ def _calculate_simulated_level(level_performance: dict) -> str:
         return "Advanced"
     return "Advanced"
 
-def get_stratified_questions(all_questions: list) -> list:
-    """
-    Selecciona 40 preguntas usando muestreo estratificado.
-    """
-    strata = {
-        "Beginner": 5, "Elementary": 7, "Pre-intermediate": 8,
-        "Intermediate": 10, "Upper-intermediate": 5, "Advanced": 5,
-    }
-    
-    # Filtramos las preguntas por nivel en un diccionario
-    questions_by_level = {level: [] for level in strata}
-    for q in all_questions:
-        if q.level in questions_by_level:
-            questions_by_level[q.level].append(q)
-
-    final_exam_questions = []
-    for level, count in strata.items():
-        available = questions_by_level[level]
-        if len(available) < count:
-            selected = available
-        else:
-            selected = random.sample(available, count)
-        final_exam_questions.extend(selected)
-    
-    random.shuffle(final_exam_questions)
-    return final_exam_questions
-
 # --- Lógica Principal de Simulación ---
 
-def create_fake_attempt(user: User, test_type: str, all_questions: list, db: Session, skill: float):
+def create_fake_attempt(user: User, test_type: str, sampler: ExamSampler, db: Session, skill: float):
     """
     Crea un intento de examen falso completo, incluyendo respuestas
     y un puntaje final calculado.
@@ -86,9 +61,9 @@ def create_fake_attempt(user: User, test_type: str, all_questions: list, db: Ses
     
     # 1. Seleccionar preguntas para este intento
     if test_type == 'practice':
-        questions_for_this_attempt = random.sample(all_questions, 20)
+        questions_for_this_attempt = sampler.sample_practice(PRACTICE_QUESTION_COUNT)
     else: # 'final'
-        questions_for_this_attempt = get_stratified_questions(all_questions)
+        questions_for_this_attempt = sampler.sample_final()
 
     if not questions_for_this_attempt:
         print("      > Error: No se pudieron cargar preguntas.")
@@ -144,7 +119,9 @@ def create_fake_attempt(user: User, test_type: str, all_questions: list, db: Ses
             test_attempt=attempt,
             question_id=q.id,
             selected_option_id=selected_option_id,
-            time_taken_seconds=sim_time
+            time_taken_seconds=sim_time,
+            is_correct=is_correct and selected_option_id is not None,
+            question_level=q.level
         )
         answers_to_add.append(answer)
 
@@ -182,6 +159,7 @@ def run_simulation():
             return
 
         print(f"Se cargaron {len(all_questions)} preguntas.")
+        sampler = ExamSampler(all_questions)
 
         # 2. Definir los usuarios a simular
         # (username, "skill level" (probabilidad de acierto))
@@ -224,11 +202,17 @@ def run_simulation():
             
             print(f"  - Simulando {num_practice} intentos de práctica...")
             for _ in range(num_practice):
-                create_fake_attempt(user, 'practice', all_questions, db, skill)
+                create_fake_attempt(user, 'practice', sampler, db, skill)
                 
             print(f"  - Simulando {num_final} intentos finales...")
             for _ in range(num_final):
-                create_fake_attempt(user, 'final', all_questions, db, skill)
+                create_fake_attempt(user, 'final', sampler, db, skill)
+
+        # 4. Los intentos simulados no pasan por finish_test, así que
+        #    reconstruimos las tablas de resumen al final
+        print("\nActualizando resúmenes (user_stats, level_stats)...")
+        backfill_all(db)
+        db.commit()
 
         print("\n¡Simulación de datos completada!")
 
@@ -238,7 +222,347 @@ def run_simulation():
     finally:
         db.close()
 
+# --- Modo masivo (NumPy + inserts en lote) ---
+
+# Usuarios por unidad de `--scale` (scale=100 -> 100 000 usuarios)
+BULK_USERS_PER_SCALE = 1000
+# Usuarios que se generan (y se confirman) por lote
+BULK_USERS_PER_BATCH = 1000
+# Filas por INSERT
+BULK_CHUNK_SIZE = 10000
+# Máximo de intentos por usuario (5 de práctica + 2 finales); reserva de ids
+MAX_ATTEMPTS_PER_USER = 7
+# Fecha desde la que se cuentan hacia atrás los intentos simulados. Es fija
+# para que la misma semilla genere siempre los mismos datos.
+BULK_REFERENCE_DATE = datetime.datetime(2025, 1, 1)
+
+# Misma regla que `_calculate_simulated_level`, en orden: (nivel, fallos que lo fijan)
+_PLACEMENT_FAILURE_LIMITS = [2, 3, 3, 4, 2, 1]
+# Cortes de `_estimate_level_by_score`
+_SCORE_LEVEL_CUTS = [30, 50, 70, 85, 95]
+
+
+class BulkQuestionBank:
+    """
+    El banco de preguntas en arreglos de NumPy, para simular miles de
+    intentos a la vez. Las preguntas se manejan por índice (0..n-1).
+    """
+
+    def __init__(self, questions: list[Question]):
+        level_index = {level: i for i, level in enumerate(LEVELS)}
+        n = len(questions)
+        max_wrong = max((sum(not opt.is_correct for opt in q.options) for q in questions), default=0)
+
+        self.ids = np.array([q.id for q in questions], dtype=np.int64)
+        self.levels = np.array([level_index.get(q.level, -1) for q in questions], dtype=np.int64)
+        self.correct_option = np.full(n, -1, dtype=np.int64)
+        self.wrong_options = np.full((n, max(max_wrong, 1)), -1, dtype=np.int64)
+        self.wrong_count = np.zeros(n, dtype=np.int64)
+        for i, q in enumerate(questions):
+            for opt in q.options:
+                if opt.is_correct:
+                    self.correct_option[i] = opt.id
+                else:
+                    self.wrong_options[i, self.wrong_count[i]] = opt.id
+                    self.wrong_count[i] += 1
+        self.by_level = [np.flatnonzero(self.levels == i) for i in range(len(LEVELS))]
+
+    def _sample_rows(self, rng: np.random.Generator, pool: np.ndarray, n: int, k: int) -> np.ndarray:
+        # `k` índices distintos por fila: los k menores de una matriz aleatoria
+        k = min(k, len(pool))
+        if k == 0:
+            return np.empty((n, 0), dtype=np.int64)
+        return pool[rng.random((n, len(pool))).argpartition(k - 1, axis=1)[:, :k]]
+
+    def sample_practice(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        """Matriz (n, 20) de índices de preguntas, al azar sin repetir."""
+        return self._sample_rows(rng, np.arange(len(self.ids)), n, PRACTICE_QUESTION_COUNT)
+
+    def sample_final(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        """Matriz (n, tamaño del final) de índices, estratificada por nivel y barajada."""
+        blocks = [
+            self._sample_rows(rng, self.by_level[LEVELS.index(level)], n, count)
+            for level, count in FINAL_EXAM_STRATA.items()
+        ]
+        return rng.permuted(np.hstack(blocks), axis=1)
+
+
+def _simulate_attempts(bank: BulkQuestionBank, rng: np.random.Generator, test_type: str,
+                       skill: np.ndarray) -> dict:
+    """
+    Simula `len(skill)` intentos de un tipo de una sola vez.
+    Retorna arreglos con las preguntas, opciones elegidas, tiempos,
+    aciertos, puntajes y niveles asignados.
+    """
+    n = len(skill)
+    if test_type == 'practice':
+        questions = bank.sample_practice(rng, n)
+    else:
+        questions = bank.sample_final(rng, n)
+
+    # 1. Acierto según la habilidad del usuario; si falla, una opción incorrecta al azar
+    correct_option = bank.correct_option[questions]
+    is_correct = (rng.random(questions.shape) < skill[:, None]) & (correct_option >= 0)
+    wrong_pick = (rng.random(questions.shape) * bank.wrong_count[questions]).astype(np.int64)
+    selected = np.where(is_correct, correct_option, bank.wrong_options[questions, wrong_pick])
+    times = rng.integers(5, 60, questions.shape)
+
+    # 2. Puntaje y nivel (las mismas reglas que el modo normal)
+    correct_count = is_correct.sum(axis=1)
+    if test_type == 'practice':
+        scores = correct_count * 5.0
+        levels = np.digitize(scores, _SCORE_LEVEL_CUTS)
+    else:
+        scores = correct_count * 2.5
+        question_levels = bank.levels[questions]
+        failures = np.stack([
+            ((question_levels == i) & ~is_correct).sum(axis=1) for i in range(len(LEVELS))
+        ], axis=1)
+        hit = failures >= np.array(_PLACEMENT_FAILURE_LIMITS)
+        levels = np.where(hit.any(axis=1), hit.argmax(axis=1), len(LEVELS) - 1)
+
+    return {
+        "questions": questions,
+        "selected": selected,
+        "times": times,
+        "is_correct": is_correct,
+        "scores": scores,
+        "levels": levels,
+    }
+
+
+def _insert_chunks(db: Session, model, rows: list[dict], chunk_size: int):
+    for i in range(0, len(rows), chunk_size):
+        db.execute(insert(model), rows[i:i + chunk_size])
+
+
+def generate_bulk_users(db: Session, bank: BulkQuestionBank, rng: np.random.Generator,
+                        first_user_id: int, n_users: int, first_attempt_id: int,
+                        password_hash: bytes, chunk_size: int = BULK_CHUNK_SIZE,
+                        now: datetime.datetime = BULK_REFERENCE_DATE) -> dict:
+    """
+    Genera `n_users` usuarios con ids desde `first_user_id` y su historial.
+    Los ids de intento se asignan en orden desde `first_attempt_id` (como
+    máximo MAX_ATTEMPTS_PER_USER por usuario). Las fechas se cuentan hacia
+    atrás desde `now`. Confirma cada lote de usuarios.
+    Retorna el número de filas escritas por tabla.
+    """
+    counts = {"users": 0, "attempts": 0, "answers": 0}
+    next_attempt_id = first_attempt_id
+
+    for batch_start in range(0, n_users, BULK_USERS_PER_BATCH):
+        batch_size = min(BULK_USERS_PER_BATCH, n_users - batch_start)
+        user_ids = np.arange(first_user_id + batch_start, first_user_id + batch_start + batch_size)
+        skill = rng.uniform(0.3, 0.9, batch_size)
+        attempts_per_type = {
+            'practice': rng.integers(1, 6, batch_size), # 1 a 5 intentos de práctica
+            'final': rng.integers(0, 3, batch_size),    # 0 a 2 intentos finales
+        }
+
+        users = [
+            {"id": user_id, "username": f"sim_user_{user_id}", "password_hash": password_hash}
+            for user_id in user_ids.tolist()
+        ]
+        attempts, answers = [], []
+
+        for test_type, per_user in attempts_per_type.items():
+            owner = np.repeat(np.arange(batch_size), per_user)
+            if len(owner) == 0:
+                continue
+            sim = _simulate_attempts(bank, rng, test_type, skill[owner])
+            attempt_ids = np.arange(next_attempt_id, next_attempt_id + len(owner))
+            next_attempt_id += len(owner)
+            days_ago = rng.integers(0, 31, len(owner)) # Últimos 30 días
+
+            for attempt_id, user_id, days, score, level in zip(
+                attempt_ids.tolist(), user_ids[owner].tolist(), days_ago.tolist(),
+                sim["scores"].tolist(), sim["levels"].tolist()
+            ):
+                attempts.append({
+                    "id": attempt_id,
+                    "user_id": user_id,
+                    "test_type": test_type,
+                    "start_time": now - datetime.timedelta(days=days),
+                    "score_percentage": score,
+                    "assigned_level": LEVELS[level],
+                })
+
+            questions = sim["questions"]
+            level_names = np.array(LEVELS, dtype=object)[bank.levels[questions]]
+            selected = sim["selected"]
+            for attempt_id, q_id, opt_id, seconds, correct, q_level in zip(
+                np.repeat(attempt_ids, questions.shape[1]).tolist(),
+                bank.ids[questions].ravel().tolist(),
+                selected.ravel().tolist(),
+                sim["times"].ravel().tolist(),
+                sim["is_correct"].ravel().tolist(),
+                level_names.ravel().tolist()
+            ):
+                answers.append({
+                    "test_attempt_id": attempt_id,
+                    "question_id": q_id,
+                    "selected_option_id": opt_id if opt_id >= 0 else None,
+                    "time_taken_seconds": seconds,
+                    "is_correct": correct,
+                    "question_level": q_level,
+                })
+
+        _insert_chunks(db, User, users, chunk_size)
+        _insert_chunks(db, TestAttempt, attempts, chunk_size)
+        _insert_chunks(db, AttemptAnswer, answers, chunk_size)
+        db.commit()
+
+        counts["users"] += len(users)
+        counts["attempts"] += len(attempts)
+        counts["answers"] += len(answers)
+
+    return counts
+
+
+def load_bulk_bank(db: Session) -> BulkQuestionBank | None:
+    stmt = select(Question).options(selectinload(Question.options)).order_by(Question.id)
+    questions = db.execute(stmt).scalars().all()
+    return BulkQuestionBank(questions) if questions else None
+
+
+def _run_bulk_shard(task: dict) -> dict:
+    """
+    Genera un shard del modo masivo. Corre en su propio proceso, así que
+    crea su propio engine y sesión en lugar de heredar los del padre.
+    """
+    # SQLite serializa las escrituras: los shards esperan su turno en lugar de fallar
+    connect_args = {"timeout": 300} if task["url"].startswith("sqlite") else {}
+    shard_engine = create_engine(task["url"], connect_args=connect_args)
+    try:
+        with Session(bind=shard_engine) as db:
+            bank = load_bulk_bank(db)
+            rng = np.random.default_rng(task["seed"])
+            return generate_bulk_users(
+                db, bank, rng, task["first_user_id"], task["n_users"], task["first_attempt_id"],
+                task["password_hash"], task["chunk_size"], task["now"]
+            )
+    except Exception as e:
+        # Las excepciones de la BD llevan los parámetros del INSERT y no
+        # siempre se pueden enviar al proceso padre; mandamos solo el mensaje
+        raise RuntimeError(f"Shard {task['shard']}: {e}") from None
+    finally:
+        shard_engine.dispose()
+
+
+def plan_bulk_shards(n_users: int, shards: int, first_user_id: int, first_attempt_id: int,
+                     seed: np.random.SeedSequence) -> list[dict]:
+    """
+    Reparte los usuarios en `shards` rangos contiguos de ids. Cada shard
+    recibe su propia semilla (derivada de `seed`) y un rango de ids de
+    intento reservado, así que el resultado depende solo de la semilla y
+    del número de shards, no del orden en que terminen los procesos.
+    """
+    tasks = []
+    start = 0
+    for shard, shard_seed in enumerate(seed.spawn(shards)):
+        size = n_users // shards + (1 if shard < n_users % shards else 0)
+        tasks.append({
+            "shard": shard,
+            "seed": shard_seed,
+            "first_user_id": first_user_id + start,
+            "n_users": size,
+            "first_attempt_id": first_attempt_id + start * MAX_ATTEMPTS_PER_USER,
+        })
+        start += size
+    return tasks
+
+
+def run_bulk_simulation(scale: float = 1.0, seed: int | None = None, chunk_size: int = BULK_CHUNK_SIZE,
+                        workers: int = 1, shards: int | None = None,
+                        reference_date: datetime.datetime = BULK_REFERENCE_DATE):
+    """
+    Modo masivo: genera BULK_USERS_PER_SCALE * `scale` usuarios con su
+    historial, sorteando aciertos, opciones y tiempos en lotes de NumPy y
+    escribiendo con inserts de Core. Reporta filas/seg.
+
+    El trabajo se reparte en `shards` (por defecto, uno por worker) que
+    se ejecutan en un pool de `workers` procesos. Las fechas de los
+    intentos se cuentan hacia atrás desde `reference_date`.
+    """
+    shards = shards or workers
+    db = SessionLocal()
+    try:
+        # 1. Verificar que haya banco de preguntas
+        if not db.execute(select(func.count(Question.id))).scalar():
+            print("La base de datos no tiene preguntas. Corre 'python populate_db.py' primero.")
+            return
+
+        # 2. Rango de ids libre (los ids se asignan aquí, no en la BD)
+        n_users = max(1, round(BULK_USERS_PER_SCALE * scale))
+        first_user_id = (db.execute(select(func.max(User.id))).scalar() or 0) + 1
+        first_attempt_id = (db.execute(select(func.max(TestAttempt.id))).scalar() or 0) + 1
+        seed_seq = np.random.SeedSequence(seed)
+        print(f"Generando {n_users} usuarios simulados (contraseña 'pass123') "
+              f"en {shards} shards con {workers} procesos; semilla {seed_seq.entropy}...")
+
+        common = {
+            "url": db.get_bind().url.render_as_string(hide_password=False),
+            "password_hash": hash_password("pass123"),
+            "chunk_size": chunk_size,
+            "now": reference_date,
+        }
+        tasks = [
+            {**common, **task}
+            for task in plan_bulk_shards(n_users, shards, first_user_id, first_attempt_id, seed_seq)
+        ]
+        db.close() # Los shards escriben con sus propias conexiones
+
+        # 3. Generar y escribir
+        start = time.perf_counter()
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+                results = list(pool.map(_run_bulk_shard, tasks))
+        else:
+            results = [_run_bulk_shard(task) for task in tasks]
+        elapsed = time.perf_counter() - start
+        counts = {key: sum(r[key] for r in results) for key in ("users", "attempts", "answers")}
+        _report_rows(counts, elapsed)
+
+        # 4. Resúmenes
+        print("Actualizando resúmenes (user_stats, level_stats)...")
+        start = time.perf_counter()
+        backfill_all(db)
+        db.commit()
+        print(f"Resúmenes listos en {time.perf_counter() - start:.1f} s.")
+
+    except Exception as e:
+        print(f"\nHa ocurrido un error: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+def _report_rows(counts: dict, elapsed: float):
+    total = sum(counts.values())
+    print(f"Escritas {counts['users']} filas de users, {counts['attempts']} de test_attempts "
+          f"y {counts['answers']} de attempt_answers en {elapsed:.1f} s "
+          f"({total / elapsed:,.0f} filas/seg).")
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera usuarios e historial de exámenes simulados.")
+    parser.add_argument("--bulk", action="store_true", help="modo masivo (NumPy + inserts en lote)")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help=f"en modo masivo, miles de usuarios a generar ({BULK_USERS_PER_SCALE} por unidad)")
+    parser.add_argument("--seed", type=int, default=None, help="semilla del modo masivo")
+    parser.add_argument("--chunk-size", type=int, default=BULK_CHUNK_SIZE, help="filas por INSERT")
+    parser.add_argument("--workers", type=int, default=1, help="procesos del modo masivo")
+    parser.add_argument("--shards", type=int, default=None,
+                        help="partes en que se divide el trabajo (por defecto, una por proceso)")
+    parser.add_argument("--reference-date", type=datetime.datetime.fromisoformat, default=BULK_REFERENCE_DATE,
+                        help=f"fecha ISO desde la que se cuentan hacia atrás los intentos del modo masivo "
+                             f"(por defecto {BULK_REFERENCE_DATE.date().isoformat()})")
+    args = parser.parse_args()
+
     # Asegúrate de que las tablas existan (no las crea, pero es buena práctica)
     Base.metadata.create_all(bind=engine, checkfirst=True) 
-    run_simulation()
\ No newline at end of file
+    if args.bulk:
+        run_bulk_simulation(args.scale, args.seed, args.chunk_size, args.workers, args.shards,
+                            args.reference_date)
+    else:
+        run_simulation()
\ No newline at end of file
@@ -0,0 +1,36 @@
+import os
+import sys
+import pytest
+
+# Los módulos del proyecto se importan desde la raíz (`model`, `controller`, ...),
+# igual que cuando se ejecutan los scripts; la raíz tiene __init__.py, así que
+# pytest no la agrega por sí solo.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def session_factory(monkeypatch):
+    """
+    BD SQLite temporal con el banco de preguntas y los contadores de
+    `level_stats` construidos. Vacía las cachés del proceso (banco de
+    preguntas, respuestas de intentos), que no saben de otras BD.
+    """
+    from controller import security
+    from controller.question_bank import question_bank
+    from controller.test_controller import attempt_answers_cache
+    from model import session_scope
+    from backfill_stats import backfill_all
+    from benchmarks.common import create_bench_engine, create_bench_session_factory, seed_question_bank
+
+    monkeypatch.setattr(security, "_rounds", 4) # bcrypt rápido; no calibrar en cada prueba
+    engine = create_bench_engine()
+    seed_question_bank(engine)
+    factory = create_bench_session_factory(engine)
+    with session_scope(factory) as session:
+        backfill_all(session)
+    question_bank.invalidate()
+    attempt_answers_cache.clear()
+    yield factory
+    question_bank.invalidate()
+    attempt_answers_cache.clear()
+    engine.dispose()
@@ -0,0 +1,42 @@
+"""
+El dashboard de admin y la tabla paginada de usuarios deben emitir el mismo
+número de sentencias SQL sin importar cuántos usuarios haya (sin N+1).
+"""
+import pytest
+from model import profile_queries
+from controller import test_controller # Importar la clase haría que pytest intente recolectarla
+from benchmarks.common import (
+    create_bench_engine, create_bench_session_factory, seed_question_bank, seed_history
+)
+
+BASE_USERS = 30
+
+
+def _statement_counts(users: int) -> dict[str, int]:
+    """Siembra `users` usuarios y cuenta las sentencias de cada método del admin."""
+    engine = create_bench_engine()
+    try:
+        seed_question_bank(engine)
+        seed_history(engine, users, attempts_per_user=2, answers_per_attempt=5)
+        controller = test_controller.TestController(create_bench_session_factory(engine))
+        with profile_queries(engine) as profiler:
+            controller.get_admin_dashboard_data()
+            controller.get_admin_user_page()
+        return {
+            caller: profiler.count(caller)
+            for caller in ("TestController.get_admin_dashboard_data", "TestController.get_admin_user_page")
+        }
+    finally:
+        engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def counts():
+    return _statement_counts(BASE_USERS), _statement_counts(BASE_USERS * 10)
+
+
+@pytest.mark.parametrize("caller", ["TestController.get_admin_dashboard_data", "TestController.get_admin_user_page"])
+def test_statement_count_does_not_grow_with_users(counts, caller):
+    small, large = counts
+    assert small[caller] > 0
+    assert large[caller] == small[caller]
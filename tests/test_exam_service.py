@@ -0,0 +1,89 @@
+"""
+El servicio de exámenes escribe las respuestas (o los resultados) y el estado
+del examen en la misma transacción, y no aplica dos veces una petición
+repetida del mismo cliente.
+"""
+import pytest
+from sqlalchemy import select, func
+from model import session_scope, AttemptAnswer, UserStats, User
+from controller import test_controller
+from controller.exam_service import ExamService, ServiceError
+
+
+@pytest.fixture
+def service(session_factory, monkeypatch):
+    monkeypatch.setattr(test_controller, "ANSWER_FLUSH_EVERY", 1) # Cada respuesta se escribe al momento
+    return ExamService(session_factory)
+
+
+@pytest.fixture
+def token(service):
+    service.register("ana", "pw")
+    return service.login("ana", "pw")["token"]
+
+
+def _count(factory, stmt) -> int:
+    with session_scope(factory) as session:
+        return session.execute(stmt).scalar()
+
+
+def _answers(factory) -> int:
+    return _count(factory, select(func.count(AttemptAnswer.id)))
+
+
+def _first_option(payload: dict) -> int:
+    return payload["question"]["options"][0]["id"]
+
+
+def test_answer_is_rolled_back_with_its_state(service, token, session_factory, monkeypatch):
+    first = service.start_test(token, "practice")
+
+    # El proceso cae después de escribir la respuesta y el estado, antes del commit
+    store_state = ExamService._store_state
+    def crash(self, *args):
+        store_state(self, *args)
+        raise RuntimeError("caída antes del commit")
+    with monkeypatch.context() as patch:
+        patch.setattr(ExamService, "_store_state", crash)
+        with pytest.raises(RuntimeError):
+            service.answer(token, _first_option(first), 5, number=1)
+    assert _answers(session_factory) == 0
+
+    # El cliente reintenta: la respuesta se guarda una sola vez
+    second = service.answer(token, _first_option(first), 5, number=1)
+    assert second["number"] == 2
+    assert _answers(session_factory) == 1
+
+
+def test_repeated_answer_is_rejected(service, token, session_factory):
+    first = service.start_test(token, "practice")
+    service.answer(token, _first_option(first), 5, number=1)
+    with pytest.raises(ServiceError) as error:
+        service.answer(token, _first_option(first), 5, number=1)
+    assert error.value.status == 409
+    assert _answers(session_factory) == 1
+
+
+def test_concurrent_request_with_stale_state_is_rejected(service, token, session_factory):
+    first = service.start_test(token, "practice")
+    with pytest.raises(ServiceError) as error:
+        with service._exam_transaction(token) as (session, stale, controller):
+            # Otra petición del mismo token termina mientras esta sigue abierta
+            service.answer(token, _first_option(first), 5, number=1)
+            controller.save_answer(_first_option(first), 5, session)
+            service._store_state(session, stale, controller)
+    assert error.value.status == 409
+    assert _answers(session_factory) == 1
+
+
+def test_finish_is_applied_once(service, token, session_factory):
+    payload = service.start_test(token, "practice")
+    while payload["question"] is not None:
+        payload = service.answer(token, _first_option(payload), 5, number=payload["number"])
+    results = service.finish(token)
+    assert results["total"] == 20
+    assert "error" in service.finish(token)
+
+    assert _count(session_factory, select(UserStats.attempts_count)) == 1
+    assert _count(session_factory, select(User.practice_attempts).where(User.username == "ana")) == 1
+    assert _answers(session_factory) == 20
@@ -0,0 +1,105 @@
+"""
+`export_state`/`load_state`: el servicio HTTP guarda el examen entre
+peticiones y lo retoma en otro controlador (o en otro proceso).
+"""
+import json
+import pytest
+from sqlalchemy import select, func, insert
+from model import session_scope, AttemptAnswer, Question, Option
+from controller import test_controller
+from controller.question_bank import question_bank, mark_questions_changed
+from controller.user_controller import UserController
+
+
+@pytest.fixture
+def user(session_factory):
+    return UserController(session_factory).register_user("ana", "pw")
+
+
+@pytest.fixture
+def controller(session_factory, user, monkeypatch):
+    monkeypatch.setattr(test_controller, "ANSWER_FLUSH_EVERY", 5)
+    controller = test_controller.TestController(session_factory)
+    controller.set_current_user(user)
+    return controller
+
+
+def _answer(controller, question, index: int):
+    """Correcta en las preguntas pares, incorrecta en las impares."""
+    option = next(opt for opt in question.options if opt.is_correct == (index % 2 == 0))
+    controller.save_answer(option.id, 10)
+
+
+def _resume(factory, user, state: dict):
+    controller = test_controller.TestController(factory)
+    controller.set_current_user(user)
+    controller.load_state(json.loads(json.dumps(state))) # Como lo guarda el servicio
+    return controller
+
+
+def test_state_round_trip_continues_the_exam(controller, session_factory, user):
+    question = controller.start_new_test('practice')
+    for index in range(7):
+        _answer(controller, question, index)
+        question = controller.get_next_question()
+    state = controller.export_state()
+    assert len(state["pending_answers"]) == 2 # 5 ya escritas en la BD
+
+    resumed = _resume(session_factory, user, state)
+    assert resumed.export_state() == state
+    assert resumed.get_current_question_number() == (8, 20)
+
+    # Se sigue en la pregunta 8 con las respuestas pendientes y los conteos intactos
+    question = resumed.question_list[resumed.current_question_index]
+    for index in range(7, 20):
+        _answer(resumed, question, index)
+        question = resumed.get_next_question()
+    assert question is None
+    results = resumed.finish_test()
+
+    assert (results["correct"], results["total"], results["score"]) == (10, 20, 50.0)
+    assert sum(s["total"] for s in results["level_scores"].values()) == 20
+    with session_scope(session_factory) as session:
+        answers = session.execute(
+            select(AttemptAnswer.question_id, func.sum(AttemptAnswer.is_correct))
+            .where(AttemptAnswer.test_attempt_id == state["attempt_id"])
+            .group_by(AttemptAnswer.question_id)
+        ).all()
+    assert len(answers) == 20 # Cada pregunta una sola vez
+    assert sum(correct for _, correct in answers) == 10
+
+
+def test_load_state_refreshes_the_bank(controller, session_factory, user):
+    controller.start_new_test('practice')
+    state = controller.export_state()
+
+    # Otro proceso agrega una pregunta con SQL directo y sube la versión del banco
+    with session_factory.kw["bind"].begin() as conn:
+        question_id = conn.execute(
+            insert(Question).values(text="nueva", level="Beginner").returning(Question.id)
+        ).scalar_one()
+        conn.execute(insert(Option), [
+            {"question_id": question_id, "text": "si", "is_correct": True},
+            {"question_id": question_id, "text": "no", "is_correct": False},
+        ])
+        mark_questions_changed(conn)
+
+    state["question_ids"][-1] = question_id
+    resumed = _resume(session_factory, user, state)
+    assert resumed.question_list[-1].id == question_id
+    assert [opt.text for opt in resumed.question_list[-1].options] == ["si", "no"]
+
+
+def test_load_state_rejects_deleted_questions(controller, session_factory, user):
+    controller.start_new_test('practice')
+    state = controller.export_state()
+    state["question_ids"][0] = 10 ** 9
+
+    with pytest.raises(ValueError):
+        _resume(session_factory, user, state)
+
+
+def test_load_state_none_clears_the_exam(controller):
+    controller.start_new_test('practice')
+    controller.load_state(None)
+    assert controller.export_state() is None
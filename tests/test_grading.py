@@ -0,0 +1,109 @@
+"""
+`save_answer` califica cada respuesta al vuelo y escribe las respuestas por
+lotes; `finish_test` debe dar el mismo resultado que recontar en la BD.
+"""
+import random
+import pytest
+from sqlalchemy import select, func
+import model # `model.TestAttempt`: importar la clase haría que pytest intente recolectarla
+from model import session_scope, AttemptAnswer, Option, Question
+from controller import test_controller
+from controller.user_controller import UserController
+
+
+@pytest.fixture
+def controller(session_factory):
+    user = UserController(session_factory).register_user("ana", "pw")
+    controller = test_controller.TestController(session_factory)
+    controller.set_current_user(user)
+    return controller
+
+
+def _saved_answers(factory, attempt_id: int) -> int:
+    with session_scope(factory) as session:
+        return session.execute(
+            select(func.count(AttemptAnswer.id)).where(AttemptAnswer.test_attempt_id == attempt_id)
+        ).scalar()
+
+
+def test_incremental_grading_matches_a_recount(controller, session_factory):
+    rng = random.Random(7)
+    question = controller.start_new_test('final')
+    attempt_id = controller.active_test.id
+    while question is not None:
+        controller.save_answer(rng.choice(question.options).id, rng.randint(5, 59))
+        question = controller.get_next_question()
+    results = controller.finish_test()
+
+    # Recuento desde la BD, con la opción elegida y el nivel de la pregunta
+    with session_scope(session_factory) as session:
+        rows = session.execute(
+            select(Question.level, Option.is_correct, AttemptAnswer.is_correct, AttemptAnswer.question_level)
+            .select_from(AttemptAnswer)
+            .join(Question, AttemptAnswer.question_id == Question.id)
+            .join(Option, AttemptAnswer.selected_option_id == Option.id)
+            .where(AttemptAnswer.test_attempt_id == attempt_id)
+        ).all()
+        score = session.get(model.TestAttempt, attempt_id).score_percentage
+
+    expected = {}
+    for level, option_correct, stored_correct, stored_level in rows:
+        assert stored_correct == option_correct
+        assert stored_level == level
+        counts = expected.setdefault(level, {"correct": 0, "total": 0})
+        counts["total"] += 1
+        counts["correct"] += int(option_correct)
+
+    assert len(rows) == results["total"] == 40
+    assert results["correct"] == sum(c["correct"] for c in expected.values())
+    assert {level: s for level, s in results["level_scores"].items() if s["total"]} == expected
+    assert score == results["score"] == results["correct"] * 2.5
+
+
+def test_answers_are_written_in_batches(controller, session_factory, monkeypatch):
+    monkeypatch.setattr(test_controller, "ANSWER_FLUSH_EVERY", 10)
+    question = controller.start_new_test('practice')
+    attempt_id = controller.active_test.id
+    for _ in range(9):
+        controller.save_answer(question.options[0].id, 5)
+        question = controller.get_next_question()
+    assert _saved_answers(session_factory, attempt_id) == 0
+    assert len(controller.pending_answers) == 9
+
+    controller.save_answer(question.options[0].id, 5)
+    assert _saved_answers(session_factory, attempt_id) == 10
+    assert controller.pending_answers == []
+
+
+def test_failed_flush_keeps_answers_buffered(controller, session_factory, monkeypatch):
+    monkeypatch.setattr(test_controller, "ANSWER_FLUSH_EVERY", 10)
+    flush = test_controller.TestController._flush_answers
+    calls = []
+    def fail_once(self, session):
+        calls.append(len(self.pending_answers))
+        if len(calls) == 1:
+            raise RuntimeError("BD no disponible")
+        flush(self, session)
+    monkeypatch.setattr(test_controller.TestController, "_flush_answers", fail_once)
+
+    question = controller.start_new_test('practice')
+    attempt_id = controller.active_test.id
+    while question is not None:
+        controller.save_answer(question.options[0].id, 5)
+        question = controller.get_next_question()
+    assert calls[:2] == [10, 11] # El lote que falló se reintenta con la siguiente respuesta
+    results = controller.finish_test()
+
+    assert results["total"] == 20
+    assert _saved_answers(session_factory, attempt_id) == 20
+
+
+def test_late_and_foreign_answers_count_as_unanswered(controller):
+    question = controller.start_new_test('practice')
+    correct = next(opt.id for opt in question.options if controller.option_is_correct[opt.id])
+    controller.save_answer(correct, 61) # Fuera de tiempo
+    other = controller.get_next_question()
+    controller.save_answer(correct, 5) # Opción de la pregunta anterior
+    assert other.id != question.id
+    assert controller.correct_count == 0
+    assert [answer[1] for answer in controller.pending_answers] == [None, None]
@@ -0,0 +1,105 @@
+"""
+`upgrade_schema` sobre una BD con el esquema original (antes de cualquier
+migración) y con historial: todas las migraciones se aplican, rellenan los
+datos derivados y una segunda ejecución no cambia nada.
+"""
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from model import Base, upgrade_schema
+from model.migrations import MIGRATIONS
+
+# Esquema de las tablas tal como existían antes de las migraciones
+BASELINE_DDL = [
+    "CREATE TABLE users (id INTEGER PRIMARY KEY, username VARCHAR(100) NOT NULL UNIQUE, "
+    "password_hash BLOB NOT NULL)",
+    "CREATE TABLE questions (id INTEGER PRIMARY KEY, text VARCHAR(1000) NOT NULL, "
+    "level VARCHAR(50) NOT NULL, image_path VARCHAR(255))",
+    "CREATE TABLE options (id INTEGER PRIMARY KEY, question_id INTEGER NOT NULL REFERENCES questions(id), "
+    "text VARCHAR(500) NOT NULL, is_correct BOOLEAN NOT NULL)",
+    "CREATE TABLE test_attempts (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL REFERENCES users(id), "
+    "test_type VARCHAR(20) NOT NULL, start_time DATETIME, score_percentage FLOAT, assigned_level VARCHAR(50))",
+    "CREATE TABLE attempt_answers (id INTEGER PRIMARY KEY, "
+    "test_attempt_id INTEGER NOT NULL REFERENCES test_attempts(id), question_id INTEGER REFERENCES questions(id), "
+    "selected_option_id INTEGER REFERENCES options(id), time_taken_seconds INTEGER)",
+]
+
+HISTORY = [
+    "INSERT INTO users VALUES (1, 'admin', x'00'), (2, 'ana', x'00'), (3, 'beto', x'00')",
+    "INSERT INTO questions VALUES (1, 'q1', 'Beginner', NULL), (2, 'q2', 'Advanced', NULL)",
+    "INSERT INTO options VALUES (1, 1, 'si', 1), (2, 1, 'no', 0), (3, 2, 'si', 1), (4, 2, 'no', 0)",
+    # ana: dos prácticas terminadas, una abandonada y un final
+    "INSERT INTO test_attempts VALUES "
+    "(1, 2, 'practice', '2024-01-01 10:00:00', 50.0, NULL), "
+    "(2, 2, 'practice', '2024-01-02 10:00:00', 100.0, NULL), "
+    "(3, 2, 'practice', '2024-01-03 10:00:00', NULL, NULL), "
+    "(4, 2, 'final', '2024-01-04 10:00:00', 50.0, 'Beginner')",
+    "INSERT INTO attempt_answers VALUES "
+    "(1, 1, 1, 1, 10), (2, 1, 2, 4, 10), (3, 2, 1, 1, 10), (4, 2, 2, 3, 10), "
+    "(5, 4, 1, 1, 10), (6, 4, 2, NULL, 60)",
+]
+
+
+def _snapshot(engine) -> dict:
+    tables = ("users", "attempt_answers", "user_stats", "level_stats", "question_bank_version", "exam_sessions")
+    with engine.connect() as conn:
+        return {table: conn.execute(text(f"SELECT * FROM {table} ORDER BY 1, 2")).all() for table in tables}
+
+
+@pytest.fixture
+def baseline_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'baseline.db'}")
+    with engine.begin() as conn:
+        for statement in BASELINE_DDL + HISTORY:
+            conn.execute(text(statement))
+    yield engine
+    engine.dispose()
+
+
+def test_upgrade_baseline_database(baseline_engine):
+    assert upgrade_schema(baseline_engine) == [number for number, _, _ in MIGRATIONS]
+
+    with baseline_engine.connect() as conn:
+        answers = conn.execute(text(
+            "SELECT id, is_correct, question_level FROM attempt_answers ORDER BY id"
+        )).all()
+        assert answers == [(1, 1, "Beginner"), (2, 0, "Advanced"), (3, 1, "Beginner"),
+                           (4, 1, "Advanced"), (5, 1, "Beginner"), (6, 0, "Advanced")]
+
+        users = conn.execute(text(
+            "SELECT username, practice_attempts, final_attempts, avg_practice_score, last_final_level "
+            "FROM users ORDER BY id"
+        )).all()
+        assert users == [("admin", 0, 0, 0.0, "N/A"), ("ana", 3, 1, 75.0, "Beginner"), ("beto", 0, 0, 0.0, "N/A")]
+
+        stats = conn.execute(text(
+            "SELECT user_id, test_type, attempts_count, avg_score, high_score, last_level "
+            "FROM user_stats ORDER BY test_type"
+        )).all()
+        assert stats == [(2, "final", 1, 50.0, 50.0, "Beginner"), (2, "practice", 2, 75.0, 100.0, None)]
+
+        levels = dict(conn.execute(text("SELECT level, total FROM level_stats")).all())
+        assert len(levels) == 6
+        assert (levels["Beginner"], levels["Advanced"], levels["Intermediate"]) == (3, 3, 0)
+
+        assert conn.execute(text("SELECT id, version FROM question_bank_version")).all() == [(1, 0)]
+
+    columns = {col["name"] for col in inspect(baseline_engine).get_columns("exam_sessions")}
+    assert "state_version" in columns
+
+
+def test_upgrade_is_a_noop_when_rerun(baseline_engine):
+    upgrade_schema(baseline_engine)
+    before = _snapshot(baseline_engine)
+
+    assert upgrade_schema(baseline_engine) == []
+    assert _snapshot(baseline_engine) == before
+
+
+def test_migrations_are_idempotent_on_a_new_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'new.db'}")
+    Base.metadata.create_all(bind=engine)
+
+    # Las tablas ya tienen todo; cada migración se registra sin encontrar nada que cambiar
+    assert upgrade_schema(engine) == [number for number, _, _ in MIGRATIONS]
+    assert upgrade_schema(engine) == []
+    engine.dispose()
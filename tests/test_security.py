@@ -0,0 +1,63 @@
+"""
+Costo de bcrypt: calibración por equipo y regeneración de hashes al hacer
+login, que solo sube el costo (nunca lo baja).
+"""
+import bcrypt
+import pytest
+from sqlalchemy import select
+from controller import security
+from controller.user_controller import UserController
+from model import session_scope, User
+
+
+def _hash(rounds: int) -> bytes:
+    return bcrypt.hashpw(b"pw", bcrypt.gensalt(rounds=rounds))
+
+
+@pytest.mark.parametrize("base_ms, expected", [
+    (5, 8),      # 5 ms a costo 4 -> 80 ms a costo 8; costo 9 pasaría de 100 ms
+    (500, 4),    # Equipo lento: nunca por debajo del mínimo
+    (0.001, 10), # Equipo muy rápido: tope en el máximo
+])
+def test_calibrate_rounds(monkeypatch, base_ms, expected):
+    monkeypatch.setattr(security, "_time_hash", lambda rounds: base_ms / 1000)
+    assert security.calibrate_rounds(target_ms=100, min_rounds=4, max_rounds=10) == expected
+
+
+@pytest.mark.parametrize("stored, expected", [
+    (_hash(4), True),   # Costo menor al vigente
+    (_hash(5), False),  # Igual
+    (_hash(6), False),  # Mayor (otro equipo calibró más alto): no se baja
+    (b"no-es-un-hash", True),
+])
+def test_needs_rehash(monkeypatch, stored, expected):
+    monkeypatch.setattr(security, "_rounds", 5)
+    assert security.needs_rehash(stored) is expected
+
+
+def _stored_rounds(factory, username: str) -> int:
+    with session_scope(factory) as session:
+        stored = session.execute(select(User.password_hash).filter_by(username=username)).scalar_one()
+    return security.hash_rounds(stored)
+
+
+def test_login_raises_a_lower_cost(session_factory, monkeypatch):
+    users = UserController(session_factory)
+    users.register_user("ana", "pw") # Costo 4 (fixture)
+
+    monkeypatch.setattr(security, "_rounds", 5)
+    user = users.login_user("ana", "pw")
+    assert isinstance(user, User)
+    assert _stored_rounds(session_factory, "ana") == 5
+    assert security.hash_rounds(user.password_hash) == 5
+    assert isinstance(users.login_user("ana", "pw"), User)
+
+
+def test_login_keeps_a_higher_cost(session_factory, monkeypatch):
+    users = UserController(session_factory)
+    monkeypatch.setattr(security, "_rounds", 5)
+    users.register_user("ana", "pw")
+
+    monkeypatch.setattr(security, "_rounds", 4)
+    assert isinstance(users.login_user("ana", "pw"), User)
+    assert _stored_rounds(session_factory, "ana") == 5
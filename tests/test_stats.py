@@ -0,0 +1,78 @@
+"""
+Los resúmenes que `finish_test` mantiene al vuelo (`user_stats`,
+`level_stats` y las columnas de resumen de `users`) deben coincidir con
+reconstruirlos desde el historial con `backfill_stats.py`.
+"""
+import random
+import pytest
+from sqlalchemy import select
+from model import session_scope, User, UserStats, LevelStats
+from controller import test_controller
+from controller.user_controller import UserController
+from backfill_stats import backfill_all
+
+
+def _take_exam(controller, test_type: str, rng: random.Random, finish: bool = True):
+    question = controller.start_new_test(test_type)
+    while question is not None:
+        controller.save_answer(rng.choice(question.options).id, rng.randint(5, 59))
+        question = controller.get_next_question()
+    if finish:
+        return controller.finish_test()
+    controller.load_state(None) # Se abandona sin terminar
+
+
+def _snapshot(factory) -> dict:
+    with session_scope(factory) as session:
+        user_stats = [
+            {c.name: getattr(row, c.name) for c in UserStats.__table__.columns}
+            for row in session.execute(select(UserStats).order_by(UserStats.user_id, UserStats.test_type)).scalars()
+        ]
+        level_stats = session.execute(
+            select(LevelStats.level, LevelStats.correct, LevelStats.total).order_by(LevelStats.level)
+        ).all()
+        users = session.execute(
+            select(User.username, User.practice_attempts, User.final_attempts,
+                   User.avg_practice_score, User.last_final_level).order_by(User.id)
+        ).all()
+    return {"user_stats": user_stats, "level_stats": level_stats, "users": users}
+
+
+@pytest.fixture
+def history(session_factory):
+    """Dos usuarios con exámenes terminados y abandonados de ambos tipos."""
+    rng = random.Random(3)
+    for username, exams in (("ana", ["practice", "practice", "final"]), ("beto", ["final", "practice"])):
+        user = UserController(session_factory).register_user(username, "pw")
+        controller = test_controller.TestController(session_factory)
+        controller.set_current_user(user)
+        for test_type in exams:
+            _take_exam(controller, test_type, rng)
+        _take_exam(controller, "practice", rng, finish=False)
+    return session_factory
+
+
+def test_incremental_stats_match_a_rebuild(history):
+    incremental = _snapshot(history)
+    with session_scope(history) as session:
+        backfill_all(session)
+    assert _snapshot(history) == incremental
+
+
+def test_level_stats_count_every_answer(history):
+    level_stats = _snapshot(history)["level_stats"]
+    # 2 prácticas terminadas de ana + 1 de beto (20 c/u), 2 finales (40 c/u) y 2 abandonadas
+    assert sum(total for _, _, total in level_stats) == 3 * 20 + 2 * 40 + 2 * 20
+
+
+def test_user_summary_counts_started_attempts(history):
+    users = {row.username: row for row in _snapshot(history)["users"]}
+    assert (users["ana"].practice_attempts, users["ana"].final_attempts) == (3, 1)
+    assert (users["beto"].practice_attempts, users["beto"].final_attempts) == (2, 1)
+
+    with session_scope(history) as session:
+        ana_id = session.execute(select(User.id).where(User.username == "ana")).scalar_one()
+    dashboard = test_controller.TestController(history).get_dashboard_data(ana_id)
+    assert dashboard["practice_stats"]["attempts_count"] == 2 # Solo los terminados
+    assert dashboard["final_stats"]["attempts_count"] == 1
+    assert len(dashboard["practice_stats"]["scores_over_time"]) == 2
@@ -2,13 +2,14 @@ import sys
 from PyQt5.QtWidgets import (
     QWidget, QLabel, QPushButton, QVBoxLayout, QHBoxLayout, 
     QApplication, QTabWidget, QFrame, QGridLayout, QGroupBox,
-    QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView
+    QTableView, QHeaderView, QAbstractItemView, QLineEdit
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QFont
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 from constants import MASTER_STYLESHEET
+from view.user_table_model import AdminUserTableModel
 
 class AdminDashboardWindow(QWidget):
     
@@ -101,23 +102,45 @@ class AdminDashboardWindow(QWidget):
         info_label = QLabel("Haz doble clic en un usuario para ver su historial detallado.")
         info_label.setAlignment(Qt.AlignCenter)
         
-        self.user_table = QTableWidget()
-        self.user_table.setColumnCount(5)
-        self.user_table.setHorizontalHeaderLabels([
-            "Usuario", "Intentos Práctica", "Intentos Final", 
-            "Promedio Práctica (%)", "Último Nivel Final"
-        ])
-        self.user_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.user_filter_input = QLineEdit()
+        self.user_filter_input.setPlaceholderText("Buscar usuario (empieza con...)")
+        
+        # La tabla es virtual: el modelo pide las filas a la BD por páginas
+        self.user_model = AdminUserTableModel()
+        self.user_table = QTableView()
+        self.user_table.setModel(self.user_model)
+        self.user_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.user_table.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.user_table.setSelectionMode(QAbstractItemView.SingleSelection)
         self.user_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.user_table.verticalHeader().hide()
+        self.user_table.setSortingEnabled(True)
+        self.user_table.sortByColumn(0, Qt.AscendingOrder)
+        
+        # Esperamos a que el usuario deje de escribir antes de filtrar
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(300)
+        self.filter_timer.timeout.connect(
+            lambda: self.user_model.set_filter(self.user_filter_input.text())
+        )
+        self.user_filter_input.textChanged.connect(self.filter_timer.start)
 
         main_layout.addWidget(info_label)
+        main_layout.addWidget(self.user_filter_input)
         main_layout.addWidget(self.user_table)
         return tab_widget
 
     # --- Métodos para el Controlador ---
+    def set_loading(self, loading: bool):
+        """Muestra el estado de carga mientras los datos llegan del worker."""
+        self.title_label.setText(
+            "Dashboard de Administrador (Cargando...)" if loading else "Dashboard de Administrador"
+        )
+        self.tabs.setEnabled(not loading)
+
     def update_data(self, data: dict):
+        self.set_loading(False)
         stats = data.get("global_stats", {})
         self.kpi_widgets["total_users"].setText(str(stats.get("total_users", 0)))
         self.kpi_widgets["total_practice_attempts"].setText(str(stats.get("total_practice_attempts", 0)))
@@ -144,12 +167,12 @@ class AdminDashboardWindow(QWidget):
             ax.set_title("Precisión de todas las preguntas respondidas por nivel")
         canvas.draw()
         
-        user_details = data.get("user_details", [])
-        self.user_table.setRowCount(len(user_details))
-        
-        for row, user in enumerate(user_details):
-            self.user_table.setItem(row, 0, QTableWidgetItem(user.get("username")))
-            self.user_table.setItem(row, 1, QTableWidgetItem(str(user.get("practice_attempts"))))
-            self.user_table.setItem(row, 2, QTableWidgetItem(str(user.get("final_attempts"))))
-            self.user_table.setItem(row, 3, QTableWidgetItem(f"{user.get('avg_practice_score', 0.0):.1f} %"))
-            self.user_table.setItem(row, 4, QTableWidgetItem(user.get("last_final_level")))
\ No newline at end of file
+        # La tabla de usuarios se recarga desde la primera página
+        self.user_model.reload()
+
+    def set_user_page_source(self, fetch_page):
+        """Conecta la tabla de usuarios con la función que trae cada página."""
+        self.user_model.set_fetch_page(fetch_page)
+
+    def username_at(self, index) -> str | None:
+        return self.user_model.username_at(index.row())
\ No newline at end of file
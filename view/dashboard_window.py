@@ -104,7 +104,13 @@ class DashboardWindow(QWidget):
             
         return tab_widget
 
+    def set_loading(self, loading: bool):
+        """Muestra el estado de carga mientras los datos llegan del worker."""
+        self.title_label.setText("Mi Progreso (Cargando...)" if loading else "Mi Progreso")
+        self.tabs.setEnabled(not loading)
+
     def update_data(self, data: dict):
+        self.set_loading(False)
         self._update_tab_ui(
             widgets=self.practice_widgets, stats=data.get("practice_stats", {}), tab_type="practice"
         )
@@ -0,0 +1,103 @@
+import os
+import json
+from collections import OrderedDict
+from PyQt5.QtCore import Qt, QSize
+from PyQt5.QtGui import QImage, QImageReader, QPixmap
+from constants import IMAGES_DIR, QUESTION_IMAGE_SIZE, IMAGE_CACHE_SIZE, IMAGE_MANIFEST
+
+
+def load_image_manifest(manifest_path: str = IMAGE_MANIFEST) -> dict | None:
+    """
+    Lee el manifiesto de `build_images.py`. Retorna None si no existe o si
+    se generó para otro tamaño de imagen (hay que volver a construirlo).
+    """
+    if not os.path.isfile(manifest_path):
+        return None
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    if tuple(manifest.get("size", ())) != tuple(QUESTION_IMAGE_SIZE):
+        print(f"Advertencia: '{manifest_path}' es de otro tamaño de imagen; se usan las originales.")
+        return None
+    return manifest
+
+
+def load_scaled_image(file_path: str, size: QSize) -> QImage | None:
+    """
+    Decodifica `file_path` ya escalada a `size` (conservando la proporción).
+    Usa `QImage`, así que puede llamarse fuera del hilo de la GUI.
+    Retorna None si el archivo no existe o no se puede leer.
+    """
+    reader = QImageReader(file_path)
+    reader.setAutoTransform(True)
+    original = reader.size()
+    if original.isValid():
+        # El decodificador de JPEG reduce mientras lee: nunca se arma la imagen completa
+        reader.setScaledSize(original.scaled(size, Qt.KeepAspectRatio))
+    image = reader.read()
+    return None if image.isNull() else image
+
+
+class ImageCache:
+    """
+    Caché LRU de las imágenes de las preguntas, ya escaladas al tamaño de la
+    etiqueta de `TestWindow`. Los `QPixmap` solo se crean y se leen en el
+    hilo de la GUI; la decodificación previa (`load`) puede hacerse en un
+    worker y entregarse con `put`.
+
+    Si existe el manifiesto de `build_images.py`, las imágenes se leen de
+    la carpeta construida y las que no aparecen en él ni se buscan en disco.
+    """
+
+    def __init__(self, size: tuple[int, int] = QUESTION_IMAGE_SIZE, max_items: int = IMAGE_CACHE_SIZE,
+                 device_pixel_ratio: float = 1.0, manifest_path: str = IMAGE_MANIFEST):
+        self.manifest = load_image_manifest(manifest_path)
+        self.build_dir = os.path.dirname(manifest_path)
+        # Con pantallas HiDPI se decodifica a la resolución física de la
+        # etiqueta, pero nunca a más de la que tienen las imágenes construidas
+        # (agrandarlas solo las haría borrosas; mejor que Qt escale al pintar).
+        if self.manifest is not None:
+            device_pixel_ratio = min(device_pixel_ratio, self.manifest.get("scale", 1))
+        self.device_pixel_ratio = device_pixel_ratio
+        self.size = QSize(round(size[0] * device_pixel_ratio), round(size[1] * device_pixel_ratio))
+        self.max_items = max_items
+        self._pixmaps: OrderedDict[str, QPixmap | None] = OrderedDict()
+
+    def source(self, image_path: str) -> str | None:
+        """Archivo del que se carga `image_path`: el construido, o el original si no hay manifiesto."""
+        if self.manifest is None:
+            return os.path.join(IMAGES_DIR, image_path)
+        entry = self.manifest["images"].get(image_path)
+        return os.path.join(self.build_dir, entry["file"]) if entry else None
+
+    def load(self, image_path: str) -> QImage | None:
+        """Decodifica la imagen al tamaño de la caché. No toca la caché: se puede llamar desde un worker."""
+        file_path = self.source(image_path)
+        return load_scaled_image(file_path, self.size) if file_path else None
+
+    def __contains__(self, image_path: str) -> bool:
+        return image_path in self._pixmaps
+
+    def get(self, image_path: str) -> QPixmap | None:
+        """Retorna el pixmap escalado; si no estaba precargado, lo decodifica aquí."""
+        if image_path in self._pixmaps:
+            self._pixmaps.move_to_end(image_path)
+            return self._pixmaps[image_path]
+        self.put(image_path, self.load(image_path))
+        return self._pixmaps[image_path]
+
+    def put(self, image_path: str, image: QImage | None):
+        """
+        Guarda una imagen decodificada. None también se guarda, para no
+        volver a buscar en disco un archivo que no existe.
+        """
+        pixmap = None
+        if image is not None:
+            pixmap = QPixmap.fromImage(image)
+            pixmap.setDevicePixelRatio(self.device_pixel_ratio)
+        self._pixmaps[image_path] = pixmap
+        self._pixmaps.move_to_end(image_path)
+        while len(self._pixmaps) > self.max_items:
+            self._pixmaps.popitem(last=False)
+
+    def clear(self):
+        self._pixmaps.clear()
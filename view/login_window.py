@@ -66,6 +66,14 @@ class LoginWindow(QWidget):
     def get_credentials(self) -> tuple[str, str]:
         return self.username_input.text(), self.password_input.text()
 
+    def set_busy(self, busy: bool):
+        """Bloquea el formulario mientras se verifica la contraseña en segundo plano."""
+        self.login_button.setEnabled(not busy)
+        self.register_button.setEnabled(not busy)
+        self.username_input.setReadOnly(busy)
+        self.password_input.setReadOnly(busy)
+        self.login_button.setText("Verificando..." if busy else "Iniciar Sesión")
+
     def show_error(self, message: str):
         self.error_label.setText(message)
 
@@ -74,6 +74,15 @@ class MainMenuWindow(QWidget):
         self.setLayout(main_layout)
 
     # --- Métodos para el Controlador ---
+    def set_loading(self, username: str):
+        """Muestra el menú mientras se cargan los intentos (sin poder iniciar un examen)."""
+        self.welcome_label.setText(f"Bienvenido, {username}")
+        self.practice_attempts_label.setText("Intentos restantes: Cargando...")
+        self.final_attempts_label.setText("Intentos restantes: Cargando...")
+        self.practice_button.setEnabled(False)
+        self.final_button.setEnabled(False)
+        self.show_error("")
+
     def update_info(self, username: str, counts: dict):
         self.welcome_label.setText(f"Bienvenido, {username}")
         
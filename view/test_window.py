@@ -1,16 +1,16 @@
 # view/test_window.py
 
 import sys
-import os
 import random
 from PyQt5.QtWidgets import (
     QWidget, QLabel, QPushButton, QVBoxLayout, QApplication, QRadioButton, 
     QButtonGroup, QFrame, QSpacerItem, QSizePolicy, QHBoxLayout
 )
 from PyQt5.QtCore import Qt, QTimer
-from PyQt5.QtGui import QFont, QPixmap
+from PyQt5.QtGui import QFont
 from model import Question 
-from constants import MASTER_STYLESHEET
+from view.image_cache import ImageCache
+from constants import MASTER_STYLESHEET, QUESTION_IMAGE_SIZE
 
 class TestWindow(QWidget):
     
@@ -19,6 +19,8 @@ class TestWindow(QWidget):
         self.current_question: Question | None = None
         self.remaining_time = 60
         self.init_ui()
+        # Las imágenes se guardan ya escaladas; AppController precarga la siguiente
+        self.image_cache = ImageCache(device_pixel_ratio=self.devicePixelRatioF())
 
     def init_ui(self):
         # --- Configuración de la Ventana ---
@@ -40,8 +42,7 @@ class TestWindow(QWidget):
 
         self.image_label = QLabel()
         self.image_label.setAlignment(Qt.AlignCenter)
-        self.image_label.setScaledContents(True)
-        self.image_label.setFixedSize(540, 250) 
+        self.image_label.setFixedSize(*QUESTION_IMAGE_SIZE) 
         self.image_label.hide() 
 
         self.options_frame = QFrame()
@@ -107,15 +108,10 @@ class TestWindow(QWidget):
         self.question_number_label.setText(f"Pregunta {number}/{total}")
         self.question_text_label.setText(question.text)
 
-        if question.image_path:
-            image_full_path = f"images/{question.image_path}"
-            if os.path.exists(image_full_path):
-                pixmap = QPixmap(image_full_path)
-                self.image_label.setPixmap(pixmap)
-                self.image_label.show()
-            else:
-                self.image_label.hide()
-                self.image_label.clear()
+        pixmap = self.image_cache.get(question.image_path) if question.image_path else None
+        if pixmap is not None:
+            self.image_label.setPixmap(pixmap)
+            self.image_label.show()
         else:
             self.image_label.hide()
             self.image_label.clear()
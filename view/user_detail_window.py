@@ -4,12 +4,15 @@ from PyQt5.QtWidgets import (
     QApplication, QFrame, QGridLayout, QGroupBox,
     QTableWidget, QTableWidgetItem, QHeaderView, QListWidget, QListWidgetItem
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtGui import QFont, QColor
 from constants import MASTER_STYLESHEET
 
 class UserDetailWindow(QWidget):
     
+    # Se emite con el id del intento cuyas respuestas hay que cargar
+    attempt_selected = pyqtSignal(int)
+    
     def __init__(self):
         super().__init__()
         self.user_data = {}
@@ -100,12 +103,31 @@ class UserDetailWindow(QWidget):
         self.kpi_score.setText(f"Puntaje: {attempt_data['score']}%")
         self.kpi_level.setText(f"Nivel: {attempt_data['level']}")
         
-        total_seconds = attempt_data['total_time_seconds']
+        # Las respuestas se piden al controlador solo para el intento elegido
+        self.kpi_time.setText("Tiempo Total: Cargando...")
+        self.detail_table.setRowCount(0)
+        self.attempt_selected.emit(attempt_id)
+
+    def show_attempt_error(self, attempt_id: int, error: str):
+        """Avisa que no se pudieron cargar las respuestas de un intento."""
+        current_item = self.attempts_list.currentItem()
+        if not current_item or current_item.data(Qt.UserRole) != attempt_id:
+            return
+        print(f"Error al cargar las respuestas del intento {attempt_id}: {error}")
+        self.kpi_time.setText("Tiempo Total: Error al cargar")
+
+    def show_attempt_answers(self, attempt_id: int, detail: dict):
+        """Llena la tabla con las respuestas de un intento ya cargadas."""
+        current_item = self.attempts_list.currentItem()
+        if not current_item or current_item.data(Qt.UserRole) != attempt_id:
+            return # El usuario ya eligió otro intento
+        
+        total_seconds = detail['total_time_seconds']
         minutes = total_seconds // 60
         seconds = total_seconds % 60
         self.kpi_time.setText(f"Tiempo Total: {minutes}m {seconds}s")
 
-        answers = attempt_data.get("answers", [])
+        answers = detail.get("answers", [])
         self.detail_table.setRowCount(len(answers))
         
         for row, ans in enumerate(answers):
@@ -124,7 +146,17 @@ class UserDetailWindow(QWidget):
                 item.setBackground(color)
                 self.detail_table.setItem(row, col, item)
 
-    # --- Método para el Controlador ---
+    # --- Métodos para el Controlador ---
+    def set_loading(self, username: str):
+        """Limpia la ventana y muestra el estado de carga del usuario."""
+        self.user_data = {}
+        self.username_label.setText(f"Historial de Usuario: {username} (Cargando...)")
+        self.attempts_list.clear()
+        self.detail_table.setRowCount(0)
+        self.kpi_score.setText("Puntaje: N/A")
+        self.kpi_level.setText("Nivel: N/A")
+        self.kpi_time.setText("Tiempo Total: N/A")
+
     def update_data(self, data: dict):
         self.user_data = data
         username = data.get("username", "N/A")
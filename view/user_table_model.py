@@ -0,0 +1,117 @@
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+
+class AdminUserTableModel(QAbstractTableModel):
+    """
+    Modelo de la tabla "Detalle por Usuario" del panel de admin.
+
+    No guarda todos los usuarios: pide filas por páginas a medida que la
+    vista se desplaza (`canFetchMore`/`fetchMore`). Ordenar y filtrar
+    reinician la paginación; el trabajo lo hace la BD, no la vista.
+
+    `fetch_page(sort_key, descending, username_prefix, after, limit, on_page)`
+    pide una página sin bloquear (los argumentos son los de
+    `TestController.get_admin_user_page`) y después llama a `on_page(filas)`
+    en el hilo de la GUI, o a `on_page(None)` si la carga falló.
+    """
+
+    COLUMNS = [
+        ("username", "Usuario"),
+        ("practice_attempts", "Intentos Práctica"),
+        ("final_attempts", "Intentos Final"),
+        ("avg_practice_score", "Promedio Práctica (%)"),
+        ("last_final_level", "Último Nivel Final"),
+    ]
+
+    def __init__(self, page_size: int = 200, parent=None):
+        super().__init__(parent)
+        self.page_size = page_size
+        self.fetch_page = None
+        self._rows: list[dict] = []
+        self._exhausted = True
+        self._loading = False # Hay una página en camino
+        self._generation = 0 # Cambia en cada `reload`: descarta páginas viejas
+        self._sort_key = "username"
+        self._descending = False
+        self._username_prefix = ""
+
+    # --- Configuración (la llama el controlador / la ventana) ---
+    def set_fetch_page(self, fetch_page):
+        """Define de dónde salen las filas (no carga nada hasta `reload`)."""
+        self.fetch_page = fetch_page
+
+    def set_filter(self, username_prefix: str):
+        self._username_prefix = username_prefix.strip()
+        self.reload()
+
+    def reload(self):
+        """Descarta las filas cargadas y trae la primera página."""
+        self.beginResetModel()
+        self._rows = []
+        self._exhausted = self.fetch_page is None
+        self._loading = False
+        self._generation += 1
+        self.endResetModel()
+        self.fetchMore()
+
+    def username_at(self, row: int) -> str | None:
+        if 0 <= row < len(self._rows):
+            return self._rows[row]["username"]
+        return None
+
+    # --- Carga incremental ---
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and not self._exhausted and not self._loading
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted or self._loading:
+            return
+        self._loading = True
+        after = self._rows[-1]["cursor"] if self._rows else None
+        generation = self._generation
+        self.fetch_page(
+            self._sort_key, self._descending, self._username_prefix, after, self.page_size,
+            lambda page: self._append_page(generation, page)
+        )
+
+    def _append_page(self, generation: int, page: list[dict] | None):
+        if generation != self._generation:
+            return # Llegó después de ordenar o filtrar
+        self._loading = False
+        if page is None:
+            self._exhausted = True # No reintentar en bucle; `reload` vuelve a intentarlo
+            return
+        if len(page) < self.page_size:
+            self._exhausted = True
+        if not page:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(page) - 1)
+        self._rows.extend(page)
+        self.endInsertRows()
+
+    # --- API de QAbstractTableModel ---
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def data(self, index: QModelIndex, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        key = self.COLUMNS[index.column()][0]
+        value = self._rows[index.row()].get(key)
+        if key == "avg_practice_score":
+            return f"{value or 0.0:.1f} %"
+        return str(value)
+
+    def headerData(self, section: int, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.COLUMNS[section][1]
+        return None
+
+    def sort(self, column: int, order=Qt.AscendingOrder):
+        self._sort_key = self.COLUMNS[column][0]
+        self._descending = order == Qt.DescendingOrder
+        self.reload()